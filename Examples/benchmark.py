@@ -0,0 +1,127 @@
+import os
+
+cmssw_base = os.getenv("CMSSW_BASE")
+
+import ROOT as r
+r.gROOT.LoadMacro('%s/src/LFVAnalysis/LFVUtilities/include/getValFromVectorBool.h+'%cmssw_base)
+
+from LFVAnalysis.LFVAnalyzers.lfvAnalyzer import lfvAnalyzer
+from LFVAnalysis.LFVUtilities.syntheticNtuple import makeSyntheticNtuple
+
+import json
+import multiprocessing
+import resource
+import time
+
+def getPeakRSS():
+    """
+    Returns the peak resident set size in MB of this process and of its
+    largest terminated child, e.g. a parallel worker
+    """
+
+    # ru_maxrss is given in kB on linux
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024.
+
+def runScale(dict_params, queue):
+    """
+    Times the construction, analyze() and write() of an lfvAnalyzer over the
+    synthetic ntuple of dict_params and puts the dictionary of results in queue.
+    Runs in its own process so the peak memory of each scale is separate.
+    """
+
+    dict_results = dict(dict_params)
+
+    start = time.time()
+    lfvAna = lfvAnalyzer(dict_params["inputFileName"], histoBackend=dict_params["histoBackend"])
+    dict_results["constructionTime"] = time.time() - start
+
+    start = time.time()
+    lfvAna.analyze(
+            listOfTriggers=["trig_HLT_Mu50_accept","trig_HLT_TkMu50_accept"],
+            printLvl=dict_params["numEvts"] + 1,
+            numWorkers=dict_params["numWorkers"],
+            chunkSize=dict_params["chunkSize"],
+            fillBufferSize=dict_params["fillBufferSize"],
+            printCandInfo=False)
+    dict_results["analyzeTime"] = time.time() - start
+    dict_results["eventsPerSecond"] = dict_params["numEvts"] / max(dict_results["analyzeTime"], 1e-9)
+
+    start = time.time()
+    lfvAna.write(dict_params["outputFileName"])
+    dict_results["writeTime"] = time.time() - start
+
+    dict_results["peakRSS"] = getPeakRSS()
+
+    queue.put(dict_results)
+
+    return
+
+from argparse import ArgumentParser
+parser = ArgumentParser(description="Benchmarks lfvAnalyzer on synthetic IIHE ntuples of several sizes")
+parser.add_argument("--scales", nargs="+", type=int, default=[1000,10000,100000], help="number of events of each benchmarked ntuple")
+parser.add_argument("-o", "--output", default="benchmark.json", help="physical filename of the results file, one JSON object per scale is appended")
+parser.add_argument("--workDir", default="benchmark", help="directory holding the synthetic ntuples and the analysis outputs, existing ntuples are reused")
+parser.add_argument("--label", default="", help="label stored with each result, e.g. the commit being benchmarked")
+parser.add_argument("-j", "--numWorkers", type=int, default=1, help="number of worker processes of analyze()")
+parser.add_argument("--chunkSize", type=int, default=None, help="chunk size of the columnar selection, see analyze()")
+parser.add_argument("--fillBufferSize", type=int, default=None, help="size of the histogram fill buffers, see analyze()")
+parser.add_argument("--histoBackend", default="root", help="backend of the histograms, root or numpy")
+parser.add_argument("--numMuons", type=float, default=2., help="mean number of muons per event")
+parser.add_argument("--numElectrons", type=float, default=2., help="mean number of electrons per event")
+parser.add_argument("--numTaus", type=float, default=3., help="mean number of taus per event")
+parser.add_argument("--numGen", type=float, default=20., help="mean number of gen particles per event")
+parser.add_argument("--numPadBranches", type=int, default=0, help="number of additional branches not read by the analysis")
+parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic event generator")
+parser.add_argument("--debug", action="store_true", help="print additional debugging information")
+args = parser.parse_args()
+
+if not os.path.isdir(args.workDir):
+    os.makedirs(args.workDir)
+
+dict_multiplicities = {
+        "gsf_n":args.numElectrons,
+        "mc_n":args.numGen,
+        "mu_n":args.numMuons,
+        "tau_n":args.numTaus
+        }
+
+# The ntuple is identified by all generator parameters, existing ntuples are reused
+ntupleTag = "mu%g_el%g_tau%g_gen%g_pad%i_seed%i"%(args.numMuons, args.numElectrons, args.numTaus, args.numGen, args.numPadBranches, args.seed)
+
+for numEvts in args.scales:
+    inputFileName = os.path.join(args.workDir, "synthetic_%s_%i.root"%(ntupleTag,numEvts))
+    if not os.path.isfile(inputFileName):
+        print "generating %s"%inputFileName
+        makeSyntheticNtuple(inputFileName, numEvts, dict_multiplicities=dict_multiplicities, numPadBranches=args.numPadBranches, seed=args.seed, debug=args.debug)
+
+    dict_params = {
+            "label":args.label,
+            "time":time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "inputFileName":inputFileName,
+            "outputFileName":os.path.join(args.workDir, "output_%s_%i.root"%(ntupleTag,numEvts)),
+            "numEvts":numEvts,
+            "numWorkers":args.numWorkers,
+            "chunkSize":args.chunkSize,
+            "fillBufferSize":args.fillBufferSize,
+            "histoBackend":args.histoBackend,
+            "multiplicities":dict_multiplicities,
+            "numPadBranches":args.numPadBranches
+            }
+
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=runScale, args=(dict_params, queue))
+    proc.start()
+    dict_results = queue.get()
+    proc.join()
+
+    print "| %i events | construction %.2f s | analyze %.2f s | write %.2f s | %.1f events/s | peak RSS %.1f MB |"%(
+            numEvts,
+            dict_results["constructionTime"],
+            dict_results["analyzeTime"],
+            dict_results["writeTime"],
+            dict_results["eventsPerSecond"],
+            dict_results["peakRSS"])
+
+    with open(args.output, "a") as resultsFile:
+        resultsFile.write(json.dumps(dict_results, sort_keys=True))
+        resultsFile.write("\n")
@@ -0,0 +1,21 @@
+import os
+
+cmssw_base = os.getenv("CMSSW_BASE")
+
+import ROOT as r
+r.gROOT.LoadMacro('%s/src/LFVAnalysis/LFVUtilities/include/getValFromVectorBool.h+'%cmssw_base)
+
+from LFVAnalysis.LFVUtilities.columnarConverter import convertToColumnar
+
+from argparse import ArgumentParser
+parser = ArgumentParser(description="Converts IIHE ntuples to columnar directories read memory-mapped by lfvAnalyzer, pass the directory in place of the file")
+parser.add_argument("inputs", nargs="+", help="input files")
+parser.add_argument("-o", "--outputDir", default=".", help="directory the columnar directories are written to, one per input file named after it")
+parser.add_argument("--chunkSize", type=int, default=10000, help="number of entries read at once")
+parser.add_argument("--debug", action="store_true", help="print additional debugging information")
+args = parser.parse_args()
+
+for inputFileName in args.inputs:
+    outputDir = os.path.join(args.outputDir, os.path.splitext(os.path.basename(inputFileName))[0] + ".columns")
+    print "converting %s to %s"%(inputFileName, outputDir)
+    convertToColumnar(inputFileName, outputDir, chunkSize=args.chunkSize, debug=args.debug)
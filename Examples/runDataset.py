@@ -0,0 +1,46 @@
+import os
+
+cmssw_base = os.getenv("CMSSW_BASE")
+
+import ROOT as r
+r.gROOT.LoadMacro('%s/src/LFVAnalysis/LFVUtilities/include/getValFromVectorBool.h+'%cmssw_base)
+
+from LFVAnalysis.LFVAnalyzers.datasetRunner import runDataset
+
+from argparse import ArgumentParser
+parser = ArgumentParser(description="Analyzes a dataset of IIHE ntuples and writes one merged output file")
+parser.add_argument("inputs", nargs="+", help="input files or columnar directories, see convertColumnar.py, glob patterns or .txt files listing input files")
+parser.add_argument("-o", "--output", default="output.root", help="physical filename of the merged output TFile")
+parser.add_argument("-j", "--numWorkers", type=int, default=None, help="number of worker processes, default is the number of cores")
+parser.add_argument("--isData", action="store_true", help="input files are data")
+parser.add_argument("--triggers", nargs="*", default=["trig_HLT_Mu50_accept","trig_HLT_TkMu50_accept"], help="list of triggers, the logical OR is required")
+parser.add_argument("--cutFlow", action="store_true", help="record, print and write the cut-flow of the reco level selection")
+parser.add_argument("--reorderCutsAfter", type=int, default=None, help="reorder the cuts of each selection level after this number of events, cheapest and most rejecting first, not with --cutFlow")
+parser.add_argument("--skim", default=None, help="physical filename of the skim of selected events, one part is written per job")
+parser.add_argument("--maskCache", default=None, help="directory of the selection mask cache, repeated runs skip the reco level selection, not with --cutFlow")
+parser.add_argument("--metrics", default=None, help="physical filename of a file the throughput and stage times are streamed to")
+parser.add_argument("--numpyHistos", action="store_true", help="fill numpy histograms, converted to TH1F and TH2F when the output is written")
+parser.add_argument("--checkpoint", default=None, help="physical filename of a checkpoint of the merged histograms, written periodically")
+parser.add_argument("--checkpointEvery", type=int, default=None, help="number of events between two checkpoints")
+parser.add_argument("--checkpointInterval", type=float, default=600., help="number of seconds between two checkpoints")
+parser.add_argument("--resume", action="store_true", help="resume from --checkpoint if it exists, the same inputs and options must be given")
+parser.add_argument("--debug", action="store_true", help="print additional debugging information")
+args = parser.parse_args()
+
+runDataset(
+        args.inputs,
+        args.output,
+        numWorkers=args.numWorkers,
+        config={ "isData":args.isData, "histoBackend":("numpy" if args.numpyHistos else "root") },
+        debug=args.debug,
+        checkpointFileName=args.checkpoint,
+        checkpointEvery=args.checkpointEvery,
+        checkpointInterval=args.checkpointInterval,
+        resume=args.resume,
+        listOfTriggers=args.triggers,
+        printLvl=10000,
+        printCutFlow=args.cutFlow,
+        reorderCutsAfter=args.reorderCutsAfter,
+        metricsFileName=args.metrics,
+        skimFileName=args.skim,
+        maskCacheDir=args.maskCache)
@@ -0,0 +1,236 @@
+from LFVAnalysis.LFVAnalyzers.lfvAnalyzer import analyzeEntryRange, lfvAnalyzer
+from LFVAnalysis.LFVUtilities.checkpoint import checkpointWriter
+from LFVAnalysis.LFVUtilities.entryRanges import splitEntryRange
+from LFVAnalysis.LFVUtilities.eventSource import columnarDirSource
+from LFVAnalysis.LFVUtilities.skimWriter import getPartFileName
+from LFVAnalysis.LFVUtilities.stageTimer import stageTimer
+
+import glob
+import math
+import multiprocessing
+import os
+import ROOT as r
+
+def getListOfFiles(listOfInputs):
+    """
+    Returns the sorted list of files matching listOfInputs, duplicates are removed
+
+    listOfInputs - list of physical filenames and/or glob patterns, a text file
+                   ending in .txt is read as a list of filenames, one per line
+    """
+
+    setOfFiles = set()
+    for inputName in listOfInputs:
+        if inputName.endswith(".txt"):
+            with open(inputName, "r") as listFile:
+                setOfFiles.update( line.strip() for line in listFile if len(line.strip()) > 0 and not line.startswith("#") )
+        elif glob.has_magic(inputName):
+            setOfFiles.update(glob.glob(inputName))
+        else:
+            setOfFiles.add(inputName)
+
+    return sorted(setOfFiles)
+
+def makeJobs(listOfFiles, numWorkers, inputTreeName="IIHEAnalysis", jobsPerWorker=4, debug=False):
+    """
+    Splits the entries of all files into jobs of similar entry count, large
+    files are split into several cluster-aligned entry ranges and small files
+    form a single job.
+
+    Returns a list of tuples (fileName, firstEntry, numEntries) sorted by
+    decreasing numEntries, so the largest jobs are scheduled first
+
+    listOfFiles   - list of physical filenames
+    numWorkers    - number of worker processes the jobs will run on
+    inputTreeName - name of TTree found in each file
+    jobsPerWorker - average number of jobs per worker, more jobs balance the
+                    load better at the cost of some overhead per job
+    debug         - If true prints additional debugging information
+    """
+
+    dict_entries = {}
+    for fileName in listOfFiles:
+        if os.path.isdir(fileName):
+            dict_entries[fileName] = columnarDirSource(fileName).GetEntries()
+            continue
+
+        dataFile = r.TFile.Open(fileName, "READ")
+        if not dataFile or dataFile.IsZombie():
+            print "Error unable to open file %s"%fileName
+            print "exiting"
+            exit(os.EX_DATAERR)
+        dataTree = dataFile.Get(inputTreeName)
+        if not dataTree:
+            print "Error TTree %s not found in TFile %s"%(inputTreeName, fileName)
+            print "exiting"
+            exit(os.EX_DATAERR)
+        dict_entries[fileName] = dataTree.GetEntries()
+        dataFile.Close()
+
+    totalEntries = sum(dict_entries.values())
+    targetSize = max(1, int(math.ceil( float(totalEntries) / max(1, jobsPerWorker * numWorkers) )))
+
+    listOfJobs = []
+    for fileName in listOfFiles:
+        numEntries = dict_entries[fileName]
+        if numEntries == 0:
+            if debug:
+                print "skipping empty file %s"%fileName
+            continue
+        if numEntries <= targetSize:
+            listOfJobs.append( (fileName, 0, numEntries) )
+            continue
+
+        numChunks = int(math.ceil( float(numEntries) / targetSize ))
+        if os.path.isdir(fileName):
+            for rangeFirst,rangeNum in columnarDirSource(fileName).splitEntryRange(numChunks):
+                listOfJobs.append( (fileName, rangeFirst, rangeNum) )
+            continue
+
+        # Split large files on cluster boundaries
+        dataFile = r.TFile.Open(fileName, "READ")
+        dataTree = dataFile.Get(inputTreeName)
+        for rangeFirst,rangeNum in splitEntryRange(dataTree, numChunks):
+            listOfJobs.append( (fileName, rangeFirst, rangeNum) )
+        dataFile.Close()
+
+    listOfJobs.sort(key=lambda job: job[2], reverse=True)
+
+    if debug:
+        print "| fileName | firstEntry | numEntries |"
+        print "| -------- | ---------- | ---------- |"
+        for job in listOfJobs:
+            print "| %s | %i | %i |"%job
+
+    return listOfJobs
+
+def runDataset(listOfInputs, outputFileName, numWorkers=None, inputTreeName="IIHEAnalysis", config=None, debug=False, checkpointFileName=None, checkpointEvery=None, checkpointInterval=600., resume=False, **kwargs):
+    """
+    Analyzes every file of a dataset on a local pool of numWorkers processes
+    and writes the merged histograms to outputFileName, with the same layout
+    as lfvAnalyzer.write().  Jobs are handed out one at a time, a worker picks
+    up the next pending job as soon as it is idle.
+
+    Returns the lfvAnalyzer holding the merged histograms
+
+    listOfInputs    - list of physical filenames and/or glob patterns, see getListOfFiles
+    outputFileName  - physical filename of the output TFile
+    numWorkers      - number of worker processes, if None the number of cores
+    inputTreeName   - name of TTree found in each file
+    config          - dictionary of analysis flags, see lfvAnalyzer.getConfig(),
+                      keys which are not given take the lfvAnalyzer defaults
+    debug           - If true prints additional debugging information
+    checkpointFileName - if not None the merged results and the finished jobs
+                      are written to this file every checkpointEvery events
+                      and/or checkpointInterval seconds, see checkpointWriter
+    checkpointEvery - number of events between two checkpoints, None for no
+                      event interval
+    checkpointInterval - number of seconds between two checkpoints, None for
+                      no time interval
+    resume          - if true and checkpointFileName exists the jobs finished
+                      before the checkpoint are not analyzed again, the output
+                      is identical to the output of an uninterrupted run
+    kwargs          - keyword arguments passed to lfvAnalyzer.analyze() by each job
+    """
+
+    if numWorkers is None:
+        numWorkers = multiprocessing.cpu_count()
+
+    listOfFiles = getListOfFiles(listOfInputs)
+    if len(listOfFiles) == 0:
+        print "Error no input files found matching:"
+        print ""
+        print listOfInputs
+        print ""
+        print "exiting"
+        exit(os.EX_NOINPUT)
+
+    if kwargs.get("maskCacheDir", None) is not None and kwargs.get("printCutFlow", False):
+        print "Error cut-flows do not count entries read from the selection mask cache %s"%kwargs["maskCacheDir"]
+        print "exiting"
+        exit(os.EX_USAGE)
+
+    if kwargs.get("reorderCutsAfter", None) is not None and kwargs.get("printCutFlow", False):
+        print "Error cut-flows count the cuts in their configured order, reorderCutsAfter is not supported together with printCutFlow"
+        print "exiting"
+        exit(os.EX_USAGE)
+
+    # The merged histograms are held by an analyzer of the first file
+    if config is None:
+        config = {}
+    mergedAna = lfvAnalyzer(
+            listOfFiles[0],
+            inputTreeName,
+            isData=config.get("isData", False),
+            anaGen=config.get("anaGen", True),
+            anaReco=config.get("anaReco", True),
+            histoBackend=config.get("histoBackend", "root"))
+
+    # Selection variants are part of the configuration handed to the jobs
+    if kwargs.get("listOfSelectionConfigs", None) is not None:
+        mergedAna.setSelectionConfigs(kwargs.pop("listOfSelectionConfigs"))
+    dict_config = mergedAna.getConfig()
+    dict_config.update(config)
+    mergedAna.setConfig(dict_config)
+
+    listOfJobs = makeJobs(listOfFiles, numWorkers, inputTreeName, debug=debug)
+    print "analyzing %i files in %i jobs with %i workers"%(len(listOfFiles), len(listOfJobs), numWorkers)
+
+    # Jobs do not stream metrics, the merged metrics are streamed here
+    mergedAna.timer = stageTimer(kwargs.pop("metricsFileName", None), kwargs.pop("metricsInterval", 60.))
+
+    listOfArgs = []
+    for idx,(fileName,rangeFirst,rangeNum) in enumerate(listOfJobs):
+        dict_jobConfig = dict(dict_config)
+        dict_jobConfig["inputFileName"] = fileName
+        dict_jobArgs = dict(kwargs)
+        for fileKey in ("skimFileName", "dumpFileName"):
+            if kwargs.get(fileKey, None) is not None:
+                # Each job writes its own part of the skim and event dump
+                dict_jobArgs[fileKey] = getPartFileName(kwargs[fileKey], idx)
+        listOfArgs.append( (dict_jobConfig, rangeFirst, rangeNum, dict_jobArgs) )
+
+    # Jobs finished before the checkpoint are not analyzed again
+    checkpoint = None
+    listOfDoneJobs = []
+    if checkpointFileName is not None:
+        dict_checkpointKey = mergedAna.getCheckpointKey({ "jobs":listOfJobs }, kwargs.get("listOfTriggers", None), kwargs.get("chunkSize", None), kwargs.get("preFilter", None), kwargs.get("printCutFlow", False))
+        if resume:
+            listOfArgs, listOfDoneJobs = mergedAna.resumeJobs(listOfArgs, checkpointFileName, dict_checkpointKey)
+        checkpoint = checkpointWriter(checkpointFileName, checkpointEvery, checkpointInterval)
+
+    mergedAna.timer.begin(sum( rangeNum for jobConfig,rangeFirst,rangeNum,jobArgs in listOfArgs ))
+
+    # Unpickled histograms must not be attached to gDirectory
+    addDirStatus = r.TH1.AddDirectoryStatus()
+    r.TH1.AddDirectory(False)
+
+    pool = multiprocessing.Pool(numWorkers)
+    numDoneEvts = 0
+    try:
+        for idx,dict_results in enumerate(pool.imap_unordered(analyzeEntryRange, listOfArgs, 1)):
+            mergedAna.addResults(dict_results)
+            mergedAna.timer.writeMetricsIfDue()
+            if debug:
+                print "finished %i of %i jobs"%(idx+1, len(listOfArgs))
+
+            listOfDoneJobs.append(dict_results["job"])
+            numDoneEvts += dict_results["job"][2]
+            if checkpoint is not None and checkpoint.due(numDoneEvts):
+                checkpoint.write(numDoneEvts, lambda: mergedAna.getCheckpointState(dict_checkpointKey, listOfDoneJobs))
+    finally:
+        pool.close()
+        pool.join()
+        r.TH1.AddDirectory(addDirStatus)
+        if checkpoint is not None:
+            checkpoint.close()
+
+    mergedAna.timer.end()
+    mergedAna.timer.printSummary()
+
+    if kwargs.get("printCutFlow", False):
+        mergedAna.printCutFlow()
+
+    mergedAna.write(outputFileName, debug)
+
+    return mergedAna
@@ -1,39 +1,102 @@
 from LFVAnalysis.LFVHistograms.ElHistos import ElHistos
 from LFVAnalysis.LFVHistograms.HvyResHistos import HvyResHistos
 from LFVAnalysis.LFVHistograms.MuonHistos import muonIdLabels, muonhitLabels, MuonHistos
-from LFVAnalysis.LFVHistograms.PhysObjHistos import PhysObjHistos
+from LFVAnalysis.LFVHistograms.numpyHisto import getHistoBackend, setHistoBackend
+from LFVAnalysis.LFVHistograms.PhysObjHistos import getOrMakeDirectory, PhysObjHistos
 from LFVAnalysis.LFVHistograms.TauHistos import TauHistos
 
+from LFVAnalysis.LFVUtilities.branchActivation import getRequiredBranches
+from LFVAnalysis.LFVUtilities.candidateBuilder import getMaxMassPair, makeCandidate
+from LFVAnalysis.LFVUtilities.checkpoint import checkpointWriter, readCheckpoint
+from LFVAnalysis.LFVUtilities.columnarSelector import getSelectedObjects
+from LFVAnalysis.LFVUtilities.cutCompiler import compileSelectionLevels, getCascadePlan
+from LFVAnalysis.LFVUtilities.cutFlow import cutFlow
+from LFVAnalysis.LFVUtilities.eventDumper import eventDumper, formatCandInfo, formatGenList, formatTrigInfo, getGenSnapshot
+from LFVAnalysis.LFVUtilities.eventSource import columnarDirSource, openEventSource, treeEventSource
 from LFVAnalysis.LFVUtilities.nesteddict import nesteddict
-from LFVAnalysis.LFVUtilities.selectorEl import getSelectedElectrons, elSelection
-from LFVAnalysis.LFVUtilities.selectorMuon import getSelectedMuons, muonSelection 
-from LFVAnalysis.LFVUtilities.selectorTau import getSelectedTaus, tauSelection 
+from LFVAnalysis.LFVUtilities.preselection import dict_countBranches
+from LFVAnalysis.LFVUtilities.selectionCache import getSharedSelectionMasks, selectionCache
+from LFVAnalysis.LFVUtilities.selectionConfig import selectionConfig
+from LFVAnalysis.LFVUtilities.selectorEl import getSelectedElectronsCascade, elSelection, makeElectron
+from LFVAnalysis.LFVUtilities.selectorGen import defaultGenStatusCodes, getSelectedGenParticles
+from LFVAnalysis.LFVUtilities.selectorMuon import getSelectedMuonsCascade, muonSelection, makeMuon
+from LFVAnalysis.LFVUtilities.selectorTau import getSelectedTausCascade, tauSelection, makeTau
+from LFVAnalysis.LFVUtilities.skimWriter import getPartFileName, skimWriter
+from LFVAnalysis.LFVUtilities.stageTimer import stageTimer
 from LFVAnalysis.LFVUtilities.utilities import selLevels, mcLevels
+from LFVAnalysis.LFVUtilities.vectorBool import vectorBoolCache
 
 from LFVAnalysis.LFVObjects.physicsObject import *
 
+import multiprocessing
 import os
 import ROOT as r
 
+# Compression algorithms of the output TFile, see ROOT::RCompressionSetting::EAlgorithm
+dict_compressAlgos = {
+        "zlib":1,
+        "lzma":2,
+        "lz4":4,
+        "zstd":5
+        }
+
+# Top level directories of the output file, not allowed as names of selection variants
+reservedDirNames = (
+        "CutFlow",
+        "el",
+        "HvyRes",
+        "mu",
+        "tau"
+        )
+
+def analyzeEntryRange(args):
+    """
+    Worker function of lfvAnalyzer.analyzeParallel, analyzes one range of
+    entries with its own lfvAnalyzer and returns its histograms
+
+    args - tuple of (dict_config, firstEntry, numEntries, dict_analyzeArgs) where
+           dict_config is returned by lfvAnalyzer.getConfig() and dict_analyzeArgs
+           holds the keyword arguments passed to lfvAnalyzer.analyze()
+
+    Returns the dictionary returned by lfvAnalyzer.getResults(), with the
+    tuple (inputFileName, firstEntry, numEntries) of the range stored as "job"
+    """
+
+    dict_config, firstEntry, numEntries, dict_analyzeArgs = args
+
+    lfvAna = lfvAnalyzer(dict_config["inputFileName"], dict_config["inputTreeName"], dict_config["isData"], dict_config["anaGen"], dict_config["anaReco"], dict_config.get("eventSource", None), dict_config.get("histoBackend", "root"))
+    lfvAna.setConfig(dict_config)
+    lfvAna.analyze(firstEntry=firstEntry, numEvts=numEntries, **dict_analyzeArgs)
+
+    # Identifies the job in the checkpoints of the merging process
+    dict_results = lfvAna.getResults()
+    dict_results["job"] = (dict_config["inputFileName"], firstEntry, numEntries)
+
+    return dict_results
+
 class lfvAnalyzer:
-    def __init__(self, inputFileName, inputTreeName="IIHEAnalysis", isData=False, anaGen=True, anaReco=True):
+    def __init__(self, inputFileName, inputTreeName="IIHEAnalysis", isData=False, anaGen=True, anaReco=True, eventSource=None, histoBackend="root"):
         """
-        inputFileName - physical filename of input TFile to perform analysis on
+        inputFileName - physical filename of input TFile to perform analysis on,
+                        or directory written by convertToColumnar
         inputTreeName - name of TTree found in inputFileName
         isData - True (False) if running over data (MC)
         anaGen - Set to true if generator level analysis is desired
         anaReco - Set to true if reco level analysis is desired
+        eventSource - Optional, event source to read events from instead of the
+                      TTree of inputFileName, e.g. a columnarEventSource.  Then
+                      inputFileName only labels the input
+        histoBackend - backend of the histograms, "root" for TH1F and TH2F or
+                       "numpy" for numpyTH1 and numpyTH2 which are converted
+                       to TH1F and TH2F by write(), see setHistoBackend
         """
 
-        # Get Input TTree
+        # Get Input Events
         self.inputFileName = inputFileName #store this for later
-        try:
-            self.dataFile = r.TFile(inputFileName, "READ", "", 1)
-            self.dataTree = self.dataFile.Get(inputTreeName)
-        except Exception as e:
-            print "exception occured when trying to retrive TTree %s from TFile %s"%(inputTreeName,inputFileName)
-            print "exception: ", e
-            exit(os.EX_DATAERR)
+        self.inputTreeName = inputTreeName
+        if eventSource is None:
+            eventSource = openEventSource(inputFileName, inputTreeName)
+        self.source = eventSource
 
         # Analysis control flags
         self.isData = isData #whether input file is data or not
@@ -44,7 +107,27 @@ class lfvAnalyzer:
 
         self.useGlobalMuonTrack = False
 
+        # Gen particle selection, see setGenSelection()
+        self.genPdgIds = None #|pdgId| of selected gen particles, None for the daughters
+        self.genStatusCodes = defaultGenStatusCodes #status codes of selected gen particles
+
+        # Validate and compile the selections once, malformed cuts exit here
+        self.listBNames = self.source.getBranchNames()
+        self.setSelection()
+
+        # Variants of the selection analyzed in the same pass, see setSelectionConfigs()
+        self.dict_selections = {}
+
+        # Cut-flow of each selection, filled only if requested, see analyze()
+        self.dict_cutFlows = {}
+
+        # Time spent in each stage of the event loop, see analyze()
+        self.timer = stageTimer()
+
         # Make Histograms
+        self.histoBackend = histoBackend
+        prevBackend = getHistoBackend()
+        setHistoBackend(histoBackend)
         self.elHistos = {}
         self.muHistos = {}
         self.tauHistos = {}
@@ -61,12 +144,13 @@ class lfvAnalyzer:
                 self.muHistos[lvl] = MuonHistos(mcType=lvl)
                 self.tauHistos[lvl] = TauHistos(mcType=lvl)
                 self.hvyResHistos[lvl] = HvyResHistos(mcType=lvl)
+        setHistoBackend(prevBackend)
 
         return
 
-    def analyze(self, listOfTriggers=None, printLvl=1000, numEvts=-1, printGenList=False, printTrigInfo=False):
+    def analyze(self, listOfTriggers=None, printLvl=1000, numEvts=-1, printGenList=False, printTrigInfo=False, chunkSize=None, pruneBranches=True, printBranchInfo=False, firstEntry=0, numWorkers=1, fillBufferSize=None, preFilter=None, printCutFlow=False, metricsFileName=None, metricsInterval=60., skimFileName=None, maskCacheDir=None, printCandInfo=True, dumpFileName=None, dumpEveryNth=1, dumpFirstK=None, checkpointFileName=None, checkpointEvery=None, checkpointInterval=600., resume=False, listOfSelectionConfigs=None, reorderCutsAfter=None):
         """
-        Analyzes data stored in self.dataTree and prints the 
+        Analyzes data read from self.source and prints the 
         number of processed events every printLvl number of events
 
         listOfTriggers - List of triggers to be checked for passing, a logic OR of
@@ -76,25 +160,282 @@ class lfvAnalyzer:
         printGenList   - if true prints a table, in markdown format, of pdgId 
                          and 4-vectors of gen particles, if self.isData is False 
                          does nothing
+
+        printTrigInfo  - if true prints a table, in markdown format, of the
+                         decision of each trigger in listOfTriggers
+
+        printCandInfo  - if true prints tables, in markdown format, of the reco and
+                         gen daughters and hvy resonance candidate of each
+                         selected event, if self.isData is True does nothing
+
+        dumpFileName   - if not None the tables of printGenList, printTrigInfo and
+                         printCandInfo are written to this file instead of stdout.
+                         The tables are formatted and written on a background
+                         thread, see eventDumper.  With numWorkers > 1 each range
+                         is written to its own part, see getPartFileName
+
+        dumpEveryNth   - tables are printed for every dumpEveryNth event only
+
+        dumpFirstK     - if not None tables are printed for at most dumpFirstK events
+
+        chunkSize      - if not None the reco level selection is evaluated in
+                         columnar mode, the selection masks of chunkSize entries
+                         are computed at once with vectorized operations and only
+                         the objects passing a selection level are built
+
+        pruneBranches  - if true every TBranch not read by the analysis is
+                         disabled before the event loop
+
+        printBranchInfo- if true prints the list of active and pruned branches
+
+        firstEntry     - entry of self.source to start the analysis from, numEvts
+                         events are analyzed starting from this entry
+
+        numWorkers     - if larger than 1 the entries are analyzed in parallel by
+                         numWorkers processes, see analyzeParallel()
+
+        fillBufferSize - if not None histogram fills are buffered in numpy arrays
+                         of this size and filled in bulk, the buffers are flushed
+                         and removed at the end of the job
+
+        preFilter      - if not None the entries are first preselected reading only
+                         the trigger and multiplicity branches, the full event is
+                         read only for preselected entries.  Allowed values:
+                            "trigger" - require the OR of listOfTriggers, the
+                                        output is unchanged
+                            "pairing" - additionally require at least one reco
+                                        object of each daughter species, events
+                                        failing the final pairing requirement are
+                                        then absent from the per-level histograms
+
+        printCutFlow   - if true the pass counts and evaluation time of every cut
+                         of the reco level selection are recorded, printed at the
+                         end of the job and written to the output file, see cutFlow.
+                         In columnar mode (chunkSize not None) every entry of a
+                         chunk is counted, regardless of the trigger selection
+
+        reorderCutsAfter- if not None the cuts of each selection level are reordered
+                         once the selection was evaluated on reorderCutsAfter
+                         events, the cheapest and most rejecting cuts first, as
+                         measured on these events, see cutFlow.reorder.  The
+                         selected objects do not depend on the order.  In columnar
+                         mode the cuts are reordered at the next chunk boundary,
+                         e.g. after the first chunk for reorderCutsAfter=chunkSize.
+                         Not supported together with printCutFlow, whose counts
+                         depend on the order of the cuts
+
+        metricsFileName- if not None the throughput, ETA, peak RSS and the time
+                         spent in each stage of the event loop are streamed to
+                         this file, one JSON object per line, see stageTimer.
+                         A summary is printed at the end of the job regardless
+
+        metricsInterval- minimum number of seconds between two lines written to
+                         metricsFileName
+
+        skimFileName   - if not None the entries passing the trigger selection and
+                         the final pairing requirement are written to a TTree in
+                         this file, keeping only the branches read by analyze().
+                         The skim can be analyzed by lfvAnalyzer in place of the
+                         input file, branches are pruned even if pruneBranches is
+                         false.  With numWorkers > 1 each range is written to its
+                         own part, see getPartFileName
+
+        maskCacheDir   - if not None the selection masks are read from, or stored
+                         in, a cache in this directory keyed by the input file,
+                         the selections and the chunk of entries, see
+                         selectionCache.  Repeated runs over the same entries
+                         skip the reco level selection.  Implies columnar mode,
+                         chunkSize defaults to 10000.  Not supported together
+                         with printCutFlow
+
+        checkpointFileName - if not None the histograms, cut-flows and the next
+                         entry to analyze are written to this file every
+                         checkpointEvery events and/or checkpointInterval seconds,
+                         see checkpointWriter.  In columnar mode checkpoints are
+                         written at chunk boundaries only.  With numWorkers > 1
+                         the merged results and the finished ranges are written.
+                         With numWorkers = 1 not supported together with skimFileName
+
+        checkpointEvery- number of events between two checkpoints, None for no
+                         event interval
+
+        checkpointInterval- number of seconds between two checkpoints, None for
+                         no time interval
+
+        resume         - if true and checkpointFileName exists the analysis resumes
+                         from the checkpoint, the output is identical to the output
+                         of an uninterrupted job.  The checkpoint must be written
+                         by a job with the same input, entries, analysis flags and
+                         the same listOfTriggers, chunkSize, preFilter, printCutFlow
+                         and numWorkers.  Event dumps cover the resumed entries only
+
+        listOfSelectionConfigs- if not None list of selectionConfig, variants of the
+                         reco level selection evaluated on each event after the
+                         nominal selection, each with its own histograms and
+                         cut-flows written to a subdirectory named after it, see
+                         setSelectionConfigs().  The events are read and the gen
+                         level selection is applied once for all variants.  The
+                         skim and the candidate tables follow the nominal selection
         """
 
+        # Masks read from the cache skip the selection, their cuts are not counted
+        if maskCacheDir is not None and printCutFlow:
+            print "Error cut-flows do not count entries read from the selection mask cache %s"%maskCacheDir
+            print "exiting"
+            exit(os.EX_USAGE)
+
+        # Reordering the cuts changes what the cut-flows count
+        if reorderCutsAfter is not None and printCutFlow:
+            print "Error cut-flows count the cuts in their configured order, reorderCutsAfter is not supported together with printCutFlow"
+            print "exiting"
+            exit(os.EX_USAGE)
+
+        # Variants are part of the configuration handed to the workers
+        if listOfSelectionConfigs is not None:
+            self.setSelectionConfigs(listOfSelectionConfigs)
+        self.updateSelectionConfigs()
+
+        if numWorkers > 1:
+            self.analyzeParallel(
+                    numWorkers,
+                    firstEntry=firstEntry,
+                    numEvts=numEvts,
+                    listOfTriggers=listOfTriggers,
+                    printLvl=printLvl,
+                    printGenList=printGenList,
+                    printTrigInfo=printTrigInfo,
+                    printCandInfo=printCandInfo,
+                    dumpFileName=dumpFileName,
+                    dumpEveryNth=dumpEveryNth,
+                    dumpFirstK=dumpFirstK,
+                    chunkSize=chunkSize,
+                    pruneBranches=pruneBranches,
+                    printBranchInfo=printBranchInfo,
+                    fillBufferSize=fillBufferSize,
+                    preFilter=preFilter,
+                    printCutFlow=printCutFlow,
+                    metricsFileName=metricsFileName,
+                    metricsInterval=metricsInterval,
+                    skimFileName=skimFileName,
+                    maskCacheDir=maskCacheDir,
+                    checkpointFileName=checkpointFileName,
+                    checkpointEvery=checkpointEvery,
+                    checkpointInterval=checkpointInterval,
+                    resume=resume,
+                    reorderCutsAfter=reorderCutsAfter)
+            if printCutFlow:
+                self.printCutFlow()
+            return
+
         # Tell the user which file we are analyzing
         print "analyzing input file: %s"%(self.inputFileName)
 
+        # Read only the branches the analysis needs
+        if pruneBranches or skimFileName is not None:
+            self.source.activateBranches(self.getRequiredBranches(listOfTriggers), printBranchInfo)
+
+        # The skim keeps the active branches only
+        skim = None
+        if skimFileName is not None:
+            if checkpointFileName is not None:
+                print "Error checkpoints do not cover the skim, %s can not be resumed"%skimFileName
+                print "exiting"
+                exit(os.EX_USAGE)
+            if self.source.getTree() is None:
+                print "Error skimming requires a TTree input, the event source of %s has none"%self.inputFileName
+                print "exiting"
+                exit(os.EX_USAGE)
+            skim = skimWriter(self.source.getTree(), skimFileName)
+
+        # Buffer the histogram fills
+        if fillBufferSize is not None:
+            self.setFillBuffer(fillBufferSize)
+
+        # Cached selection masks are stored per chunk
+        cache = None
+        if maskCacheDir is not None:
+            if not os.path.exists(self.inputFileName):
+                print "Error the selection mask cache is keyed by the input file, %s does not exist"%self.inputFileName
+                print "exiting"
+                exit(os.EX_USAGE)
+            cache = selectionCache(maskCacheDir, self.inputFileName, self.inputTreeName)
+            if chunkSize is None:
+                chunkSize = 10000
+
+        # Determine the range of entries to analyze
+        lastEntry = self.source.GetEntries()
+        if numEvts > -1:
+            lastEntry = min(lastEntry, firstEntry + numEvts)
+
+        # Determine the entries to read in full
+        listOfEntries = xrange(firstEntry, lastEntry)
+        if preFilter is not None:
+            listOfCountBranches = []
+            if preFilter == "pairing":
+                listOfCountBranches = [ dict_countBranches[abs(pdgId)] for pdgId in (self.sigPdgId1, self.sigPdgId2) if abs(pdgId) in dict_countBranches ]
+            elif preFilter != "trigger":
+                print "preFilter %s not understood"%preFilter
+                print "allowed values: trigger, pairing"
+                print "exiting"
+                exit(os.EX_USAGE)
+
+            listOfEntries = self.source.getPreselectedEntries(listOfTriggers, listOfCountBranches, firstEntry, lastEntry - firstEntry, debug=False).tolist()
+
+        # Entries before the position of the checkpoint are not analyzed again
+        checkpoint = None
+        if checkpointFileName is not None:
+            dict_checkpointKey = self.getCheckpointKey({ "firstEntry":firstEntry, "lastEntry":lastEntry }, listOfTriggers, chunkSize, preFilter, printCutFlow)
+            if resume:
+                resumeEntry = self.resumeCheckpoint(checkpointFileName, dict_checkpointKey)
+                if resumeEntry is not None and preFilter is None:
+                    listOfEntries = xrange(resumeEntry, lastEntry)
+                elif resumeEntry is not None:
+                    listOfEntries = [ entry for entry in listOfEntries if entry >= resumeEntry ]
+            checkpoint = checkpointWriter(checkpointFileName, checkpointEvery, checkpointInterval)
+
+        # Selected gen particles, the hvy resonance daughters by default
+        genPdgIds = self.genPdgIds
+        if genPdgIds is None:
+            genPdgIds = (abs(self.sigPdgId1), abs(self.sigPdgId2))
+
+        # Diagnostic tables are formatted and written on a background thread
+        dumper = None
+        if printGenList or printTrigInfo or printCandInfo:
+            dumper = eventDumper(dumpFileName, dumpEveryNth, dumpFirstK)
+
         # Loop over input TTree
+        self.timer = stageTimer(metricsFileName, metricsInterval)
+        self.timer.begin(len(listOfEntries))
+
+        # Selection variants are evaluated on each event after the nominal selection
+        listOfSelections = self.getSelections()
+        for selection in listOfSelections:
+            selection.beginSelection(self.timer, printCutFlow, reorderCutsAfter)
+
         analyzedEvts = 0
-        listBNames = [branch.GetName() for branch in self.dataTree.GetListOfBranches()]
-        for event in self.dataTree:
+        chunkFirstEntry = 0
+        chunkNumEntries = 0
+        for entry in listOfEntries:
+            self.timer.startEvent()
+
+            # Snapshot the state before this entry, the masks of a chunk are counted by the cut-flows at once
+            if checkpoint is not None and checkpoint.due(analyzedEvts) and (chunkSize is None or entry >= chunkFirstEntry + chunkNumEntries):
+                checkpoint.write(analyzedEvts, lambda: self.getCheckpointState(dict_checkpointKey, entry))
+                self.timer.lap("checkpoint")
+
+            self.source.GetEntry(entry)
+            event = self.source.event
+            self.timer.lap("read")
+
             # Increment number of analyzed events
             analyzedEvts += 1
 
-            # Exit if we've analyzed the requested number of events
-            if numEvts > -1 and analyzedEvts > numEvts:
-                break
-
             # Tell the user the number of analyzed events
             if (analyzedEvts % printLvl) == 0:
-                print "Processed %i number of events"%analyzedEvts 
+                print self.timer.getProgress()
+
+            # Determine if the tables of this event are printed
+            doDump = (dumper is not None and dumper.accept())
 
             ##################################################################################
             ##################################################################################
@@ -102,26 +443,17 @@ class lfvAnalyzer:
             ##################################################################################
             ##################################################################################
             if listOfTriggers is not None: # Allow the user the option to run w/o a trigger
-                dict_trigInfo = {}
-                if printTrigInfo:
-                    print "| idx | trigName | Decision |"
-                    print "| --- | -------- | -------- |"
-
-                for idx,trigName in enumerate(listOfTriggers):
-                    dict_trigInfo[trigName] = getattr(event, trigName)
-                    if printTrigInfo:
-                        print "| %i | %s | %i |"%(idx, trigName, dict_trigInfo[trigName])
+                listOfDecisions = [ getattr(event, trigName) for trigName in listOfTriggers ]
+                trigAccept = sum(listOfDecisions)
+                self.timer.lap("trigger")
 
-                trigAccept = sum(dict_trigInfo.values())
-                if printTrigInfo:
-                    print "trigAccept = %i"%trigAccept
+                if doDump and printTrigInfo:
+                    dumper.push(formatTrigInfo, listOfTriggers, listOfDecisions)
+                    self.timer.lap("eventDump")
 
                 if not (trigAccept > 0):
                     continue #None of the triggers passed, skip the event
 
-                if printTrigInfo:
-                    print "trigger selection passed"
-
             ##################################################################################
             ##################################################################################
             # Physics Object Selection
@@ -132,211 +464,269 @@ class lfvAnalyzer:
             ##################################################################################
             selectedGenParts = nesteddict() # dictionary, keys -> pdgId, value -> list of genPart passing selection
             if not self.isData and self.anaGen:
-                if printGenList:
-                    print "| pdgId | status | px | py | pz | E | pt | eta | M |"
-                    print "| ----- | ------ | -- | -- | -- | - | -- | --- | - |"
-        
-                for idx in range(0,event.mc_px.size()):
-                    genPart = PhysObj(
-                            event.mc_px.at(idx),
-                            event.mc_py.at(idx),
-                            event.mc_pz.at(idx),
-                            event.mc_energy.at(idx),
-                            event.mc_pdgId.at(idx),
-                            event.mc_status.at(idx)
-                            )
-                    genPart.charge = event.mc_charge.at(idx)
-            
-                    if printGenList:
-                        print "| %i | %i | %f | %f | %f | %f | %f | %f | %f |"%(
-                                genPart.pdgId, 
-                                genPart.status, 
-                                genPart.px(), 
-                                genPart.py(), 
-                                genPart.pz(), 
-                                genPart.E(),
-                                genPart.pt(),
-                                genPart.eta(),
-                                genPart.M())
-
-                    if not ((abs(genPart.pdgId) == self.sigPdgId1) or (abs(genPart.pdgId) == self.sigPdgId2)):
-                        continue
-                    if genPart.status != 23:
-                        continue
-
-                    # Reaching here means genPart passed selection
-                    if genPart.pdgId in selectedGenParts.keys():
-                        selectedGenParts[abs(genPart.pdgId)].append(genPart)
-                    else:
-                        selectedGenParts[abs(genPart.pdgId)] = [ genPart ]
+                if doDump and printGenList:
+                    dumper.push(formatGenList, getGenSnapshot(event))
+                    self.timer.lap("eventDump")
+
+                selectedGenParts.update( getSelectedGenParticles(event, genPdgIds, self.genStatusCodes) )
+
+            self.timer.lap("genSelection")
 
-            # Select particles - Reco Level
+            # Evaluate the selections for the next chunk of entries
+            if chunkSize is not None and entry >= chunkFirstEntry + chunkNumEntries:
+                chunkFirstEntry = entry
+                chunkNumEntries = min(chunkSize, lastEntry - entry)
+                self.loadChunkMasks(chunkFirstEntry, chunkNumEntries, cache)
+
+                # Drawing the chunk moves the TTree, reload this entry
+                self.source.GetEntry(entry)
+                event = self.source.event
+                self.timer.lap("read")
+
+            # Select particles - Reco Level, fill histograms and build the candidate
             ##################################################################################
-            # Get selected electrons
-            selectedEls = nesteddict()
-            for lvl in selLevels:
-                selectedEls[lvl] = getSelectedElectrons(event, elSelection[lvl], event.gsf_n, listOfBranchNames=listBNames)
-            
-            # Get selected muons
-            selectedMuons = nesteddict()
-            for lvl in selLevels:
-                selectedMuons[lvl] = getSelectedMuons(event, muonSelection[lvl], event.mu_n, listOfBranchNames=listBNames, useGlobalTrack=self.useGlobalMuonTrack)
+            candDumper = None
+            if doDump and printCandInfo:
+                candDumper = dumper
+
+            # The branches and objects of this event are shared by all selections
+            bits = vectorBoolCache(event)
+            dict_eventObjects = {}
+            self.analyzeSelection(event, entry - chunkFirstEntry, selectedGenParts, bits, dict_eventObjects, skim, candDumper)
+            for selection in listOfSelections[1:]:
+                selection.analyzeSelection(event, entry - chunkFirstEntry, selectedGenParts, bits, dict_eventObjects)
+
+        # Fill what is left in the buffers
+        if fillBufferSize is not None:
+            self.setFillBuffer(None)
+            self.timer.lap("histoFill")
+
+        if dumper is not None:
+            dumper.close()
+            self.timer.lap("eventDump")
+
+        if checkpoint is not None:
+            checkpoint.close()
+            self.timer.lap("checkpoint")
+
+        self.timer.end()
+        self.timer.printSummary()
 
-            # Get selected taus
-            selectedTaus = nesteddict()
+        if skim is not None:
+            skim.close(lastEntry - firstEntry)
+
+        if printCutFlow:
+            self.printCutFlow()
+
+        return
+
+    def analyzeSelection(self, event, localEntry, selectedGenParts, bits, dict_eventObjects, skim=None, dumper=None):
+        """
+        Selects the reco objects of the current event with the selection of
+        this analyzer, fills its histograms and, if the event passes the final
+        pairing requirement, builds and fills the hvy resonance candidate.
+        Called by analyze() once per event for the nominal selection and once
+        for each selection variant, after beginSelection()
+
+        event            - current event of self.source
+        localEntry       - index of the event in the chunk of loadChunkMasks(),
+                           ignored outside of columnar mode
+        selectedGenParts - dictionary of selected gen particles, see getSelectedGenParticles
+        bits             - vectorBoolCache of event, shared by all selections
+        dict_eventObjects- dictionary of the objects built from event, shared by all
+                           selections, keyed by physics object then index in event
+        skim             - Optional, skimWriter filled with the events passing the
+                           final pairing requirement
+        dumper           - Optional, eventDumper the candidate tables of this event
+                           are pushed to
+        """
+
+        # Select particles - Reco Level
+        ##################################################################################
+        # Objects are built once per event, muons once per track choice
+        dict_elObjects = dict_eventObjects.setdefault("el", {})
+        dict_muonObjects = dict_eventObjects.setdefault("mu_global" if self.useGlobalMuonTrack else "mu_ibt", {})
+        dict_tauObjects = dict_eventObjects.setdefault("tau", {})
+
+        if self.loopMasks is None:
+            # Get selected electrons, muons and taus
+            elCascade, muonCascade, tauCascade = self.loopCascades
+            selectedEls = getSelectedElectronsCascade(event, elCascade, event.gsf_n, bits=bits, dict_objects=dict_elObjects)
+            self.timer.lap("recoSelection_el")
+            selectedMuons = getSelectedMuonsCascade(event, muonCascade, event.mu_n, useGlobalTrack=self.useGlobalMuonTrack, bits=bits, dict_objects=dict_muonObjects)
+            self.timer.lap("recoSelection_mu")
+            selectedTaus = getSelectedTausCascade(event, tauCascade, event.tau_n, bits=bits, dict_objects=dict_tauObjects)
+            self.timer.lap("recoSelection_tau")
+
+            if self.loopCutFlows is not None:
+                for flow in self.loopCutFlows:
+                    flow.endEvent()
+                if self.reorderCutsAfter is not None and self.loopCutFlows[0].nEvts >= self.reorderCutsAfter:
+                    self.reorderCuts()
+        else:
+            # Build only the objects passing each level
+            dict_elMasks, elOffsets, dict_muonMasks, muonOffsets, dict_tauMasks, tauOffsets = self.loopMasks
+            selectedEls = getSelectedObjects(dict_elMasks, elOffsets, localEntry, lambda idx: makeElectron(event, idx), dict_elObjects)
+            self.timer.lap("recoSelection_el")
+            selectedMuons = getSelectedObjects(dict_muonMasks, muonOffsets, localEntry, lambda idx: makeMuon(event, idx, self.useGlobalMuonTrack, bits), dict_muonObjects)
+            self.timer.lap("recoSelection_mu")
+            selectedTaus = getSelectedObjects(dict_tauMasks, tauOffsets, localEntry, lambda idx: makeTau(event, idx), dict_tauObjects)
+            self.timer.lap("recoSelection_tau")
+
+        # Fill Histograms - Gen Level
+        ##################################################################################
+        if not self.isData and self.anaGen:
+            genMulti = nesteddict() # Container to track the multiplicity of different particle species
             for lvl in selLevels:
-                selectedTaus[lvl] = getSelectedTaus(event, tauSelection[lvl], event.tau_n, listOfBranchNames=listBNames)
+                genMulti[lvl] = nesteddict()
 
-            # Fill Histograms - Gen Level
-            ##################################################################################
-            if not self.isData and self.anaGen:
-                genMulti = nesteddict() # Container to track the multiplicity of different particle species
-                for lvl in selLevels:
-                    genMulti[lvl] = nesteddict()
-
-                for pdgId,listOfParts in selectedGenParts.iteritems():
-                    for genPart in listOfParts:
-                     
-                        # Determine Multiplicity
-                        if abs(genPart.pdgId) in genMulti["all"].keys():
-                            genMulti["all"][abs(genPart.pdgId)]+=1
-                        else:
-                            genMulti["all"][abs(genPart.pdgId)]=1
-
-                        # Fill histograms: Electrons - Kinematics
-                        if abs(genPart.pdgId) == 11:
-                            self.elHistos["gen"].dict_histosKin["all"].charge.Fill(genPart.charge)
-                            self.elHistos["gen"].dict_histosKin["all"].energy.Fill(genPart.E())
-                            self.elHistos["gen"].dict_histosKin["all"].eta.Fill(genPart.eta())
-                            self.elHistos["gen"].dict_histosKin["all"].mass.Fill(genPart.M())
-                            self.elHistos["gen"].dict_histosKin["all"].pt.Fill(genPart.pt())
+            for pdgId,listOfParts in selectedGenParts.iteritems():
+                for genPart in listOfParts:
+                 
+                    # Determine Multiplicity
+                    if abs(genPart.pdgId) in genMulti["all"].keys():
+                        genMulti["all"][abs(genPart.pdgId)]+=1
+                    else:
+                        genMulti["all"][abs(genPart.pdgId)]=1
+
+                    # Fill histograms: Electrons - Kinematics
+                    if abs(genPart.pdgId) == 11:
+                        self.elHistos["gen"].dict_histosKin["all"].charge.Fill(genPart.charge)
+                        self.elHistos["gen"].dict_histosKin["all"].energy.Fill(genPart.E())
+                        self.elHistos["gen"].dict_histosKin["all"].eta.Fill(genPart.eta())
+                        self.elHistos["gen"].dict_histosKin["all"].mass.Fill(genPart.M())
+                        self.elHistos["gen"].dict_histosKin["all"].pt.Fill(genPart.pt())
+                
+                    # Fill histograms: Muons - Kinematics
+                    if abs(genPart.pdgId) == 13:
+                        self.muHistos["gen"].dict_histosKin["all"].charge.Fill(genPart.charge)
+                        self.muHistos["gen"].dict_histosKin["all"].eta.Fill(genPart.eta())
+                        self.muHistos["gen"].dict_histosKin["all"].mass.Fill(genPart.M())
+                        self.muHistos["gen"].dict_histosKin["all"].pt.Fill(genPart.pt())
                     
-                        # Fill histograms: Muons - Kinematics
-                        if abs(genPart.pdgId) == 13:
-                            self.muHistos["gen"].dict_histosKin["all"].charge.Fill(genPart.charge)
-                            self.muHistos["gen"].dict_histosKin["all"].eta.Fill(genPart.eta())
-                            self.muHistos["gen"].dict_histosKin["all"].mass.Fill(genPart.M())
-                            self.muHistos["gen"].dict_histosKin["all"].pt.Fill(genPart.pt())
+                    # Fill histograms: Taus - Kinematics
+                    if abs(genPart.pdgId) == 15:
+                        self.tauHistos["gen"].dict_histosKin["all"].charge.Fill(genPart.charge)
+                        self.tauHistos["gen"].dict_histosKin["all"].eta.Fill(genPart.eta())
+                        self.tauHistos["gen"].dict_histosKin["all"].mass.Fill(genPart.M())
+                        self.tauHistos["gen"].dict_histosKin["all"].pt.Fill(genPart.pt())
+
+        # Fill Histograms - Reco Level
+        ##################################################################################
+        # Loop over electrons
+        for lvl in selLevels:
+            self.elHistos["reco"].dict_histosKin[lvl].multi.Fill(len(selectedEls[lvl])) # Multiplicity
+            for el in selectedEls[lvl]:
+                self.elHistos["reco"].dict_histosKin[lvl].charge.Fill(el.charge)
+                self.elHistos["reco"].dict_histosKin[lvl].energy.Fill(el.E())
+                self.elHistos["reco"].dict_histosKin[lvl].eta.Fill(el.eta())
+        
+        # Loop over muons
+        for lvl in selLevels:
+            self.muHistos["reco"].dict_histosKin[lvl].multi.Fill(len(selectedMuons[lvl])) # Multiplicity
+            for muon in selectedMuons[lvl]:
+                # Fill Kinematic Histos
+                self.muHistos["reco"].dict_histosKin[lvl].charge.Fill(muon.charge)
+                self.muHistos["reco"].dict_histosKin[lvl].eta.Fill(muon.eta())
+                self.muHistos["reco"].dict_histosKin[lvl].pt.Fill(muon.pt())
+                self.muHistos["reco"].dict_histosKin[lvl].pz.Fill(muon.pz())
+              
+                # Fill Id Histos
+                for binX,idLabel in enumerate(muonIdLabels):
+                    if getattr(muon, idLabel) > 0:
+                        self.muHistos["reco"].dict_histosId[lvl].idLabel.Fill(binX+1)
                         
-                        # Fill histograms: Taus - Kinematics
-                        if abs(genPart.pdgId) == 15:
-                            self.tauHistos["gen"].dict_histosKin["all"].charge.Fill(genPart.charge)
-                            self.tauHistos["gen"].dict_histosKin["all"].eta.Fill(genPart.eta())
-                            self.tauHistos["gen"].dict_histosKin["all"].mass.Fill(genPart.M())
-                            self.tauHistos["gen"].dict_histosKin["all"].pt.Fill(genPart.pt())
-
-            # Fill Histograms - Reco Level
-            ##################################################################################
-            # Loop over electrons
-            for lvl in selLevels:
-                self.elHistos["reco"].dict_histosKin[lvl].multi.Fill(len(selectedEls[lvl])) # Multiplicity
-                for el in selectedEls[lvl]:
-                    self.elHistos["reco"].dict_histosKin[lvl].charge.Fill(el.charge)
-                    self.elHistos["reco"].dict_histosKin[lvl].energy.Fill(el.E())
-                    self.elHistos["reco"].dict_histosKin[lvl].eta.Fill(el.eta())
-            
-            # Loop over muons
-            for lvl in selLevels:
-                self.muHistos["reco"].dict_histosKin[lvl].multi.Fill(len(selectedMuons[lvl])) # Multiplicity
-                for muon in selectedMuons[lvl]:
-                    # Fill Kinematic Histos
-                    self.muHistos["reco"].dict_histosKin[lvl].charge.Fill(muon.charge)
-                    self.muHistos["reco"].dict_histosKin[lvl].eta.Fill(muon.eta())
-                    self.muHistos["reco"].dict_histosKin[lvl].pt.Fill(muon.pt())
-                    self.muHistos["reco"].dict_histosKin[lvl].pz.Fill(muon.pz())
-                  
-                    # Fill Id Histos
-                    for binX,idLabel in enumerate(muonIdLabels):
-                        if getattr(muon, idLabel) > 0:
-                            self.muHistos["reco"].dict_histosId[lvl].idLabel.Fill(binX+1)
-                            
-                            for binY,hitLabel in enumerate(muonhitLabels):
-                                self.muHistos["reco"].dict_histosId[lvl].dict_hitHistos[idLabel].Fill( getattr(muon, hitLabel), binY+1 )
-
-                    self.muHistos["reco"].dict_histosId[lvl].dxy.Fill(muon.dxy)
-                    self.muHistos["reco"].dict_histosId[lvl].dz.Fill(muon.dz)
-                    self.muHistos["reco"].dict_histosId[lvl].normChi2.Fill(muon.normChi2)
-                    
-                    #Fill Iso Histos
-                    self.muHistos["reco"].dict_histosIso[lvl].isoTrackerBased03.Fill(muon.isoTrackerBased03)
+                        for binY,hitLabel in enumerate(muonhitLabels):
+                            self.muHistos["reco"].dict_histosId[lvl].dict_hitHistos[idLabel].Fill( getattr(muon, hitLabel), binY+1 )
 
-            # Loop over taus
-            for lvl in selLevels:
-                self.tauHistos["reco"].dict_histosKin[lvl].multi.Fill(len(selectedTaus[lvl])) # Multiplicity
-                for tau in selectedTaus[lvl]:
-                    self.tauHistos["reco"].dict_histosKin[lvl].charge.Fill(tau.charge)
-                    self.tauHistos["reco"].dict_histosKin[lvl].eta.Fill(tau.eta())
-                    self.tauHistos["reco"].dict_histosKin[lvl].mass.Fill(tau.M())
-                    self.tauHistos["reco"].dict_histosKin[lvl].pt.Fill(tau.pt())
-            
-            ##################################################################################
-            ##################################################################################
-            # Final Event Selection
-            ##################################################################################
-            ##################################################################################
-            numSelEls  = len(selectedEls[selLevels[-1]])  # Number of selected electrons from the final stage of selection
-            numSelMuons = len(selectedMuons[selLevels[-1]]) # Number of selected muons from the final stage of selection
-            numSelTaus  = len(selectedTaus[selLevels[-1]])  # Number of selected taus from the final stage of selection
-            selectedDauPart1 = [] # List of selected daughter particle 1
-            selectedDauPart2 = [] # List of selected daughter particle 2
-            if (self.sigPdgId1 == 13 and self.sigPdgId2 == 15) or (self.sigPdgId1 == 15 and self.sigPdgId2 == 13): # case: mu tau
-                if not (numSelMuons > 0 and numSelTaus > 0):
-                    continue
-                selectedDauPart1 = selectedMuons[selLevels[-1]]
-                selectedDauPart2 = selectedTaus[selLevels[-1]]
-            elif (self.sigPdgId1 == 13 and self.sigPdgId2 == 11) or (self.sigPdgId1 == 11 and self.sigPdgId2 == 13): # case: e mu
-                if not (numSelMuons > 0 and numSelEls > 0):
-                    continue
-                selectedDauPart1 = selectedEls[selLevels[-1]]
-                selectedDauPart2 = selectedMuons[selLevels[-1]]
-            elif (self.sigPdgId1 == 15 and self.sigPdgId2 == 11) or (self.sigPdgId1 == 11 and self.sigPdgId2 == 15): # case: e tau
-                if not (numSelTaus > 0 and numSelEls > 0):
-                    continue
-                selectedDauPart1 = selectedEls[selLevels[-1]]
-                selectedDauPart2 = selectedTaus[selLevels[-1]]
-            else:
-                print "input daughter particle pairing not understood"
-                print "daughter pdgId pairing: (%i, %i)"%(self.sigPdgId1, self.sigPdgId2)
-                print "allowed pairings:"
-                print "     (11,13)"
-                print "     (11,15)"
-                print "     (15,13)"
-                print "or their permutations"
-                print "exiting"
-                exit(os.EX_USAGE)
+                self.muHistos["reco"].dict_histosId[lvl].dxy.Fill(muon.dxy)
+                self.muHistos["reco"].dict_histosId[lvl].dz.Fill(muon.dz)
+                self.muHistos["reco"].dict_histosId[lvl].normChi2.Fill(muon.normChi2)
                 
-            ##################################################################################
-            ##################################################################################
-            # Make the candidate - Use the one with the highest invariant mass
-            ##################################################################################
-            ##################################################################################
-            fourVec = r.TLorentzVector
-            maxInvarMass = -1
-            candTuple = ()
-            for dau1 in selectedDauPart1:
-                for dau2 in selectedDauPart2:
-                    fourVec = dau1.fourVector + dau2.fourVector
-                    if fourVec.M() > maxInvarMass:
-                        maxInvarMass = fourVec.M()
-                        candTuple = (dau1, dau2)
-
-            fourVec = candTuple[0].fourVector + candTuple[1].fourVector
-            hvyResCand = PhysObj(fourVec.Px(), fourVec.Py(), fourVec.Pz(), fourVec.E())
-            hvyResCand.charge = candTuple[0].charge + candTuple[1].charge
+                #Fill Iso Histos
+                self.muHistos["reco"].dict_histosIso[lvl].isoTrackerBased03.Fill(muon.isoTrackerBased03)
+
+        # Loop over taus
+        for lvl in selLevels:
+            self.tauHistos["reco"].dict_histosKin[lvl].multi.Fill(len(selectedTaus[lvl])) # Multiplicity
+            for tau in selectedTaus[lvl]:
+                self.tauHistos["reco"].dict_histosKin[lvl].charge.Fill(tau.charge)
+                self.tauHistos["reco"].dict_histosKin[lvl].eta.Fill(tau.eta())
+                self.tauHistos["reco"].dict_histosKin[lvl].mass.Fill(tau.M())
+                self.tauHistos["reco"].dict_histosKin[lvl].pt.Fill(tau.pt())
+        
+        self.timer.lap("histoFill")
+
+        ##################################################################################
+        ##################################################################################
+        # Final Event Selection
+        ##################################################################################
+        ##################################################################################
+        numSelEls  = len(selectedEls[selLevels[-1]])  # Number of selected electrons from the final stage of selection
+        numSelMuons = len(selectedMuons[selLevels[-1]]) # Number of selected muons from the final stage of selection
+        numSelTaus  = len(selectedTaus[selLevels[-1]])  # Number of selected taus from the final stage of selection
+        selectedDauPart1 = [] # List of selected daughter particle 1
+        selectedDauPart2 = [] # List of selected daughter particle 2
+        if (self.sigPdgId1 == 13 and self.sigPdgId2 == 15) or (self.sigPdgId1 == 15 and self.sigPdgId2 == 13): # case: mu tau
+            if not (numSelMuons > 0 and numSelTaus > 0):
+                return
+            selectedDauPart1 = selectedMuons[selLevels[-1]]
+            selectedDauPart2 = selectedTaus[selLevels[-1]]
+        elif (self.sigPdgId1 == 13 and self.sigPdgId2 == 11) or (self.sigPdgId1 == 11 and self.sigPdgId2 == 13): # case: e mu
+            if not (numSelMuons > 0 and numSelEls > 0):
+                return
+            selectedDauPart1 = selectedEls[selLevels[-1]]
+            selectedDauPart2 = selectedMuons[selLevels[-1]]
+        elif (self.sigPdgId1 == 15 and self.sigPdgId2 == 11) or (self.sigPdgId1 == 11 and self.sigPdgId2 == 15): # case: e tau
+            if not (numSelTaus > 0 and numSelEls > 0):
+                return
+            selectedDauPart1 = selectedEls[selLevels[-1]]
+            selectedDauPart2 = selectedTaus[selLevels[-1]]
+        else:
+            print "input daughter particle pairing not understood"
+            print "daughter pdgId pairing: (%i, %i)"%(self.sigPdgId1, self.sigPdgId2)
+            print "allowed pairings:"
+            print "     (11,13)"
+            print "     (11,15)"
+            print "     (15,13)"
+            print "or their permutations"
+            print "exiting"
+            exit(os.EX_USAGE)
             
-            # Fill Reco level histos for hvy reso candidate - Kinematics
-            self.hvyResHistos["reco"].dict_histosKin[selLevels[-1]].charge.Fill(hvyResCand.charge)
-            self.hvyResHistos["reco"].dict_histosKin[selLevels[-1]].energy.Fill(hvyResCand.E())
-            self.hvyResHistos["reco"].dict_histosKin[selLevels[-1]].eta.Fill(hvyResCand.eta())
-            self.hvyResHistos["reco"].dict_histosKin[selLevels[-1]].mass.Fill(hvyResCand.M())
-            self.hvyResHistos["reco"].dict_histosKin[selLevels[-1]].pt.Fill(hvyResCand.pt())
+        # Reaching here means the event passed the final pairing requirement
+        if skim is not None:
+            skim.fill()
+
+        ##################################################################################
+        ##################################################################################
+        # Make the candidate - Use the one with the highest invariant mass
+        ##################################################################################
+        ##################################################################################
+        candIdx = getMaxMassPair(selectedDauPart1, selectedDauPart2)
+        candTuple = (selectedDauPart1[candIdx[0]], selectedDauPart2[candIdx[1]])
+        hvyResCand = makeCandidate(candTuple[0], candTuple[1])
+        self.timer.lap("candidate")
+        
+        # Fill Reco level histos for hvy reso candidate - Kinematics
+        self.hvyResHistos["reco"].dict_histosKin[selLevels[-1]].charge.Fill(hvyResCand.charge)
+        self.hvyResHistos["reco"].dict_histosKin[selLevels[-1]].energy.Fill(hvyResCand.E())
+        self.hvyResHistos["reco"].dict_histosKin[selLevels[-1]].eta.Fill(hvyResCand.eta())
+        self.hvyResHistos["reco"].dict_histosKin[selLevels[-1]].mass.Fill(hvyResCand.M())
+        self.hvyResHistos["reco"].dict_histosKin[selLevels[-1]].pt.Fill(hvyResCand.pt())
+        self.timer.lap("histoFill")
+
+        if not self.isData and self.anaGen:
+            # The gen daughters may be absent, e.g. not selected by setGenSelection()
+            # or without a copy of the selected status, then there is no gen candidate
+            candTupleGen = None
+            hvyResCandGen = None
+            listOfGenDau1 = selectedGenParts.get(abs(self.sigPdgId1), [])
+            listOfGenDau2 = selectedGenParts.get(abs(self.sigPdgId2), [])
+            if len(listOfGenDau1) > 0 and len(listOfGenDau2) > 0:
+                candTupleGen = (listOfGenDau1[0], listOfGenDau2[0])
+                hvyResCandGen = makeCandidate(candTupleGen[0], candTupleGen[1])
+                self.timer.lap("candidate")
 
-            if not self.isData and self.anaGen:
-                candTupleGen = (selectedGenParts[self.sigPdgId1][0], selectedGenParts[self.sigPdgId2][0])
-                fourVec = candTupleGen[0].fourVector + candTupleGen[1].fourVector
-                hvyResCandGen = PhysObj(fourVec.Px(), fourVec.Py(), fourVec.Pz(), fourVec.E())
-                hvyResCandGen.charge = candTupleGen[0].charge + candTupleGen[1].charge
-                
                 # Fill Reco level histos for hvy res candidate - Kinematics
                 self.hvyResHistos["gen"].dict_histosKin[selLevels[-1]].charge.Fill(hvyResCandGen.charge)
                 self.hvyResHistos["gen"].dict_histosKin[selLevels[-1]].energy.Fill(hvyResCandGen.E())
@@ -347,81 +737,455 @@ class lfvAnalyzer:
                 # Fill Mass Resolution Histograms for hvy res candidate
                 self.hvyResHistos["reco"].dict_histosResol[selLevels[-1]].mass_response.Fill(hvyResCandGen.M(),hvyResCand.M())
                 self.hvyResHistos["reco"].dict_histosResol[selLevels[-1]].massResol.Fill( (hvyResCand.M() - hvyResCandGen.M() ) / hvyResCandGen.M() )
+                self.timer.lap("histoFill")
+
+            if dumper is not None:
+                dumper.push(formatCandInfo, candTuple, hvyResCand, candTupleGen, hvyResCandGen)
+                self.timer.lap("eventDump")
+
+        return
+
+    def beginSelection(self, timer, printCutFlow=False, reorderCutsAfter=None):
+        """
+        Prepares the selection of this analyzer for the event loop of analyze(),
+        the selection is evaluated per event, or per chunk once loadChunkMasks()
+        is called
+
+        timer            - stageTimer of the event loop
+        printCutFlow     - if true the cut-flows of the selection are recorded
+        reorderCutsAfter - if not None the cuts are reordered once the selection
+                           was evaluated on reorderCutsAfter events, see reorderCuts()
+        """
+
+        self.timer = timer
+        self.loopMasks = None
+        self.reorderCutsAfter = reorderCutsAfter
+
+        # Cut-flows measuring the cuts to reorder are not kept
+        self.loopCutFlows = None
+        if printCutFlow:
+            for name in ("el", "mu", "tau"):
+                if name not in self.dict_cutFlows:
+                    self.dict_cutFlows[name] = cutFlow(name)
+            self.loopCutFlows = (self.dict_cutFlows["el"], self.dict_cutFlows["mu"], self.dict_cutFlows["tau"])
+        elif reorderCutsAfter is not None:
+            self.loopCutFlows = (cutFlow("el"), cutFlow("mu"), cutFlow("tau"))
+
+        # Instrument the selection, the uninstrumented plans carry no overhead
+        self.loopCascades = (self.elCascade, self.muonCascade, self.tauCascade)
+        if self.loopCutFlows is not None:
+            self.loopCascades = tuple( flow.instrument(cascade) for flow,cascade in zip(self.loopCutFlows, self.loopCascades) )
+
+        return
+
+    def reorderCuts(self):
+        """
+        Reorders the cuts of each level of the selection of this analyzer by
+        the cut-flows recorded in the event loop, see cutFlow.reorder, and
+        stops recording them.  Called by the event loop of analyze() once the
+        selection was evaluated on reorderCutsAfter events
+        """
+
+        elCutFlow, muonCutFlow, tauCutFlow = self.loopCutFlows
+        self.elCascade = elCutFlow.reorder(self.elCascade)
+        self.muonCascade = muonCutFlow.reorder(self.muonCascade)
+        self.tauCascade = tauCutFlow.reorder(self.tauCascade)
+
+        self.loopCascades = (self.elCascade, self.muonCascade, self.tauCascade)
+        self.loopCutFlows = None
+        self.reorderCutsAfter = None
+
+        return
+
+    def loadChunkMasks(self, firstEntry, numEntries, cache=None):
+        """
+        Evaluates the selections of this analyzer and of its selection variants
+        for the entries [firstEntry, firstEntry + numEntries) of self.source at
+        once, see getSharedSelectionMasks, the branches of each physics object
+        are read once for all selections.  Moves self.source, reload the
+        current entry afterwards
+
+        firstEntry  - first entry of the chunk
+        numEntries  - number of entries in the chunk
+        cache       - Optional, selectionCache of the input file
+        """
+
+        listOfSelections = self.getSelections()
+        listOfCutFlows = [ selection.loopCutFlows or (None, None, None) for selection in listOfSelections ]
+
+        listOfElMasks = getSharedSelectionMasks(self.source, [ selection.elCuts for selection in listOfSelections ], firstEntry, numEntries, cache,
+                [ cutFlows[0] for cutFlows in listOfCutFlows ], listOfCascadePlans=[ selection.elCascade for selection in listOfSelections ])
+        self.timer.lap("recoSelection_el")
+        listOfMuonMasks = getSharedSelectionMasks(self.source, [ selection.muonCuts for selection in listOfSelections ], firstEntry, numEntries, cache,
+                [ cutFlows[1] for cutFlows in listOfCutFlows ], listOfCascadePlans=[ selection.muonCascade for selection in listOfSelections ])
+        self.timer.lap("recoSelection_mu")
+        listOfTauMasks = getSharedSelectionMasks(self.source, [ selection.tauCuts for selection in listOfSelections ], firstEntry, numEntries, cache,
+                [ cutFlows[2] for cutFlows in listOfCutFlows ], listOfCascadePlans=[ selection.tauCascade for selection in listOfSelections ])
+        self.timer.lap("recoSelection_tau")
+
+        for selection,elMasks,muonMasks,tauMasks in zip(listOfSelections, listOfElMasks, listOfMuonMasks, listOfTauMasks):
+            selection.loopMasks = elMasks + muonMasks + tauMasks
+
+            # The next chunk is evaluated with the reordered cuts
+            if selection.reorderCutsAfter is not None and selection.loopCutFlows[0].nEvts >= selection.reorderCutsAfter:
+                selection.reorderCuts()
+
+        return
+
+    def analyzeParallel(self, numWorkers=None, firstEntry=0, numEvts=-1, checkpointFileName=None, checkpointEvery=None, checkpointInterval=600., resume=False, **kwargs):
+        """
+        Analyzes the entries of self.source with a pool of numWorkers processes.
+        The entries are split into cluster-aligned ranges, each range is analyzed
+        by a worker with its own set of histograms and the partial histograms
+        are added to the histograms of this analyzer, the result is identical
+        bin-for-bin to a serial call of analyze()
+
+        numWorkers  - number of worker processes, if None the number of cores
+        firstEntry  - entry of self.source to start the analysis from
+        numEvts     - number of events to analyze, -1 for all
+        checkpointFileName, checkpointEvery, checkpointInterval, resume - see
+                      analyze(), the checkpoints hold the merged results and
+                      the finished ranges, resumed jobs skip the finished ranges
+        kwargs      - keyword arguments passed to analyze() by each worker
+        """
+
+        if numWorkers is None:
+            numWorkers = multiprocessing.cpu_count()
+
+        lastEntry = -1
+        if numEvts > -1:
+            lastEntry = firstEntry + numEvts
+
+        # Several ranges per worker let fast workers pick up the slack
+        listOfRanges = self.source.splitEntryRange(4 * numWorkers, firstEntry, lastEntry)
+        print "analyzing input file: %s with %i workers in %i ranges"%(self.inputFileName, numWorkers, len(listOfRanges))
+
+        # Workers do not stream metrics, the merged metrics are streamed here
+        self.timer = stageTimer(kwargs.pop("metricsFileName", None), kwargs.pop("metricsInterval", 60.))
+
+        dict_config = self.getConfig()
+        listOfArgs = []
+        for idx,(rangeFirst,rangeNum) in enumerate(listOfRanges):
+            dict_rangeArgs = dict(kwargs)
+            for fileKey in ("skimFileName", "dumpFileName"):
+                if kwargs.get(fileKey, None) is not None:
+                    # Each range writes its own part of the skim and event dump
+                    dict_rangeArgs[fileKey] = getPartFileName(kwargs[fileKey], idx)
+            listOfArgs.append( (dict_config, rangeFirst, rangeNum, dict_rangeArgs) )
+
+        # Ranges finished before the checkpoint are not analyzed again
+        checkpoint = None
+        listOfDoneJobs = []
+        if checkpointFileName is not None:
+            dict_checkpointKey = self.getCheckpointKey({ "ranges":listOfRanges }, kwargs.get("listOfTriggers", None), kwargs.get("chunkSize", None), kwargs.get("preFilter", None), kwargs.get("printCutFlow", False))
+            if resume:
+                listOfArgs, listOfDoneJobs = self.resumeJobs(listOfArgs, checkpointFileName, dict_checkpointKey)
+            checkpoint = checkpointWriter(checkpointFileName, checkpointEvery, checkpointInterval)
+
+        self.timer.begin(sum( rangeNum for config,rangeFirst,rangeNum,rangeArgs in listOfArgs ))
+
+        # Unpickled histograms must not be attached to gDirectory
+        addDirStatus = r.TH1.AddDirectoryStatus()
+        r.TH1.AddDirectory(False)
+
+        pool = multiprocessing.Pool(numWorkers)
+        numDoneEvts = 0
+        try:
+            for dict_results in pool.imap_unordered(analyzeEntryRange, listOfArgs):
+                self.addResults(dict_results)
+                self.timer.writeMetricsIfDue()
+
+                listOfDoneJobs.append(dict_results["job"])
+                numDoneEvts += dict_results["job"][2]
+                if checkpoint is not None and checkpoint.due(numDoneEvts):
+                    checkpoint.write(numDoneEvts, lambda: self.getCheckpointState(dict_checkpointKey, listOfDoneJobs))
+        finally:
+            pool.close()
+            pool.join()
+            r.TH1.AddDirectory(addDirStatus)
+            if checkpoint is not None:
+                checkpoint.close()
+
+        self.timer.end()
+        self.timer.printSummary()
+
+        return
+
+    def addHistos(self, dict_histos):
+        """
+        Adds histograms returned by getHistos() to the histograms of this analyzer
+
+        dict_histos - dictionary returned by getHistos()
+        """
+
+        for key,histos in dict_histos["el"].iteritems():
+            self.elHistos[key].add(histos)
+        for key,histos in dict_histos["mu"].iteritems():
+            self.muHistos[key].add(histos)
+        for key,histos in dict_histos["tau"].iteritems():
+            self.tauHistos[key].add(histos)
+        for key,histos in dict_histos["hvyRes"].iteritems():
+            self.hvyResHistos[key].add(histos)
+
+        return
+
+    def addCutFlows(self, dict_cutFlows):
+        """
+        Adds the cut-flows in dict_cutFlows to the cut-flows of this analyzer
+
+        dict_cutFlows - dictionary of cutFlow, e.g. dict_cutFlows of another analyzer
+        """
+
+        for name,flow in dict_cutFlows.iteritems():
+            if name not in self.dict_cutFlows:
+                self.dict_cutFlows[name] = cutFlow(name)
+            self.dict_cutFlows[name].add(flow)
+
+        return
+
+    def addResults(self, dict_results):
+        """
+        Adds the histograms, cut-flows and stage times returned by getResults()
+        of another analyzer to those of this analyzer
+
+        dict_results - dictionary returned by getResults()
+        """
+
+        self.addHistos(dict_results["histos"])
+        self.addCutFlows(dict_results["cutFlows"])
+        self.addSelectionResults(dict_results["selections"])
+        self.timer.add(dict_results["timer"])
+
+        return
+
+    def addSelectionResults(self, dict_selectionResults):
+        """
+        Adds the histograms and cut-flows of each selection variant returned by
+        getSelectionResults() of another analyzer to those of the variant of
+        the same name of this analyzer
+
+        dict_selectionResults - dictionary returned by getSelectionResults()
+        """
+
+        for name,dict_results in dict_selectionResults.iteritems():
+            if name not in self.dict_selections:
+                print "Error results of selection configuration %s, which is not set, can not be added"%name
+                print "exiting"
+                exit(os.EX_SOFTWARE)
+            self.dict_selections[name].addHistos(dict_results["histos"])
+            self.dict_selections[name].addCutFlows(dict_results["cutFlows"])
+
+        return
+
+    def getCheckpointKey(self, dict_entries, listOfTriggers=None, chunkSize=None, preFilter=None, printCutFlow=False):
+        """
+        Returns the dictionary identifying the job writing a checkpoint, a
+        checkpoint is only resumed by a job with the same key
+
+        dict_entries - dictionary describing the entries analyzed by the job
+        listOfTriggers, chunkSize, preFilter, printCutFlow - see analyze()
+        """
+
+        dict_config = self.getConfig()
+        del dict_config["eventSource"]
+
+        return {
+                "config":dict_config,
+                "entries":dict_entries,
+                "listOfTriggers":listOfTriggers,
+                "chunkSize":chunkSize,
+                "preFilter":preFilter,
+                "printCutFlow":printCutFlow
+                }
+
+    def getCheckpointState(self, dict_checkpointKey, position):
+        """
+        Returns the state written to a checkpoint, see checkpointWriter.  The
+        fill buffers are flushed and removed first, call in the forked child
+        writing the checkpoint only.
+
+        dict_checkpointKey  - dictionary returned by getCheckpointKey()
+        position            - next entry to analyze, or list of finished jobs
+        """
+
+        self.setFillBuffer(None)
+
+        return {
+                "key":dict_checkpointKey,
+                "position":position,
+                "histos":self.getHistos(),
+                "cutFlows":self.dict_cutFlows,
+                "selections":self.getSelectionResults()
+                }
+
+    def getConfig(self):
+        """
+        Returns a dictionary of the settings needed to recreate this analyzer
+        in another process, see setConfig()
+        """
+
+        return {
+                "inputFileName":self.inputFileName,
+                "inputTreeName":self.inputTreeName,
+                "isData":self.isData,
+                "anaGen":self.anaGen,
+                "anaReco":self.anaReco,
+                "sigPdgId1":self.sigPdgId1,
+                "sigPdgId2":self.sigPdgId2,
+                "useGlobalMuonTrack":self.useGlobalMuonTrack,
+                "genPdgIds":self.genPdgIds,
+                "genStatusCodes":self.genStatusCodes,
+                "eventSource":self.getPicklableSource(),
+                "histoBackend":self.histoBackend,
+                "selectionConfigs":[ self.dict_selections[name].selectionConfig for name in sorted(self.dict_selections.keys()) ]
+                }
+
+    def getPicklableSource(self):
+        """
+        Returns the event source to hand to another process, None if the other
+        process reopens inputFileName itself, see getConfig()
+        """
+
+        if isinstance(self.source, (treeEventSource, columnarDirSource)):
+            return None
+
+        return self.source
+
+    def getHistos(self):
+        """
+        Returns a dictionary holding the histogram containers of this analyzer
+        """
+
+        return {
+                "el":self.elHistos,
+                "mu":self.muHistos,
+                "tau":self.tauHistos,
+                "hvyRes":self.hvyResHistos
+                }
+
+    def getResults(self):
+        """
+        Returns a dictionary holding everything analyze() accumulates, i.e.
+        the histograms, the cut-flows and the stage times, see addResults()
+        """
+
+        return {
+                "histos":self.getHistos(),
+                "cutFlows":self.dict_cutFlows,
+                "selections":self.getSelectionResults(),
+                "timer":self.timer
+                }
+
+    def getRequiredBranches(self, listOfTriggers=None):
+        """
+        Returns the sorted list of the names of all TBranches read by analyze()
+
+        listOfTriggers - List of triggers to be checked for passing
+        """
+
+        # The selection variants are evaluated on the same events
+        listOfSelections = self.getSelections()
+
+        return getRequiredBranches(
+                listOfTriggers=listOfTriggers,
+                listOfCutDicts=[ dict_cuts for selection in listOfSelections for dict_cuts in (selection.elCuts, selection.muonCuts, selection.tauCuts) ],
+                useGlobalTrack=any( selection.useGlobalMuonTrack for selection in listOfSelections ),
+                anaGen=(not self.isData and self.anaGen))
+
+    def getSelectionResults(self):
+        """
+        Returns a dictionary holding the histograms and cut-flows of each
+        selection variant, see setSelectionConfigs() and addSelectionResults()
+        """
+
+        dict_selectionResults = {}
+        for name,selection in self.dict_selections.iteritems():
+            dict_selectionResults[name] = {
+                    "histos":selection.getHistos(),
+                    "cutFlows":selection.dict_cutFlows
+                    }
+
+        return dict_selectionResults
+
+    def getSelections(self):
+        """
+        Returns the list of this analyzer, holding the nominal selection,
+        followed by its selection variants sorted by name, see
+        setSelectionConfigs()
+        """
+
+        return [ self ] + [ self.dict_selections[name] for name in sorted(self.dict_selections.keys()) ]
+
+    def printCutFlow(self):
+        """
+        Prints the recorded cut-flow of each selection, see analyze()
+        """
+
+        for name,flow in sorted(self.dict_cutFlows.iteritems()):
+            flow.printTable()
+            print ""
+
+        for name,selection in sorted(self.dict_selections.iteritems()):
+            if len(selection.dict_cutFlows) > 0:
+                print "selection configuration %s"%name
+                print ""
+                selection.printCutFlow()
 
-                print "reco info:"
-                print "| pdgId | status | charge | px | py | pz | E | pt | eta | mass |"
-                print "| %i | %i | %i | %f | %f | %f | %f | %f | %f | %f |"%(
-                        candTuple[0].pdgId, 
-                        candTuple[0].status, 
-                        candTuple[0].charge, 
-                        candTuple[0].px(), 
-                        candTuple[0].py(), 
-                        candTuple[0].pz(), 
-                        candTuple[0].E(), 
-                        candTuple[0].pt(), 
-                        candTuple[0].eta(), 
-                        candTuple[0].M() )
-                print "| %i | %i | %i | %f | %f | %f | %f | %f | %f | %f |"%(
-                        candTuple[1].pdgId, 
-                        candTuple[1].status, 
-                        candTuple[1].charge, 
-                        candTuple[1].px(), 
-                        candTuple[1].py(), 
-                        candTuple[1].pz(), 
-                        candTuple[1].E(), 
-                        candTuple[1].pt(), 
-                        candTuple[1].eta(), 
-                        candTuple[1].M() )
-                print "| %i | %i | %i | %f | %f | %f | %f | %f | %f | %f |"%(
-                        hvyResCand.pdgId, 
-                        hvyResCand.status, 
-                        hvyResCand.charge, 
-                        hvyResCand.px(), 
-                        hvyResCand.py(), 
-                        hvyResCand.pz(), 
-                        hvyResCand.E(), 
-                        hvyResCand.pt(), 
-                        hvyResCand.eta(), 
-                        hvyResCand.M() )
-
-                print "gen info:"
-                print "| pdgId | status | charge | px | py | pz | E | pt | eta | mass |"
-                print "| %i | %i | %i | %f | %f | %f | %f | %f | %f | %f |"%(
-                        candTupleGen[0].pdgId, 
-                        candTupleGen[0].status, 
-                        candTupleGen[0].charge, 
-                        candTupleGen[0].px(), 
-                        candTupleGen[0].py(), 
-                        candTupleGen[0].pz(), 
-                        candTupleGen[0].E(), 
-                        candTupleGen[0].pt(), 
-                        candTupleGen[0].eta(), 
-                        candTupleGen[0].M() )
-                print "| %i | %i | %i | %f | %f | %f | %f | %f | %f | %f |"%(
-                        candTupleGen[1].pdgId, 
-                        candTupleGen[1].status, 
-                        candTupleGen[1].charge, 
-                        candTupleGen[1].px(), 
-                        candTupleGen[1].py(), 
-                        candTupleGen[1].pz(), 
-                        candTupleGen[1].E(), 
-                        candTupleGen[1].pt(), 
-                        candTupleGen[1].eta(), 
-                        candTupleGen[1].M() )
-                print "| %i | %i | %i | %f | %f | %f | %f | %f | %f | %f |"%(
-                        hvyResCandGen.pdgId, 
-                        hvyResCandGen.status, 
-                        hvyResCandGen.charge, 
-                        hvyResCandGen.px(), 
-                        hvyResCandGen.py(), 
-                        hvyResCandGen.pz(), 
-                        hvyResCandGen.E(), 
-                        hvyResCandGen.pt(), 
-                        hvyResCandGen.eta(), 
-                        hvyResCandGen.M() )
-        
         return
 
+    def resumeCheckpoint(self, checkpointFileName, dict_checkpointKey):
+        """
+        Adds the histograms and cut-flows of the checkpoint to those of this
+        analyzer and returns the position stored with them, see
+        getCheckpointState(), or None if there is no checkpoint
+
+        checkpointFileName  - physical filename of the checkpoint
+        dict_checkpointKey  - dictionary returned by getCheckpointKey() for this job
+        """
+
+        # Unpickled histograms must not be attached to gDirectory
+        addDirStatus = r.TH1.AddDirectoryStatus()
+        r.TH1.AddDirectory(False)
+        dict_state = readCheckpoint(checkpointFileName)
+        r.TH1.AddDirectory(addDirStatus)
+
+        if dict_state is None:
+            print "no checkpoint %s found, starting from the beginning"%checkpointFileName
+            return None
+
+        if dict_state["key"] != dict_checkpointKey:
+            print "Error checkpoint %s was written by a job with a different input, selection or settings"%checkpointFileName
+            print "exiting"
+            exit(os.EX_DATAERR)
+
+        self.addHistos(dict_state["histos"])
+        self.addCutFlows(dict_state["cutFlows"])
+        self.addSelectionResults(dict_state["selections"])
+        print "resuming from checkpoint %s"%checkpointFileName
+
+        return dict_state["position"]
+
+    def resumeJobs(self, listOfArgs, checkpointFileName, dict_checkpointKey):
+        """
+        Resumes the checkpoint of a job split into ranges analyzed by
+        analyzeEntryRange, see resumeCheckpoint().  Returns the tuple
+        (listOfArgs, listOfDoneJobs) of the arguments of the ranges still to
+        analyze and the list of the ranges finished before the checkpoint
+
+        listOfArgs          - list of the arguments of analyzeEntryRange of all ranges
+        checkpointFileName  - physical filename of the checkpoint
+        dict_checkpointKey  - dictionary returned by getCheckpointKey() for this job
+        """
+
+        listOfDoneJobs = self.resumeCheckpoint(checkpointFileName, dict_checkpointKey)
+        if listOfDoneJobs is None:
+            return (listOfArgs, [])
+
+        setOfDoneJobs = set(listOfDoneJobs)
+        listOfArgs = [ args for args in listOfArgs if (args[0]["inputFileName"], args[1], args[2]) not in setOfDoneJobs ]
+
+        return (listOfArgs, list(listOfDoneJobs))
+
     def setAnalysisFlags(self, isData=False, anaGen=True, anaReco=True, sigPdgId1=13, sigPdgId2=15):
         """
         Sets the flags that control the behavior of a call of the analyze() method
@@ -441,43 +1205,230 @@ class lfvAnalyzer:
         
         return
 
-    def write(self, outputFileName, debug=False):
+    def setFillBuffer(self, bufferSize=None):
+        """
+        Enables buffered filling of all histograms, see PhysObjHistos.setFillBuffer
+
+        bufferSize - number of values held before a buffer is flushed, if None
+                     the buffers are flushed and removed
+        """
+
+        for dict_containers in self.getHistos().values():
+            for histos in dict_containers.values():
+                histos.setFillBuffer(bufferSize)
+
+        for name,selection in self.dict_selections.iteritems():
+            selection.setFillBuffer(bufferSize)
+
+        return
+
+    def setGenSelection(self, listOfPdgIds=None, listOfStatusCodes=defaultGenStatusCodes):
+        """
+        Sets the selection of gen particles applied by analyze()
+
+        listOfPdgIds      - list of selected |pdgId|, if None the hvy resonance
+                            daughters sigPdgId1 and sigPdgId2 are selected.  The
+                            gen candidate is only built in events holding both
+                            daughters among the selected gen particles
+        listOfStatusCodes - list of selected status codes
+        """
+
+        self.genPdgIds = listOfPdgIds
+        if listOfPdgIds is not None:
+            self.genPdgIds = tuple( abs(pdgId) for pdgId in listOfPdgIds )
+        self.genStatusCodes = tuple(listOfStatusCodes)
+
+        return
+
+    def setConfig(self, dict_config):
+        """
+        Sets the analysis flags from a dictionary returned by getConfig()
+
+        dict_config - dictionary returned by getConfig()
+        """
+
+        self.setAnalysisFlags(
+                isData=dict_config["isData"],
+                anaGen=dict_config["anaGen"],
+                anaReco=dict_config["anaReco"],
+                sigPdgId1=dict_config["sigPdgId1"],
+                sigPdgId2=dict_config["sigPdgId2"])
+        self.useGlobalMuonTrack = dict_config["useGlobalMuonTrack"]
+        self.setGenSelection(
+                dict_config.get("genPdgIds", None),
+                dict_config.get("genStatusCodes", defaultGenStatusCodes))
+        self.setSelectionConfigs(dict_config.get("selectionConfigs", []))
+
+        return
+
+    def setSelection(self, dict_elSelection=None, dict_muonSelection=None, dict_tauSelection=None):
+        """
+        Validates and compiles the reco level selection applied by analyze(),
+        malformed cuts exit here
+
+        dict_elSelection   - dictionary of electron selection levels, if None
+                             selectorEl.elSelection
+        dict_muonSelection - dictionary of muon selection levels, if None
+                             selectorMuon.muonSelection
+        dict_tauSelection  - dictionary of tau selection levels, if None
+                             selectorTau.tauSelection
+        """
+
+        if dict_elSelection is None:
+            dict_elSelection = elSelection
+        if dict_muonSelection is None:
+            dict_muonSelection = muonSelection
+        if dict_tauSelection is None:
+            dict_tauSelection = tauSelection
+
+        self.elCuts = compileSelectionLevels(dict_elSelection, listOfBranchNames=self.listBNames)
+        self.muonCuts = compileSelectionLevels(dict_muonSelection, listOfBranchNames=self.listBNames)
+        self.tauCuts = compileSelectionLevels(dict_tauSelection, listOfBranchNames=self.listBNames)
+
+        # Nested levels are evaluated on the survivors of the previous level
+        self.elCascade = getCascadePlan(self.elCuts)
+        self.muonCascade = getCascadePlan(self.muonCuts)
+        self.tauCascade = getCascadePlan(self.tauCuts)
+
+        return
+
+    def setSelectionConfigs(self, listOfSelectionConfigs):
+        """
+        Adds variants of the reco level selection, each selectionConfig is
+        analyzed by an lfvAnalyzer reading the events of this analyzer, see
+        analyze(), and written to the subdirectory of its name by write().
+        Variants already set are kept, a name can not be reused for a
+        different configuration.
+
+        listOfSelectionConfigs - list of selectionConfig
+        """
+
+        for config in listOfSelectionConfigs:
+            if config.name in self.dict_selections:
+                if self.dict_selections[config.name].selectionConfig != config:
+                    print "Error a different selection configuration named %s is already set"%config.name
+                    print "exiting"
+                    exit(os.EX_USAGE)
+                continue
+
+            if config.name in reservedDirNames or "/" in config.name:
+                print "Error selection configuration name %s is not allowed"%config.name
+                print "The list of reserved names is:"
+                print ""
+                print reservedDirNames
+                print ""
+                print "exiting"
+                exit(os.EX_USAGE)
+
+            # Identical histogram names must not replace those of this analyzer in gDirectory
+            addDirStatus = r.TH1.AddDirectoryStatus()
+            r.TH1.AddDirectory(False)
+            selection = lfvAnalyzer(self.inputFileName, self.inputTreeName, self.isData, self.anaGen, self.anaReco, self.source, self.histoBackend)
+            r.TH1.AddDirectory(addDirStatus)
+
+            selection.selectionConfig = config
+            selection.setSelection(config.elSelection, config.muonSelection, config.tauSelection)
+            self.dict_selections[config.name] = selection
+
+        self.updateSelectionConfigs()
+
+        return
+
+    def updateSelectionConfigs(self):
+        """
+        Copies the analysis flags, gen selection and muon track choice of this
+        analyzer to the selection variants, the muon track choice only if
+        their selectionConfig leaves it open
+        """
+
+        for name,selection in self.dict_selections.iteritems():
+            selection.setAnalysisFlags(self.isData, self.anaGen, self.anaReco, self.sigPdgId1, self.sigPdgId2)
+            selection.setGenSelection(self.genPdgIds, self.genStatusCodes)
+            selection.useGlobalMuonTrack = self.useGlobalMuonTrack
+            if selection.selectionConfig.useGlobalMuonTrack is not None:
+                selection.useGlobalMuonTrack = selection.selectionConfig.useGlobalMuonTrack
+
+        return
+
+    def write(self, outputFileName, debug=False, compressAlgo=None, compressLevel=1):
         """
         Writes TObjects to outputFileName.
-        The output TFile is deleted each time
+        The output TFile is deleted each time, it is opened once and the
+        full directory tree is written in a single pass
+
+        compressAlgo  - compression algorithm, a key of dict_compressAlgos or
+                        None for the ROOT default
+        compressLevel - compression level, 0 (none) to 9 (maximum)
+        """
+
+        if compressAlgo is None:
+            compress = compressLevel
+        elif compressAlgo in dict_compressAlgos:
+            compress = 100 * dict_compressAlgos[compressAlgo] + compressLevel
+        else:
+            print "Compression algorithm %s not understood"%compressAlgo
+            print "The list of supported algorithms is:"
+            print ""
+            print dict_compressAlgos.keys()
+            print ""
+            print "exiting"
+            exit(os.EX_USAGE)
+
+        outFile = r.TFile(outputFileName, "RECREATE", "", compress)
+        if not outFile or outFile.IsZombie():
+            print "Error unable to create output file %s"%outputFileName
+            print "exiting"
+            exit(os.EX_CANTCREAT)
+
+        self.writeDirectory(outFile, debug)
+
+        for name,selection in sorted(self.dict_selections.iteritems()):
+            if debug:
+                print "saving histograms of selection configuration %s"%name
+            selection.writeDirectory(getOrMakeDirectory(outFile, name), debug)
+
+        outFile.Close()
+
+        return
+
+    def writeDirectory(self, directory, debug=False):
+        """
+        Writes the histograms and cut-flows of this analyzer, without those of
+        the selection variants, to directory, see write()
+
+        directory - TDirectory, e.g. an open TFile, histograms should be written too
         """
-        
-        option="RECREATE"
 
         if debug:
             print "saving electron histograms"
         for key,histos in self.elHistos.iteritems():
-            # write histos
-            histos.write(outputFileName, option)
-            
-            # after first iteration change the option from recreate to update
-            if option == "RECREATE":
-                option = "UPDATE"
+            histos.writeDirectory(directory)
 
         if debug:
             print "saving muon histograms"
         for key,histos in self.muHistos.iteritems():
-            histos.write(outputFileName, option)
+            histos.writeDirectory(directory)
 
         if debug:
             print "saving tau histograms"
         for key,histos in self.tauHistos.iteritems():
-            histos.write(outputFileName, option)
+            histos.writeDirectory(directory)
 
         #if not self.isData:
         #    if debug:
         #        print "saving gen particle histograms"
         #    for key,histos in self.GenPartHistos.iteritems():
-        #        histos.write(outputFileName, option)
+        #        histos.writeDirectory(directory)
 
         if debug:
             print "saveing heavy resonance candidate histograms"
         for key,histos in self.hvyResHistos.iteritems():
-            histos.write(outputFileName, option)
+            histos.writeDirectory(directory)
+
+        if debug and len(self.dict_cutFlows) > 0:
+            print "saving cut-flow histograms"
+        for name,flow in self.dict_cutFlows.iteritems():
+            flow.writeDirectory(directory)
 
         return
+
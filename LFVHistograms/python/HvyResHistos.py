@@ -1,5 +1,7 @@
-import ROOT as r
-from LFVAnalysis.LFVHistograms.PhysObjHistos import PhysObjHistos
+from LFVAnalysis.LFVHistograms.fillBuffer import flushHistos, unwrapHistos, wrapHistos
+from LFVAnalysis.LFVHistograms.numpyHisto import bookTH1
+from LFVAnalysis.LFVHistograms.PhysObjHistos import getOrMakeDirectory, PhysObjHistos
+from LFVAnalysis.LFVHistograms.sparseTH2 import sparseTH2
 from LFVAnalysis.LFVUtilities.utilities import selLevels
 
 class HvyResMassResolHistos:
@@ -9,11 +11,12 @@ class HvyResMassResolHistos:
         selLevel - string specifying the selection type
         """
         
-        self.massResol = r.TH1F("h_%s_massResol_%s"%(physObj,selLevel),
+        self.massResol = bookTH1("h_%s_massResol_%s"%(physObj,selLevel),
                                         "%s mass resolution - %s"%(physObj,selLevel),
                                         100,-2.5,2.5) #(reco - gen) / gen
         
-        self.mass_response = r.TH2F("h_%s_massReco_vs_massGen_%s"%(physObj,selLevel),
+        # Only bins near the diagonal are populated, the TH2F is booked at write time
+        self.mass_response = sparseTH2("h_%s_massReco_vs_massGen_%s"%(physObj,selLevel),
                                         "%s massReco vs. massGen - %s"%(physObj, selLevel),
                                         3500,-0.5,6999.5,
                                         3500,-0.5,6999.5)
@@ -31,6 +34,42 @@ class HvyResMassResolHistos:
 
         return
 
+    def add(self, other):
+        """
+        Adds the contents of the histograms of other to the histograms of self
+
+        other - HvyResMassResolHistos with the same binning
+        """
+
+        self.massResol.Add(other.massResol)
+        self.mass_response.Add(other.mass_response)
+
+        return
+
+    def flush(self):
+        """
+        Fills all buffered values into the histograms, see setFillBuffer
+        """
+
+        flushHistos(self.__dict__, [ "massResol", "mass_response" ])
+
+        return
+
+    def setFillBuffer(self, bufferSize=None):
+        """
+        Buffers the values given to Fill() in numpy arrays which are filled in
+        bulk, if bufferSize is None the buffers are flushed and removed
+
+        bufferSize - number of values held before a buffer is flushed
+        """
+
+        if bufferSize is None:
+            unwrapHistos(self.__dict__, [ "massResol", "mass_response" ])
+        else:
+            wrapHistos(self.__dict__, [ "massResol", "mass_response" ], bufferSize)
+
+        return
+
 class HvyResHistos(PhysObjHistos):
     def __init__(self, name="HvyRes", mcType=None):
         """
@@ -51,27 +90,62 @@ class HvyResHistos(PhysObjHistos):
 
         return
 
-    def write(self, filename, option="RECREATE"):
-        """
-        Creates a TFile using TOption option
-        Writes all stored histograms to this TFile
+    def writeDirectory(self, directory):
         """
+        Writes all stored histograms to the physics object directory
+        found in, or created in, directory
 
-        PhysObjHistos.write(self,filename, option)
+        directory - TDirectory, e.g. an open TFile, histograms should be written too
+        """
 
-        outFile = r.TFile(filename, "UPDATE", "", 1)
-        outFile.mkdir(self.physObjType)
-        outDirPhysObj = outFile.GetDirectory(self.physObjType)
+        outDirPhysObj = PhysObjHistos.writeDirectory(self,directory)
 
         for lvl in selLevels:
-            outDirPhysObj.mkdir(lvl)
-            dirSelLevel = outDirPhysObj.GetDirectory(lvl)
+            dirSelLevel = getOrMakeDirectory(outDirPhysObj, lvl)
             
-            if self.mcType is "reco":
-                dirSelLevel.mkdir("MassResolution")
-                dirMassRes = dirSelLevel.GetDirectory("MassResolution")
+            if lvl in self.dict_histosResol:
+                dirMassRes = getOrMakeDirectory(dirSelLevel, "MassResolution")
                 self.dict_histosResol[lvl].write(dirMassRes)
 
-        outFile.Close()
+        return outDirPhysObj
+
+    def add(self, other):
+        """
+        Adds the contents of the histograms of other to the histograms of self
+
+        other - HvyResHistos with the same mcType and binning
+        """
+
+        PhysObjHistos.add(self,other)
+
+        for lvl in self.dict_histosResol.keys():
+            self.dict_histosResol[lvl].add(other.dict_histosResol[lvl])
+
+        return
+
+    def flush(self):
+        """
+        Fills all buffered values into the histograms, see setFillBuffer
+        """
+
+        PhysObjHistos.flush(self)
+
+        for lvl in self.dict_histosResol.keys():
+            self.dict_histosResol[lvl].flush()
+
+        return
+
+    def setFillBuffer(self, bufferSize=None):
+        """
+        Buffers the values given to Fill() in numpy arrays which are filled in
+        bulk, if bufferSize is None the buffers are flushed and removed
+
+        bufferSize - number of values held before a buffer is flushed
+        """
+
+        PhysObjHistos.setFillBuffer(self, bufferSize)
+
+        for lvl in self.dict_histosResol.keys():
+            self.dict_histosResol[lvl].setFillBuffer(bufferSize)
 
         return
@@ -1,6 +1,7 @@
-import ROOT as r
-from LFVAnalysis.LFVHistograms.PhysObjHistos import PhysObjHistos
+from LFVAnalysis.LFVHistograms.fillBuffer import flushHistos, unwrapHistos, wrapHistos
+from LFVAnalysis.LFVHistograms.PhysObjHistos import getOrMakeDirectory, PhysObjHistos
 from LFVAnalysis.LFVHistograms.identificationHistos import identificationHistos
+from LFVAnalysis.LFVHistograms.numpyHisto import bookTH1, bookTH2
 from LFVAnalysis.LFVUtilities.utilities import selLevels
 
 # This follows the class method names for access with getattr(...) in code
@@ -40,10 +41,10 @@ class MuonIdHistos(identificationHistos):
 
         self.dict_hitHistos = {}
         for idLabel in muonIdLabels:
-            self.dict_hitHistos[idLabel] = r.TH2F("%s_%s_hitInfo_%s_%s"%(prefix,physObj,idLabel,selLevel),
-                                                  "%s Hit Info for %s - %s"%(physObj, idLabel, selLevel),
-                                                   50,-0.5,49.5,
-                                                   len(muonhitLabels),0.5,len(muonhitLabels)+0.5)
+            self.dict_hitHistos[idLabel] = bookTH2("%s_%s_hitInfo_%s_%s"%(prefix,physObj,idLabel,selLevel),
+                                                   "%s Hit Info for %s - %s"%(physObj, idLabel, selLevel),
+                                                    50,-0.5,49.5,
+                                                    len(muonhitLabels),0.5,len(muonhitLabels)+0.5)
             for binY,hitLabel in enumerate(muonhitLabels):
                 self.dict_hitHistos[idLabel].GetYaxis().SetBinLabel(binY+1,hitLabel)
 
@@ -62,6 +63,46 @@ class MuonIdHistos(identificationHistos):
 
         return
 
+    def add(self, other):
+        """
+        Adds the contents of the histograms of other to the histograms of self
+
+        other - MuonIdHistos with the same binning
+        """
+
+        identificationHistos.add(self,other)
+
+        for idLabel in muonIdLabels:
+            self.dict_hitHistos[idLabel].Add(other.dict_hitHistos[idLabel])
+
+        return
+
+    def flush(self):
+        """
+        Fills all buffered values into the histograms, see setFillBuffer
+        """
+
+        identificationHistos.flush(self)
+        flushHistos(self.dict_hitHistos, muonIdLabels)
+
+        return
+
+    def setFillBuffer(self, bufferSize=None):
+        """
+        Buffers the values given to Fill() in numpy arrays which are filled in
+        bulk, if bufferSize is None the buffers are flushed and removed
+
+        bufferSize - number of values held before a buffer is flushed
+        """
+
+        identificationHistos.setFillBuffer(self, bufferSize)
+        if bufferSize is None:
+            unwrapHistos(self.dict_hitHistos, muonIdLabels)
+        else:
+            wrapHistos(self.dict_hitHistos, muonIdLabels, bufferSize)
+
+        return
+
 class MuonIsoHistos:
     def __init__(self, physObj="mu", selLevel="all", mcType=None):
         """
@@ -74,9 +115,9 @@ class MuonIsoHistos:
         if mcType is not None:
             prefix = "h_%s"%mcType
 
-        self.isoTrackerBased03 = r.TH1F("%s_%s_isoTrkBased03_%s"%(prefix,physObj,selLevel),
-                                        "%s isoTrkBased03 - %s"%(physObj,selLevel),
-                                        400,-0.5,99.5)
+        self.isoTrackerBased03 = bookTH1("%s_%s_isoTrkBased03_%s"%(prefix,physObj,selLevel),
+                                         "%s isoTrkBased03 - %s"%(physObj,selLevel),
+                                         400,-0.5,99.5)
 
         return
 
@@ -90,6 +131,41 @@ class MuonIsoHistos:
 
         return
 
+    def add(self, other):
+        """
+        Adds the contents of the histograms of other to the histograms of self
+
+        other - MuonIsoHistos with the same binning
+        """
+
+        self.isoTrackerBased03.Add(other.isoTrackerBased03)
+
+        return
+
+    def flush(self):
+        """
+        Fills all buffered values into the histograms, see setFillBuffer
+        """
+
+        flushHistos(self.__dict__, [ "isoTrackerBased03" ])
+
+        return
+
+    def setFillBuffer(self, bufferSize=None):
+        """
+        Buffers the values given to Fill() in numpy arrays which are filled in
+        bulk, if bufferSize is None the buffers are flushed and removed
+
+        bufferSize - number of values held before a buffer is flushed
+        """
+
+        if bufferSize is None:
+            unwrapHistos(self.__dict__, [ "isoTrackerBased03" ])
+        else:
+            wrapHistos(self.__dict__, [ "isoTrackerBased03" ], bufferSize)
+
+        return
+
 class MuonHistos(PhysObjHistos):
     def __init__(self, pdgId=13, name=None, mcType=None):
         """
@@ -109,30 +185,67 @@ class MuonHistos(PhysObjHistos):
 
         return
 
-    def write(self, filename, option="RECREATE"):
-        """
-        Creates a TFile using TOption option
-        Writes all stored histograms to this TFile
+    def writeDirectory(self, directory):
         """
+        Writes all stored histograms to the physics object directory
+        found in, or created in, directory
 
-        PhysObjHistos.write(self,filename, option)
+        directory - TDirectory, e.g. an open TFile, histograms should be written too
+        """
 
-        outFile = r.TFile(filename, "UPDATE", "", 1)
-        outFile.mkdir(self.physObjType)
-        outDirPhysObj = outFile.GetDirectory(self.physObjType)
+        outDirPhysObj = PhysObjHistos.writeDirectory(self,directory)
 
         for lvl in selLevels:
-            outDirPhysObj.mkdir(lvl)
-            dirSelLevel = outDirPhysObj.GetDirectory(lvl)
+            dirSelLevel = getOrMakeDirectory(outDirPhysObj, lvl)
             
-            dirSelLevel.mkdir("Identification")
-            dirId = dirSelLevel.GetDirectory("Identification")
+            dirId = getOrMakeDirectory(dirSelLevel, "Identification")
             self.dict_histosId[lvl].write(dirId)
 
-            dirSelLevel.mkdir("Isolation")
-            dirIso = dirSelLevel.GetDirectory("Isolation")
+            dirIso = getOrMakeDirectory(dirSelLevel, "Isolation")
             self.dict_histosIso[lvl].write(dirIso)
 
-        outFile.Close()
+        return outDirPhysObj
+
+    def add(self, other):
+        """
+        Adds the contents of the histograms of other to the histograms of self
+
+        other - MuonHistos with the same binning
+        """
+
+        PhysObjHistos.add(self,other)
+
+        for lvl in selLevels:
+            self.dict_histosId[lvl].add(other.dict_histosId[lvl])
+            self.dict_histosIso[lvl].add(other.dict_histosIso[lvl])
+
+        return
+
+    def flush(self):
+        """
+        Fills all buffered values into the histograms, see setFillBuffer
+        """
+
+        PhysObjHistos.flush(self)
+
+        for lvl in selLevels:
+            self.dict_histosId[lvl].flush()
+            self.dict_histosIso[lvl].flush()
+
+        return
+
+    def setFillBuffer(self, bufferSize=None):
+        """
+        Buffers the values given to Fill() in numpy arrays which are filled in
+        bulk, if bufferSize is None the buffers are flushed and removed
+
+        bufferSize - number of values held before a buffer is flushed
+        """
+
+        PhysObjHistos.setFillBuffer(self, bufferSize)
+
+        for lvl in selLevels:
+            self.dict_histosId[lvl].setFillBuffer(bufferSize)
+            self.dict_histosIso[lvl].setFillBuffer(bufferSize)
 
         return
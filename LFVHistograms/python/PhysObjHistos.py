@@ -3,6 +3,18 @@ from LFVAnalysis.LFVHistograms.kinematicHistos import *
 from LFVAnalysis.LFVHistograms.isolationHistos import *
 from LFVAnalysis.LFVUtilities.utilities import selLevels
 
+def getOrMakeDirectory(parent, name):
+    """
+    Returns the subdirectory name of the TDirectory parent, it is created
+    if it does not exist yet
+    """
+
+    directory = parent.GetDirectory(name)
+    if not directory:
+        directory = parent.mkdir(name)
+
+    return directory
+
 class PhysObjHistos:
     def __init__(self, pdgId, name=None, mcType=None):
         """
@@ -34,24 +46,70 @@ class PhysObjHistos:
 
         return
 
-    def write(self, filename, option="RECREATE"):
+    def write(self, filename, option="RECREATE", compress=1):
         """
         Creates a TFile using TOption option
         Writes all stored histograms to this TFile
+
+        compress - compression settings of the TFile, see TFile::SetCompressionSettings
         """
         
-        outFile = r.TFile(filename, option, "", 1)
-        outFile.mkdir(self.physObjType)
-        outDirPhysObj = outFile.GetDirectory(self.physObjType)
+        outFile = r.TFile(filename, option, "", compress)
+        self.writeDirectory(outFile)
+        outFile.Close()
+
+        return
+
+    def writeDirectory(self, directory):
+        """
+        Writes all stored histograms to the physics object directory
+        found in, or created in, directory
+
+        directory - TDirectory, e.g. an open TFile, histograms should be written too
+        """
+
+        outDirPhysObj = getOrMakeDirectory(directory, self.physObjType)
 
         for lvl in selLevels:
-            outDirPhysObj.mkdir(lvl)
-            dirSelLevel = outDirPhysObj.GetDirectory(lvl)
+            dirSelLevel = getOrMakeDirectory(outDirPhysObj, lvl)
             
-            dirSelLevel.mkdir("Kinematics")
-            dirKin = dirSelLevel.GetDirectory("Kinematics")
+            dirKin = getOrMakeDirectory(dirSelLevel, "Kinematics")
             self.dict_histosKin[lvl].write(dirKin)
 
-        outFile.Close()
+        return outDirPhysObj
+
+    def add(self, other):
+        """
+        Adds the contents of the histograms of other to the histograms of self,
+        e.g. to merge the partial results of several analysis jobs
+
+        other - PhysObjHistos of the same type with the same binning
+        """
+
+        for lvl in selLevels:
+            self.dict_histosKin[lvl].add(other.dict_histosKin[lvl])
+
+        return
+
+    def flush(self):
+        """
+        Fills all buffered values into the histograms, see setFillBuffer
+        """
+
+        for lvl in selLevels:
+            self.dict_histosKin[lvl].flush()
+
+        return
+
+    def setFillBuffer(self, bufferSize=None):
+        """
+        Buffers the values given to Fill() in numpy arrays which are filled in
+        bulk, if bufferSize is None the buffers are flushed and removed
+
+        bufferSize - number of values held before a buffer is flushed
+        """
+
+        for lvl in selLevels:
+            self.dict_histosKin[lvl].setFillBuffer(bufferSize)
 
         return
@@ -0,0 +1,134 @@
+import numpy as np
+
+class fillBuffer:
+    def __init__(self, histo, bufferSize=1000):
+        """
+        Wraps a TH1 or TH2 and accumulates the values given to Fill() in
+        preallocated numpy arrays, they are passed to the histogram with a
+        single FillN() call once the buffer is full or flush() is called.
+        Any other attribute is forwarded to the wrapped histogram after the
+        buffer has been flushed.
+
+        histo       - TH1 or TH2 to be filled
+        bufferSize  - number of values held before the buffer is flushed
+        """
+
+        self.histo = histo
+        self.bufferSize = bufferSize
+        self.numVals = 0
+
+        self.is2D = (histo.GetDimension() == 2)
+        self.xVals = np.zeros(bufferSize, dtype=np.float64)
+        self.yVals = None
+        if self.is2D:
+            self.yVals = np.zeros(bufferSize, dtype=np.float64)
+        self.weights = np.ones(bufferSize, dtype=np.float64)
+
+        return
+
+    def __getattr__(self, name):
+        # Only reached for attributes not found on the buffer itself
+        if name.startswith("__") or "histo" not in self.__dict__:
+            raise AttributeError(name)
+
+        self.flush()
+        return getattr(self.histo, name)
+
+    def Add(self, other, c1=1):
+        """
+        Flushes the buffer then adds other to the wrapped histogram
+
+        other   - TH1, TH2 or fillBuffer to add
+        c1      - scale factor applied to other
+        """
+
+        self.flush()
+        if isinstance(other, fillBuffer):
+            other.flush()
+            other = other.histo
+
+        return self.histo.Add(other, c1)
+
+    def Fill(self, x, y=None):
+        """
+        Buffers one entry, y is only used if the wrapped histogram is a TH2
+        """
+
+        self.xVals[self.numVals] = x
+        if self.is2D:
+            self.yVals[self.numVals] = y
+        self.numVals += 1
+
+        if self.numVals == self.bufferSize:
+            self.flush()
+
+        return
+
+    def flush(self):
+        """
+        Fills all buffered entries into the wrapped histogram
+        """
+
+        if self.numVals == 0:
+            return
+
+        if self.is2D:
+            self.histo.FillN(self.numVals, self.xVals, self.yVals, self.weights)
+        else:
+            self.histo.FillN(self.numVals, self.xVals, self.weights)
+        self.numVals = 0
+
+        return
+
+    def Write(self, *args):
+        """
+        Flushes the buffer then writes the wrapped histogram
+        """
+
+        self.flush()
+        return self.histo.Write(*args)
+
+def wrapHistos(dict_histos, listOfKeys, bufferSize=1000):
+    """
+    Replaces each histogram dict_histos[key] by a fillBuffer wrapping it
+
+    dict_histos - dictionary holding histograms, e.g. the __dict__ of a histogram container
+    listOfKeys  - keys of the histograms in dict_histos to be wrapped
+    bufferSize  - number of values held before a buffer is flushed
+    """
+
+    for key in listOfKeys:
+        if not isinstance(dict_histos[key], fillBuffer):
+            dict_histos[key] = fillBuffer(dict_histos[key], bufferSize)
+
+    return
+
+def flushHistos(dict_histos, listOfKeys):
+    """
+    Flushes each fillBuffer dict_histos[key]
+
+    dict_histos - dictionary holding histograms or fillBuffers
+    listOfKeys  - keys of the histograms in dict_histos to be flushed
+    """
+
+    for key in listOfKeys:
+        if isinstance(dict_histos[key], fillBuffer):
+            dict_histos[key].flush()
+
+    return
+
+def unwrapHistos(dict_histos, listOfKeys):
+    """
+    Flushes each fillBuffer dict_histos[key] and replaces it by the
+    histogram it wraps
+
+    dict_histos - dictionary holding histograms or fillBuffers
+    listOfKeys  - keys of the histograms in dict_histos to be unwrapped
+    """
+
+    for key in listOfKeys:
+        if isinstance(dict_histos[key], fillBuffer):
+            dict_histos[key].flush()
+            dict_histos[key] = dict_histos[key].histo
+
+    return
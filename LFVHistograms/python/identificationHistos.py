@@ -1,4 +1,13 @@
-import ROOT as r
+from LFVAnalysis.LFVHistograms.fillBuffer import flushHistos, unwrapHistos, wrapHistos
+from LFVAnalysis.LFVHistograms.numpyHisto import bookTH1
+
+# Names of the histograms held by identificationHistos
+idHistoNames = [
+        "idLabel",
+        "dxy",
+        "dz",
+        "normChi2"
+        ]
 
 class identificationHistos:
     def __init__(self, listIdLabels, physObj="mu", selLevel="all", mcType=None):
@@ -14,25 +23,25 @@ class identificationHistos:
             prefix = "h_%s"%mcType
 
         # Make the label histogram and set the labels
-        self.idLabel = r.TH1F("%s_%s_idLabel_%s"%(prefix,physObj,selLevel),
-                              "%s Id Label - %s"%(physObj, selLevel), 
-                              len(listIdLabels),0.5,len(listIdLabels)+0.5
-                              )
+        self.idLabel = bookTH1("%s_%s_idLabel_%s"%(prefix,physObj,selLevel),
+                               "%s Id Label - %s"%(physObj, selLevel), 
+                               len(listIdLabels),0.5,len(listIdLabels)+0.5
+                               )
         for binX,label in enumerate(listIdLabels):
             self.idLabel.GetXaxis().SetBinLabel(binX+1,label)
 
         # Make impact parameter histograms
-        self.dxy = r.TH1F("%s_%s_dxy_%s"%(prefix,physObj,selLevel),
-                          "%s d_{xy} - %s"%(physObj, selLevel),
-                          100,-0.5,9.5)
-        self.dz = r.TH1F("%s_%s_dz_%s"%(prefix,physObj,selLevel),
+        self.dxy = bookTH1("%s_%s_dxy_%s"%(prefix,physObj,selLevel),
+                           "%s d_{xy} - %s"%(physObj, selLevel),
+                           100,-0.5,9.5)
+        self.dz = bookTH1("%s_%s_dz_%s"%(prefix,physObj,selLevel),
                           "%s d_{z} - %s"%(physObj, selLevel),
                           210,-10.5,10.5)
 
         # Make track fit histograms (not always relevant)
-        self.normChi2 = r.TH1F("%s_%s_normChi2_%s"%(prefix,physObj,selLevel),
-                               "%s #chi^{2}/NDF - %s"%(physObj, selLevel),
-                               100,-0.5,99.5)
+        self.normChi2 = bookTH1("%s_%s_normChi2_%s"%(prefix,physObj,selLevel),
+                                "%s #chi^{2}/NDF - %s"%(physObj, selLevel),
+                                100,-0.5,99.5)
 
         return
     
@@ -49,3 +58,41 @@ class identificationHistos:
         self.normChi2.Write()
 
         return
+
+    def add(self, other):
+        """
+        Adds the contents of the histograms of other to the histograms of self
+
+        other - identificationHistos with the same binning
+        """
+
+        self.idLabel.Add(other.idLabel)
+        self.dxy.Add(other.dxy)
+        self.dz.Add(other.dz)
+        self.normChi2.Add(other.normChi2)
+
+        return
+
+    def flush(self):
+        """
+        Fills all buffered values into the histograms, see setFillBuffer
+        """
+
+        flushHistos(self.__dict__, idHistoNames)
+
+        return
+
+    def setFillBuffer(self, bufferSize=None):
+        """
+        Buffers the values given to Fill() in numpy arrays which are filled in
+        bulk, if bufferSize is None the buffers are flushed and removed
+
+        bufferSize - number of values held before a buffer is flushed
+        """
+
+        if bufferSize is None:
+            unwrapHistos(self.__dict__, idHistoNames)
+        else:
+            wrapHistos(self.__dict__, idHistoNames, bufferSize)
+
+        return
@@ -24,3 +24,14 @@ class isolationHistos:
         # Write Histos
 
         return
+
+    def add(self, other):
+        """
+        Adds the contents of the histograms of other to the histograms of self
+
+        other - isolationHistos with the same binning
+        """
+
+        # Add Histos
+
+        return
@@ -1,4 +1,16 @@
-import ROOT as r
+from LFVAnalysis.LFVHistograms.fillBuffer import flushHistos, unwrapHistos, wrapHistos
+from LFVAnalysis.LFVHistograms.numpyHisto import bookTH1
+
+# Names of the histograms held by kinematicHistos
+kinHistoNames = [
+        "charge",
+        "energy",
+        "eta",
+        "mass",
+        "multi",
+        "pt",
+        "pz"
+        ]
 
 class kinematicHistos:
     def __init__(self, physObj="mu", selLevel="all", mcType=None):
@@ -12,13 +24,13 @@ class kinematicHistos:
         if mcType is not None:
             prefix = "h_%s"%mcType
         
-        self.charge = r.TH1F("%s_%s_charge_%s"%(prefix,physObj,selLevel),"%s charge - %s"%(physObj, selLevel), 5,-2.5,2.5)
-        self.energy = r.TH1F("%s_%s_energy_%s"%(prefix,physObj,selLevel),"%s E - %s"%(physObj, selLevel), 300,-0.5,2999.5)
-        self.eta = r.TH1F("%s_%s_eta_%s"%(prefix,physObj,selLevel),"%s eta - %s"%(physObj, selLevel), 49,-2.45,2.45)
-        self.mass = r.TH1F("%s_%s_mass_%s"%(prefix,physObj,selLevel),"%s mass - %s"%(physObj, selLevel), 700,-0.5,6999.5)
-        self.multi = r.TH1F("%s_%s_multi_%s"%(prefix,physObj,selLevel),"%s multiplicity - %s"%(physObj, selLevel), 30,-0.5,29.5)
-        self.pt = r.TH1F("%s_%s_pt_%s"%(prefix,physObj,selLevel),"%s p_{T} - %s"%(physObj, selLevel), 300,-0.5,2999.5)
-        self.pz = r.TH1F("%s_%s_pz_%s"%(prefix,physObj,selLevel),"%s p_{Z} - %s"%(physObj, selLevel), 400,-2000.5,1999.5)
+        self.charge = bookTH1("%s_%s_charge_%s"%(prefix,physObj,selLevel),"%s charge - %s"%(physObj, selLevel), 5,-2.5,2.5)
+        self.energy = bookTH1("%s_%s_energy_%s"%(prefix,physObj,selLevel),"%s E - %s"%(physObj, selLevel), 300,-0.5,2999.5)
+        self.eta = bookTH1("%s_%s_eta_%s"%(prefix,physObj,selLevel),"%s eta - %s"%(physObj, selLevel), 49,-2.45,2.45)
+        self.mass = bookTH1("%s_%s_mass_%s"%(prefix,physObj,selLevel),"%s mass - %s"%(physObj, selLevel), 700,-0.5,6999.5)
+        self.multi = bookTH1("%s_%s_multi_%s"%(prefix,physObj,selLevel),"%s multiplicity - %s"%(physObj, selLevel), 30,-0.5,29.5)
+        self.pt = bookTH1("%s_%s_pt_%s"%(prefix,physObj,selLevel),"%s p_{T} - %s"%(physObj, selLevel), 300,-0.5,2999.5)
+        self.pz = bookTH1("%s_%s_pz_%s"%(prefix,physObj,selLevel),"%s p_{Z} - %s"%(physObj, selLevel), 400,-2000.5,1999.5)
 
         return
 
@@ -38,3 +50,44 @@ class kinematicHistos:
         self.pz.Write()
 
         return
+
+    def add(self, other):
+        """
+        Adds the contents of the histograms of other to the histograms of self
+
+        other - kinematicHistos with the same binning
+        """
+
+        self.charge.Add(other.charge)
+        self.energy.Add(other.energy)
+        self.eta.Add(other.eta)
+        self.mass.Add(other.mass)
+        self.multi.Add(other.multi)
+        self.pt.Add(other.pt)
+        self.pz.Add(other.pz)
+
+        return
+
+    def flush(self):
+        """
+        Fills all buffered values into the histograms, see setFillBuffer
+        """
+
+        flushHistos(self.__dict__, kinHistoNames)
+
+        return
+
+    def setFillBuffer(self, bufferSize=None):
+        """
+        Buffers the values given to Fill() in numpy arrays which are filled in
+        bulk, if bufferSize is None the buffers are flushed and removed
+
+        bufferSize - number of values held before a buffer is flushed
+        """
+
+        if bufferSize is None:
+            unwrapHistos(self.__dict__, kinHistoNames)
+        else:
+            wrapHistos(self.__dict__, kinHistoNames, bufferSize)
+
+        return
@@ -0,0 +1,441 @@
+import numpy as np
+import os
+import ROOT as r
+
+# Supported histogram backends, see setHistoBackend
+histoBackends = (
+        "numpy",    # numpyTH1 and numpyTH2, converted to TH1F and TH2F by Write()
+        "root"      # TH1F and TH2F
+        )
+
+# Backend of the histograms booked by bookTH1 and bookTH2
+histoBackend = "root"
+
+def getHistoBackend():
+    """
+    Returns the backend of the histograms booked by bookTH1 and bookTH2
+    """
+
+    return histoBackend
+
+def setHistoBackend(backend):
+    """
+    Sets the backend of the histograms booked by bookTH1 and bookTH2,
+    histograms booked before are not changed
+
+    backend - an entry of histoBackends
+    """
+
+    global histoBackend
+
+    if backend not in histoBackends:
+        print "Histogram backend %s not understood"%backend
+        print "The list of supported backends is:"
+        print ""
+        print histoBackends
+        print ""
+        print "exiting"
+        exit(os.EX_USAGE)
+
+    histoBackend = backend
+
+    return
+
+def bookTH1(name, title, nBinsX, xLow, xHigh):
+    """
+    Returns a TH1F or a numpyTH1, depending on the current backend, with the
+    given name, title and binning, see setHistoBackend
+    """
+
+    if histoBackend == "numpy":
+        return numpyTH1(name, title, nBinsX, xLow, xHigh)
+
+    return r.TH1F(name, title, nBinsX, xLow, xHigh)
+
+def bookTH2(name, title, nBinsX, xLow, xHigh, nBinsY, yLow, yHigh):
+    """
+    Returns a TH2F or a numpyTH2, depending on the current backend, with the
+    given name, title and binning, see setHistoBackend
+    """
+
+    if histoBackend == "numpy":
+        return numpyTH2(name, title, nBinsX, xLow, xHigh, nBinsY, yLow, yHigh)
+
+    return r.TH2F(name, title, nBinsX, xLow, xHigh, nBinsY, yLow, yHigh)
+
+def findFixBin(val, nBins, low, high):
+    """
+    Returns the bin of val on a fixed axis, 0 for underflow and nBins+1 for
+    overflow, see TAxis::FindFixBin
+    """
+
+    if val < low:
+        return 0
+    if not (val < high):
+        return nBins + 1
+
+    return int(nBins * (val - low) / (high - low)) + 1
+
+def findFixBins(vals, nBins, low, high):
+    """
+    Returns the numpy array of the bins of the numpy array vals, see findFixBin
+    """
+
+    bins = np.zeros(len(vals), dtype=np.int64)
+    with np.errstate(invalid="ignore"): # NaN goes to the overflow bin
+        inRange = (vals >= low) & (vals < high)
+        bins[~inRange & ~(vals < low)] = nBins + 1
+    bins[inRange] = (nBins * (vals[inRange] - low) / (high - low)).astype(np.int64) + 1
+
+    return bins
+
+class numpyAxis:
+    def __init__(self, nBins, low, high):
+        """
+        Fixed binning of a numpyTH1 or numpyTH2, holds the bin labels
+
+        nBins   - number of bins
+        low     - lower edge of the first bin
+        high    - upper edge of the last bin
+        """
+
+        self.nBins = nBins
+        self.low = float(low)
+        self.high = float(high)
+        self.dict_labels = {}
+
+        return
+
+    def SetBinLabel(self, iBin, label):
+        self.dict_labels[iBin] = label
+        return
+
+    def setLabels(self, axis):
+        """
+        Sets the bin labels of this axis on the TAxis axis
+        """
+
+        for iBin,label in sorted(self.dict_labels.iteritems()):
+            axis.SetBinLabel(iBin, label)
+
+        return
+
+class numpyTH1:
+    def __init__(self, name, title, nBinsX, xLow, xHigh):
+        """
+        One dimensional histogram with fixed binning holding the sum of
+        weights and of squared weights of every bin, including the under-
+        and overflow bins, in numpy arrays.  Fill(), FillN() and Add() follow
+        TH1 including the statistics, histograms are added with + as well.
+        Write() writes a TH1F with the same name, title and contents, no ROOT
+        object exists before.
+
+        name    - name of the histogram
+        title   - title of the histogram
+        nBinsX  - number of bins
+        xLow    - lower edge of the first bin
+        xHigh   - upper edge of the last bin
+        """
+
+        self.name = name
+        self.title = title
+        self.xAxis = numpyAxis(nBinsX, xLow, xHigh)
+
+        self.sumw = np.zeros(nBinsX + 2, dtype=np.float64)
+        self.sumw2 = np.zeros(nBinsX + 2, dtype=np.float64)
+
+        # Statistics as in TH1::GetStats, only filled by in range entries
+        self.entries = 0.
+        self.stats = [ 0., 0., 0., 0. ] # sumw, sumw2, sumwx, sumwx2
+
+        return
+
+    def __add__(self, other):
+        histo = numpyTH1(self.name, self.title, self.xAxis.nBins, self.xAxis.low, self.xAxis.high)
+        histo.xAxis.dict_labels.update(self.xAxis.dict_labels)
+        histo.Add(self)
+        histo.Add(other)
+        return histo
+
+    def __iadd__(self, other):
+        self.Add(other)
+        return self
+
+    def GetDimension(self):
+        return 1
+
+    def GetEntries(self):
+        return self.entries
+
+    def GetName(self):
+        return self.name
+
+    def GetTitle(self):
+        return self.title
+
+    def GetXaxis(self):
+        return self.xAxis
+
+    def GetBinContent(self, iBin):
+        return self.sumw[iBin]
+
+    def Fill(self, x, w=1.):
+        """
+        Fills x with weight w
+        """
+
+        iBin = findFixBin(x, self.xAxis.nBins, self.xAxis.low, self.xAxis.high)
+        self.sumw[iBin] += w
+        self.sumw2[iBin] += w * w
+        self.entries += 1
+
+        if 0 < iBin <= self.xAxis.nBins:
+            self.stats[0] += w
+            self.stats[1] += w * w
+            self.stats[2] += w * x
+            self.stats[3] += w * x * x
+
+        return iBin
+
+    def FillN(self, numVals, xVals, weights=None, stride=1):
+        """
+        Fills the first numVals values of xVals, see TH1::FillN
+
+        numVals - number of values to fill
+        xVals   - array of values
+        weights - array of weights, None for unit weights
+        stride  - fill every stride^th value only
+        """
+
+        xVals = np.asarray(xVals, dtype=np.float64)[:numVals:stride]
+        if weights is None:
+            weights = np.ones(len(xVals), dtype=np.float64)
+        else:
+            weights = np.asarray(weights, dtype=np.float64)[:numVals:stride]
+
+        bins = findFixBins(xVals, self.xAxis.nBins, self.xAxis.low, self.xAxis.high)
+        self.sumw += np.bincount(bins, weights=weights, minlength=len(self.sumw))
+        self.sumw2 += np.bincount(bins, weights=weights*weights, minlength=len(self.sumw2))
+        self.entries += len(xVals)
+
+        inRange = (bins > 0) & (bins <= self.xAxis.nBins)
+        w = weights[inRange]
+        x = xVals[inRange]
+        for idx,val in enumerate(( w.sum(), (w*w).sum(), (w*x).sum(), (w*x*x).sum() )):
+            self.stats[idx] += val
+
+        return
+
+    def Add(self, other, c1=1.):
+        """
+        Adds c1 times the contents of the numpyTH1 other, with the same binning
+        """
+
+        self.sumw += c1 * other.sumw
+        self.sumw2 += c1 * c1 * other.sumw2
+        self.entries += other.entries
+        for idx,val in enumerate(other.stats):
+            self.stats[idx] += c1 * val
+
+        return
+
+    def toTH1F(self):
+        """
+        Returns a TH1F holding the contents and statistics of this histogram,
+        the TH1F is not attached to any directory
+        """
+
+        histo = r.TH1F(self.name, self.title, self.xAxis.nBins, self.xAxis.low, self.xAxis.high)
+        histo.SetDirectory(0)
+        self.xAxis.setLabels(histo.GetXaxis())
+        fillROOTHisto(histo, self.sumw, self.sumw2, self.stats, self.entries)
+
+        return histo
+
+    def Write(self, *args):
+        """
+        Writes the equivalent TH1F to the current directory
+        """
+
+        return self.toTH1F().Write(*args)
+
+class numpyTH2:
+    def __init__(self, name, title, nBinsX, xLow, xHigh, nBinsY, yLow, yHigh):
+        """
+        Two dimensional counterpart of numpyTH1, the bins are stored by global
+        bin number, see TH1::GetBin.  Write() writes a TH2F.
+
+        name    - name of the histogram
+        title   - title of the histogram
+        nBinsX  - number of bins along x
+        xLow    - lower edge of the first bin along x
+        xHigh   - upper edge of the last bin along x
+        nBinsY  - number of bins along y
+        yLow    - lower edge of the first bin along y
+        yHigh   - upper edge of the last bin along y
+        """
+
+        self.name = name
+        self.title = title
+        self.xAxis = numpyAxis(nBinsX, xLow, xHigh)
+        self.yAxis = numpyAxis(nBinsY, yLow, yHigh)
+
+        self.sumw = np.zeros((nBinsX + 2) * (nBinsY + 2), dtype=np.float64)
+        self.sumw2 = np.zeros((nBinsX + 2) * (nBinsY + 2), dtype=np.float64)
+
+        # Statistics as in TH2::GetStats, only filled by in range entries
+        self.entries = 0.
+        self.stats = [ 0., 0., 0., 0., 0., 0., 0. ] # sumw, sumw2, sumwx, sumwx2, sumwy, sumwy2, sumwxy
+
+        return
+
+    def __add__(self, other):
+        histo = numpyTH2(self.name, self.title, self.xAxis.nBins, self.xAxis.low, self.xAxis.high, self.yAxis.nBins, self.yAxis.low, self.yAxis.high)
+        histo.xAxis.dict_labels.update(self.xAxis.dict_labels)
+        histo.yAxis.dict_labels.update(self.yAxis.dict_labels)
+        histo.Add(self)
+        histo.Add(other)
+        return histo
+
+    def __iadd__(self, other):
+        self.Add(other)
+        return self
+
+    def GetDimension(self):
+        return 2
+
+    def GetEntries(self):
+        return self.entries
+
+    def GetName(self):
+        return self.name
+
+    def GetTitle(self):
+        return self.title
+
+    def GetXaxis(self):
+        return self.xAxis
+
+    def GetYaxis(self):
+        return self.yAxis
+
+    def GetBin(self, binX, binY):
+        return binX + (self.xAxis.nBins + 2) * binY
+
+    def GetBinContent(self, binX, binY=0):
+        return self.sumw[self.GetBin(binX, binY)]
+
+    def Fill(self, x, y, w=1.):
+        """
+        Fills (x, y) with weight w
+        """
+
+        binX = findFixBin(x, self.xAxis.nBins, self.xAxis.low, self.xAxis.high)
+        binY = findFixBin(y, self.yAxis.nBins, self.yAxis.low, self.yAxis.high)
+        iBin = self.GetBin(binX, binY)
+        self.sumw[iBin] += w
+        self.sumw2[iBin] += w * w
+        self.entries += 1
+
+        if 0 < binX <= self.xAxis.nBins and 0 < binY <= self.yAxis.nBins:
+            self.stats[0] += w
+            self.stats[1] += w * w
+            self.stats[2] += w * x
+            self.stats[3] += w * x * x
+            self.stats[4] += w * y
+            self.stats[5] += w * y * y
+            self.stats[6] += w * x * y
+
+        return iBin
+
+    def FillN(self, numVals, xVals, yVals, weights=None, stride=1):
+        """
+        Fills the first numVals values of xVals and yVals, see TH2::FillN
+
+        numVals - number of values to fill
+        xVals   - array of x values
+        yVals   - array of y values
+        weights - array of weights, None for unit weights
+        stride  - fill every stride^th value only
+        """
+
+        xVals = np.asarray(xVals, dtype=np.float64)[:numVals:stride]
+        yVals = np.asarray(yVals, dtype=np.float64)[:numVals:stride]
+        if weights is None:
+            weights = np.ones(len(xVals), dtype=np.float64)
+        else:
+            weights = np.asarray(weights, dtype=np.float64)[:numVals:stride]
+
+        binsX = findFixBins(xVals, self.xAxis.nBins, self.xAxis.low, self.xAxis.high)
+        binsY = findFixBins(yVals, self.yAxis.nBins, self.yAxis.low, self.yAxis.high)
+        bins = self.GetBin(binsX, binsY)
+        self.sumw += np.bincount(bins, weights=weights, minlength=len(self.sumw))
+        self.sumw2 += np.bincount(bins, weights=weights*weights, minlength=len(self.sumw2))
+        self.entries += len(xVals)
+
+        inRange = (binsX > 0) & (binsX <= self.xAxis.nBins) & (binsY > 0) & (binsY <= self.yAxis.nBins)
+        w = weights[inRange]
+        x = xVals[inRange]
+        y = yVals[inRange]
+        for idx,val in enumerate(( w.sum(), (w*w).sum(), (w*x).sum(), (w*x*x).sum(), (w*y).sum(), (w*y*y).sum(), (w*x*y).sum() )):
+            self.stats[idx] += val
+
+        return
+
+    def Add(self, other, c1=1.):
+        """
+        Adds c1 times the contents of the numpyTH2 other, with the same binning
+        """
+
+        self.sumw += c1 * other.sumw
+        self.sumw2 += c1 * c1 * other.sumw2
+        self.entries += other.entries
+        for idx,val in enumerate(other.stats):
+            self.stats[idx] += c1 * val
+
+        return
+
+    def toTH2F(self):
+        """
+        Returns a TH2F holding the contents and statistics of this histogram,
+        the TH2F is not attached to any directory
+        """
+
+        histo = r.TH2F(self.name, self.title, self.xAxis.nBins, self.xAxis.low, self.xAxis.high, self.yAxis.nBins, self.yAxis.low, self.yAxis.high)
+        histo.SetDirectory(0)
+        self.xAxis.setLabels(histo.GetXaxis())
+        self.yAxis.setLabels(histo.GetYaxis())
+        fillROOTHisto(histo, self.sumw, self.sumw2, self.stats, self.entries)
+
+        return histo
+
+    def Write(self, *args):
+        """
+        Writes the equivalent TH2F to the current directory
+        """
+
+        return self.toTH2F().Write(*args)
+
+def fillROOTHisto(histo, sumw, sumw2, stats, entries):
+    """
+    Sets the contents, errors and statistics of the empty TH1 histo
+
+    histo   - TH1F or TH2F with the binning of sumw
+    sumw    - numpy array of the sum of weights of every global bin
+    sumw2   - numpy array of the sum of squared weights of every global bin
+    stats   - list of statistics, see TH1::PutStats
+    entries - number of entries
+    """
+
+    histo.SetContent(sumw)
+
+    # Errors only differ from sqrt(content) for non unit weights
+    if not np.array_equal(sumw, sumw2):
+        histo.Sumw2()
+        histo.GetSumw2().Set(len(sumw2), sumw2)
+
+    # SetContent resets the statistics
+    histo.PutStats(np.array(stats, dtype=np.float64))
+    histo.SetEntries(entries)
+
+    return
@@ -0,0 +1,180 @@
+from LFVAnalysis.LFVHistograms.numpyHisto import findFixBin, findFixBins
+
+import numpy as np
+import ROOT as r
+
+class sparseTH2:
+    def __init__(self, name, title, nBinsX, xLow, xHigh, nBinsY, yLow, yHigh):
+        """
+        Two dimensional histogram with fixed binning which only stores the
+        populated bins.  Fill(), FillN() and Add() follow TH2, including the
+        under- and overflow bins and the statistics, Write() writes a TH2F
+        which is identical to a TH2F filled with the same values.  Use for
+        large, mostly empty, histograms, e.g. response matrices.
+
+        name    - name of the histogram
+        title   - title of the histogram
+        nBinsX  - number of bins along x
+        xLow    - lower edge of the first bin along x
+        xHigh   - upper edge of the last bin along x
+        nBinsY  - number of bins along y
+        yLow    - lower edge of the first bin along y
+        yHigh   - upper edge of the last bin along y
+        """
+
+        self.name = name
+        self.title = title
+        self.nBinsX = nBinsX
+        self.xLow = float(xLow)
+        self.xHigh = float(xHigh)
+        self.nBinsY = nBinsY
+        self.yLow = float(yLow)
+        self.yHigh = float(yHigh)
+
+        self.dict_bins = {} # global bin -> [sum of weights, sum of squared weights]
+
+        # Statistics as in TH2::GetStats, only filled by in range entries
+        self.entries = 0.
+        self.stats = np.zeros(7, dtype=np.float64) # sumw, sumw2, sumwx, sumwx2, sumwy, sumwy2, sumwxy
+
+        return
+
+    def FindBin(self, x, y):
+        """
+        Returns the global bin of (x, y), see TH1::GetBin
+        """
+
+        return findFixBin(x, self.nBinsX, self.xLow, self.xHigh) + (self.nBinsX + 2) * findFixBin(y, self.nBinsY, self.yLow, self.yHigh)
+
+    def findBins(self, xVals, yVals):
+        """
+        Returns the tuple (globalBins, inRange) of numpy arrays, inRange is True
+        for values which are neither in an under- nor an overflow bin
+
+        xVals - numpy array of x values
+        yVals - numpy array of y values
+        """
+
+        binX = findFixBins(xVals, self.nBinsX, self.xLow, self.xHigh)
+        binY = findFixBins(yVals, self.nBinsY, self.yLow, self.yHigh)
+
+        inRange = (binX > 0) & (binX <= self.nBinsX) & (binY > 0) & (binY <= self.nBinsY)
+
+        return (binX + (self.nBinsX + 2) * binY, inRange)
+
+    def GetDimension(self):
+        return 2
+
+    def GetEntries(self):
+        return self.entries
+
+    def GetName(self):
+        return self.name
+
+    def GetNumberOfPopulatedBins(self):
+        return len(self.dict_bins)
+
+    def Fill(self, x, y, w=1.):
+        """
+        Fills (x, y) with weight w, use FillN() for buffered values
+        """
+
+        binX = findFixBin(x, self.nBinsX, self.xLow, self.xHigh)
+        binY = findFixBin(y, self.nBinsY, self.yLow, self.yHigh)
+        globalBin = binX + (self.nBinsX + 2) * binY
+
+        if globalBin not in self.dict_bins:
+            self.dict_bins[globalBin] = [0., 0.]
+        self.dict_bins[globalBin][0] += w
+        self.dict_bins[globalBin][1] += w * w
+
+        self.entries += 1
+        if 0 < binX <= self.nBinsX and 0 < binY <= self.nBinsY:
+            self.stats += (w, w*w, w*x, w*x*x, w*y, w*y*y, w*x*y)
+
+        return
+
+    def FillN(self, numVals, xVals, yVals, weights=None, stride=1):
+        """
+        Fills the first numVals values of xVals and yVals, see TH2::FillN
+
+        numVals - number of values to fill
+        xVals   - array of x values
+        yVals   - array of y values
+        weights - array of weights, None for unit weights
+        stride  - fill every stride^th value only
+        """
+
+        xVals = np.asarray(xVals, dtype=np.float64)[:numVals:stride]
+        yVals = np.asarray(yVals, dtype=np.float64)[:numVals:stride]
+        if weights is None:
+            weights = np.ones(len(xVals), dtype=np.float64)
+        else:
+            weights = np.asarray(weights, dtype=np.float64)[:numVals:stride]
+
+        globalBins, inRange = self.findBins(xVals, yVals)
+
+        listOfBins, inverse = np.unique(globalBins, return_inverse=True)
+        sumw = np.bincount(inverse, weights=weights)
+        sumw2 = np.bincount(inverse, weights=weights*weights)
+        for idx,globalBin in enumerate(listOfBins.tolist()):
+            if globalBin not in self.dict_bins:
+                self.dict_bins[globalBin] = [0., 0.]
+            self.dict_bins[globalBin][0] += sumw[idx]
+            self.dict_bins[globalBin][1] += sumw2[idx]
+
+        self.entries += len(xVals)
+
+        w = weights[inRange]
+        x = xVals[inRange]
+        y = yVals[inRange]
+        self.stats += (w.sum(), (w*w).sum(), (w*x).sum(), (w*x*x).sum(), (w*y).sum(), (w*y*y).sum(), (w*x*y).sum())
+
+        return
+
+    def Add(self, other, c1=1.):
+        """
+        Adds c1 times the contents of the sparseTH2 other, with the same binning
+        """
+
+        for globalBin,(sumw,sumw2) in other.dict_bins.iteritems():
+            if globalBin not in self.dict_bins:
+                self.dict_bins[globalBin] = [0., 0.]
+            self.dict_bins[globalBin][0] += c1 * sumw
+            self.dict_bins[globalBin][1] += c1 * c1 * sumw2
+
+        self.entries += other.entries
+        self.stats += c1 * other.stats
+
+        return
+
+    def toTH2F(self):
+        """
+        Returns a TH2F holding the contents and statistics of this histogram,
+        the TH2F is not attached to any directory
+        """
+
+        histo = r.TH2F(self.name, self.title, self.nBinsX, self.xLow, self.xHigh, self.nBinsY, self.yLow, self.yHigh)
+        histo.SetDirectory(0)
+
+        # Errors only differ from sqrt(content) for non unit weights
+        if any( sumw != sumw2 for sumw,sumw2 in self.dict_bins.itervalues() ):
+            histo.Sumw2()
+
+        for globalBin,(sumw,sumw2) in self.dict_bins.iteritems():
+            histo.SetBinContent(globalBin, sumw)
+            if histo.GetSumw2N() > 0:
+                histo.GetSumw2().SetAt(sumw2, globalBin)
+
+        # SetBinContent resets the statistics
+        histo.PutStats(np.array(self.stats, dtype=np.float64))
+        histo.SetEntries(self.entries)
+
+        return histo
+
+    def Write(self, *args):
+        """
+        Writes the equivalent TH2F to the current directory
+        """
+
+        return self.toTH2F().Write(*args)
@@ -3,6 +3,8 @@ from LFVAnalysis.LFVObjects.physicsObject import *
 import ROOT as r
 
 class Electron(PhysObj):
+    __slots__ = ()
+
     def __init__(self, px, py, pz, E):
         PhysObj.__init__(self, px, py, pz, E, 11)
 
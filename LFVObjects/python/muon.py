@@ -3,6 +3,23 @@ from LFVAnalysis.LFVObjects.physicsObject import *
 import ROOT as r
 
 class Muon(PhysObj):
+    __slots__ = (
+            "isGlobal",
+            "isHighPt",
+            "isLoose",
+            "isMedium",
+            "isPF",
+            "isSoft",
+            "isStandAlone",
+            "isTight",
+            "isTracker",
+            "isoTrackerBased03",
+            "normChi2",
+            "numHitsPix",
+            "numHitsTrk",
+            "numMatchedMuStations"
+            )
+
     def __init__(self, px, py, pz, E):
         PhysObj.__init__(self, px, py, pz, E, 13)
 
@@ -1,6 +1,25 @@
+import math as m
 import ROOT as r
 
-class PhysObj:
+class PhysObj(object):
+    # The four-vector is stored as plain floats, derived quantities are
+    # computed on first access and cached until the four-vector changes
+    __slots__ = (
+            "charge",
+            "dxy",
+            "dz",
+            "pdgId",
+            "status",
+            "_px",
+            "_py",
+            "_pz",
+            "_E",
+            "_eta",
+            "_M",
+            "_phi",
+            "_pt"
+            )
+
     def __init__(self, px, py, pz, E, pdgId=-1, status=-1):
         # Electric Charge
         self.charge = -1e10 #electric charge of candidate
@@ -10,7 +29,7 @@ class PhysObj:
         self.dz = -1e10     #longitudinal impact parameter
 
         # Four Vector
-        self.fourVector = r.TLorentzVector(px, py, pz, E)
+        self.setPxPyPzE(px, py, pz, E)
 
         # Particle Id
         self.pdgId = pdgId
@@ -20,35 +39,95 @@ class PhysObj:
 
         return
 
+    @property
+    def fourVector(self):
+        """
+        Returns a new TLorentzVector holding the four-vector of this object,
+        modifying it does not modify this object
+        """
+
+        return r.TLorentzVector(self._px, self._py, self._pz, self._E)
+
     def setPxPyPzE(self, px, py, pz, E):
-        self.fourVector.SetPxPyPzE(px,py,pz,E)
+        self._px = float(px)
+        self._py = float(py)
+        self._pz = float(pz)
+        self._E = float(E)
+
+        # Invalidate cached quantities
+        self._eta = None
+        self._M = None
+        self._phi = None
+        self._pt = None
         return
 
     def setPtEtaPhiM(self, pt, eta, phi, M):
-        self.fourVector.SetPtEtaPhiM(pt, eta, phi, M)
+        # Follows TLorentzVector::SetPtEtaPhiM
+        pt = abs(pt)
+        px = pt * m.cos(phi)
+        py = pt * m.sin(phi)
+        pz = pt * m.sinh(eta)
+        if M >= 0:
+            E = m.sqrt(px*px + py*py + pz*pz + M*M)
+        else:
+            E = m.sqrt(max(px*px + py*py + pz*pz - M*M, 0))
+        self.setPxPyPzE(px, py, pz, E)
         return
 
     def setPtEtaPhiE(self, pt, eta, phi, E):
-        self.fourVector.SetPtEtaPhiE(pt, eta, phi, E)
+        # Follows TLorentzVector::SetPtEtaPhiE
+        pt = abs(pt)
+        self.setPxPyPzE(pt * m.cos(phi), pt * m.sin(phi), pt * m.sinh(eta), E)
         return
 
     def E(self):
-        return self.fourVector.E()
-  
+        return self._E
+
     def eta(self):
-        return self.fourVector.Eta()
+        if self._eta is None:
+            # Follows TVector3::PseudoRapidity
+            mag = m.sqrt(self._px*self._px + self._py*self._py + self._pz*self._pz)
+            cosTheta = 1.0
+            if mag != 0.0:
+                cosTheta = self._pz / mag
+
+            if cosTheta*cosTheta < 1:
+                self._eta = -0.5 * m.log( (1.0 - cosTheta) / (1.0 + cosTheta) )
+            elif self._pz == 0:
+                self._eta = 0.
+            elif self._pz > 0:
+                self._eta = 10e10
+            else:
+                self._eta = -10e10
+        return self._eta
+
+    def phi(self):
+        if self._phi is None:
+            if self._px == 0.0 and self._py == 0.0:
+                self._phi = 0.0
+            else:
+                self._phi = m.atan2(self._py, self._px)
+        return self._phi
 
     def px(self):
-        return self.fourVector.Px()
-    
+        return self._px
+
     def py(self):
-        return self.fourVector.Py()
+        return self._py
 
     def pz(self):
-        return self.fourVector.Pz()
+        return self._pz
 
     def pt(self):
-        return self.fourVector.Pt()
+        if self._pt is None:
+            self._pt = m.sqrt(self._px*self._px + self._py*self._py)
+        return self._pt
 
     def M(self):
-        return self.fourVector.M()
+        if self._M is None:
+            mm = self._E*self._E - (self._px*self._px + self._py*self._py + self._pz*self._pz)
+            if mm < 0.0:
+                self._M = -m.sqrt(-mm)
+            else:
+                self._M = m.sqrt(mm)
+        return self._M
@@ -3,6 +3,13 @@ from LFVAnalysis.LFVObjects.physicsObject import *
 import ROOT as r
 
 class Tau(PhysObj):
+    __slots__ = (
+            "againstElectronVLooseMVA6",
+            "againstMuonTight3",
+            "decayModeFinding",
+            "byTightIsolationMVArun2v1DBoldDMwLT"
+            )
+
     def __init__(self, px, py, pz, E):
         PhysObj.__init__(self, px, py, pz, E, 15)
 
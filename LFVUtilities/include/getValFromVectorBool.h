@@ -5,9 +5,16 @@
 #include <stdio.h>
 #include <vector>
 
-bool getValFromVectorBool(const std::vector<bool> vec, const int index) {
+bool getValFromVectorBool(const std::vector<bool> & vec, const int index) {
       if (vec[index]) return true;
       else return false;
 } //End getValFromVectorBool()
 
+//Copies every element of vec to out, out must hold at least vec.size() elements
+void unpackVectorBool(const std::vector<bool> & vec, int * out) {
+      for (size_t idx = 0; idx < vec.size(); ++idx) {
+          out[idx] = vec[idx];
+      }
+} //End unpackVectorBool()
+
 #endif
@@ -0,0 +1,91 @@
+from LFVAnalysis.LFVUtilities.selectorEl import elBranches
+from LFVAnalysis.LFVUtilities.selectorMuon import muonBranches, muonGlobalTrackBranches
+from LFVAnalysis.LFVUtilities.selectorTau import tauBranches
+from LFVAnalysis.LFVUtilities.utilities import selLevels
+
+# Object multiplicity branches
+countBranches = [
+        "gsf_n",
+        "mu_n",
+        "tau_n"
+        ]
+
+# Branches read by the gen level analysis
+genBranches = [
+        "mc_charge",
+        "mc_energy",
+        "mc_pdgId",
+        "mc_px",
+        "mc_py",
+        "mc_pz",
+        "mc_status"
+        ]
+
+def getRequiredBranches(listOfTriggers=None, listOfCutDicts=(), useGlobalTrack=False, anaGen=True):
+    """
+    Returns the sorted list of the names of all TBranches read by the analysis
+
+    listOfTriggers  - List of trigger branch names checked by the analysis
+    listOfCutDicts  - List of dictionaries returned by compileSelectionLevels,
+                      e.g. [ elCuts, muonCuts, tauCuts ]
+    useGlobalTrack  - If true the muon global track branches are also required
+    anaGen          - If true the gen level branches are also required
+    """
+
+    setOfBranches = set(countBranches)
+    setOfBranches.update(elBranches)
+    setOfBranches.update(muonBranches)
+    setOfBranches.update(tauBranches)
+
+    if listOfTriggers is not None:
+        setOfBranches.update(listOfTriggers)
+
+    for dict_cuts in listOfCutDicts:
+        for lvl in selLevels:
+            setOfBranches.update( cut.bName for cut in dict_cuts[lvl] )
+
+    if useGlobalTrack:
+        setOfBranches.update(muonGlobalTrackBranches)
+
+    if anaGen:
+        setOfBranches.update(genBranches)
+
+    return sorted(setOfBranches)
+
+def activateBranches(tree, listOfBranches, printBranchInfo=False):
+    """
+    Disables every TBranch of tree except those in listOfBranches.
+
+    Returns the list of names of the disabled branches
+
+    tree            - TTree whose branches should be pruned
+    listOfBranches  - list of names of branches to keep active
+    printBranchInfo - If true prints the active and pruned branches
+    """
+
+    listOfBranchNames = [branch.GetName() for branch in tree.GetListOfBranches() ]
+
+    tree.SetBranchStatus("*", 0)
+    listOfMissing = []
+    for bName in listOfBranches:
+        if bName in listOfBranchNames:
+            tree.SetBranchStatus(bName, 1)
+        else:
+            listOfMissing.append(bName)
+
+    setOfActive = set(listOfBranches)
+    listOfPruned = [ bName for bName in listOfBranchNames if bName not in setOfActive ]
+
+    if printBranchInfo:
+        print "| status | branch |"
+        print "| ------ | ------ |"
+        for bName in listOfBranchNames:
+            if bName in listOfPruned:
+                print "| pruned | %s |"%bName
+            else:
+                print "| active | %s |"%bName
+        for bName in listOfMissing:
+            print "| missing | %s |"%bName
+        print "%i of %i branches active, %i pruned"%(len(listOfBranchNames) - len(listOfPruned), len(listOfBranchNames), len(listOfPruned))
+
+    return listOfPruned
@@ -0,0 +1,75 @@
+from LFVAnalysis.LFVObjects.physicsObject import PhysObj
+
+import numpy as np
+
+def getFourVectorArray(listOfObjs):
+    """
+    Returns a numpy array of shape (len(listOfObjs), 4) holding the
+    px, py, pz and E of each PhysObj in listOfObjs
+    """
+
+    p4 = np.empty( (len(listOfObjs), 4), dtype=np.float64)
+    for idx,obj in enumerate(listOfObjs):
+        p4[idx] = (obj.px(), obj.py(), obj.pz(), obj.E())
+
+    return p4
+
+def getInvariantMass(px, py, pz, E):
+    """
+    Returns the invariant mass of the four-vectors given as numpy arrays,
+    following TLorentzVector::M() a negative mass squared gives a negative mass
+    """
+
+    mm = E*E - (px*px + py*py + pz*pz)
+
+    return np.where(mm < 0.0, -np.sqrt(np.abs(mm)), np.sqrt(np.abs(mm)))
+
+def getInvariantMassMatrix(p4Dau1, p4Dau2):
+    """
+    Returns the numpy array of shape (len(p4Dau1), len(p4Dau2)) holding the
+    invariant mass of every pair of four-vectors
+
+    p4Dau1 - numpy array of shape (n1, 4) of px, py, pz, E of daughter 1
+    p4Dau2 - numpy array of shape (n2, 4) of px, py, pz, E of daughter 2
+    """
+
+    p4Sum = p4Dau1[:, np.newaxis, :] + p4Dau2[np.newaxis, :, :]
+
+    return getInvariantMass(p4Sum[..., 0], p4Sum[..., 1], p4Sum[..., 2], p4Sum[..., 3])
+
+def getMaxMassPair(listOfDau1, listOfDau2):
+    """
+    Returns the tuple of indices (idx1, idx2) of the pair of objects from
+    listOfDau1 and listOfDau2 with the highest invariant mass, if several
+    pairs share the highest mass the first one in (idx1, idx2) order is
+    returned.  Returns None if either list is empty.
+
+    listOfDau1 - list of PhysObj, candidates for daughter 1
+    listOfDau2 - list of PhysObj, candidates for daughter 2
+    """
+
+    if len(listOfDau1) == 0 or len(listOfDau2) == 0:
+        return None
+    if len(listOfDau1) == 1 and len(listOfDau2) == 1:
+        return (0, 0)
+
+    massMatrix = getInvariantMassMatrix(getFourVectorArray(listOfDau1), getFourVectorArray(listOfDau2))
+
+    idx1, idx2 = np.unravel_index(np.argmax(massMatrix), massMatrix.shape)
+
+    return (int(idx1), int(idx2))
+
+def makeCandidate(dau1, dau2):
+    """
+    Returns a PhysObj whose four-vector and charge are the sum of those
+    of dau1 and dau2
+    """
+
+    candidate = PhysObj(
+            dau1.px() + dau2.px(),
+            dau1.py() + dau2.py(),
+            dau1.pz() + dau2.pz(),
+            dau1.E() + dau2.E())
+    candidate.charge = dau1.charge + dau2.charge
+
+    return candidate
@@ -0,0 +1,54 @@
+from LFVAnalysis.LFVUtilities.vectorBool import vectorBoolCache
+
+def getCascadedSelection(event, cascadePlan, numObjects, bitRefBranches, buildObject, bits=None, dict_objects=None):
+    """
+    Evaluates all selection levels of cascadePlan for one event.  Each level
+    only evaluates its own cuts on the survivors of the previous level, and
+    each passing object is built once and shared by all levels it passes.
+
+    Returns a dictionary whose keys are the levels of cascadePlan and whose
+    values are the lists of objects passing each level
+
+    event           - entry of a TTree
+    cascadePlan     - list returned by getCascadePlan
+    numObjects      - number of objects in event
+    bitRefBranches  - list of names of std::vector<bool> branches
+    buildObject     - function taking the index of an object in event and
+                      returning the object, e.g. makeMuon
+    bits            - Optional, vectorBoolCache of event, e.g. shared with buildObject
+    dict_objects    - Optional, dictionary of the objects of event already built,
+                      keyed by index, e.g. shared by several selections.  Objects
+                      built here are added
+    """
+
+    if bits is None:
+        bits = vectorBoolCache(event)
+    if dict_objects is None:
+        dict_objects = {}   # built objects, keyed by index
+
+    dict_selected = {}
+    listOfSurvivors = range(0,numObjects)
+    for lvl,listOfCuts,isIncremental in cascadePlan:
+        listOfCandidates = listOfSurvivors
+        if not isIncremental:
+            listOfCandidates = range(0,numObjects)
+
+        # Look up each branch once per level instead of once per object
+        listOfCutBranches = bits.getBranches(listOfCuts, bitRefBranches)
+
+        listOfSurvivors = []
+        for idx in listOfCandidates:
+            objPassedAllCuts = 1
+            for branch,passes in listOfCutBranches:
+                if not passes(branch[idx]):
+                    objPassedAllCuts = 0
+                    break #Exit cut loop, one cut failed
+            if objPassedAllCuts:
+                listOfSurvivors.append(idx)
+
+        for idx in listOfSurvivors:
+            if idx not in dict_objects:
+                dict_objects[idx] = buildObject(idx)
+        dict_selected[lvl] = [ dict_objects[idx] for idx in listOfSurvivors ]
+
+    return dict_selected
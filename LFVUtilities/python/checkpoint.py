@@ -0,0 +1,140 @@
+from timeit import default_timer
+import cPickle as pickle
+import os
+
+class checkpointWriter:
+    def __init__(self, checkpointFileName, checkpointEvery=None, checkpointInterval=None):
+        """
+        Writes snapshots of the state of an event loop to checkpointFileName
+        every checkpointEvery events and/or every checkpointInterval seconds,
+        see due() and write().
+
+        Each snapshot is pickled by a child process forked from the event loop,
+        the child works on a copy-on-write copy of the state and the loop only
+        pays for the fork.  The snapshot is written to a temporary file which
+        is renamed once complete, checkpointFileName always holds a complete
+        snapshot.
+
+        checkpointFileName  - physical filename of the checkpoint
+        checkpointEvery     - number of events between two snapshots, None for
+                              no event interval
+        checkpointInterval  - number of seconds between two snapshots, None for
+                              no time interval
+        """
+
+        self.checkpointFileName = checkpointFileName
+        self.checkpointEvery = checkpointEvery
+        self.checkpointInterval = checkpointInterval
+
+        self.childPid = None    # child writing the last snapshot
+        self.lastNumEvts = 0    # number of events at the last snapshot
+        self.lastTime = default_timer()
+        self.numWritten = 0
+
+        return
+
+    def due(self, numEvts):
+        """
+        Returns True if a snapshot is due after numEvts events
+        """
+
+        if self.checkpointEvery is not None and (numEvts - self.lastNumEvts) >= self.checkpointEvery:
+            return True
+        if self.checkpointInterval is not None and (default_timer() - self.lastTime) >= self.checkpointInterval:
+            return True
+
+        return False
+
+    def write(self, numEvts, getState):
+        """
+        Forks a child which writes the state returned by getState() and returns
+        True, or returns False if the previous snapshot is still being written,
+        then the snapshot is attempted again at the next call
+
+        numEvts     - number of events processed so far, see due()
+        getState    - function returning the picklable state, called in the
+                      child only, it may alter the state of its process
+        """
+
+        if not self.reap():
+            return False
+
+        self.lastNumEvts = numEvts
+        self.lastTime = default_timer()
+
+        pid = os.fork()
+        if pid == 0:
+            # The child never returns to the event loop
+            status = 0
+            try:
+                writeCheckpoint(self.checkpointFileName, getState())
+            except Exception as error:
+                print "Error unable to write checkpoint %s: %s"%(self.checkpointFileName, error)
+                status = os.EX_CANTCREAT
+            os._exit(status)
+
+        self.childPid = pid
+        self.numWritten += 1
+
+        return True
+
+    def reap(self, block=False):
+        """
+        Returns True if no snapshot is being written, i.e. the child writing
+        the last snapshot, if any, has exited
+
+        block - if True waits for the child to exit
+        """
+
+        if self.childPid is None:
+            return True
+
+        pid, status = os.waitpid(self.childPid, 0 if block else os.WNOHANG)
+        if pid == 0:
+            return False
+
+        self.childPid = None
+        if status != 0:
+            print "Warning writing checkpoint %s failed, the previous checkpoint is kept"%self.checkpointFileName
+
+        return True
+
+    def close(self):
+        """
+        Waits for the snapshot being written, if any
+        """
+
+        self.reap(block=True)
+
+        return
+
+def writeCheckpoint(checkpointFileName, dict_state):
+    """
+    Pickles dict_state to a temporary file renamed to checkpointFileName once
+    complete, a reader never sees a partial checkpoint
+    """
+
+    tmpFileName = "%s.tmp%i"%(checkpointFileName, os.getpid())
+    try:
+        with open(tmpFileName, "wb") as tmpFile:
+            pickle.dump(dict_state, tmpFile, pickle.HIGHEST_PROTOCOL)
+            tmpFile.flush()
+            os.fsync(tmpFile.fileno())
+        os.rename(tmpFileName, checkpointFileName)
+    finally:
+        if os.path.exists(tmpFileName):
+            os.remove(tmpFileName)
+
+    return
+
+def readCheckpoint(checkpointFileName):
+    """
+    Returns the state stored in checkpointFileName, or None if there is no
+    checkpoint
+    """
+
+    if not os.path.isfile(checkpointFileName):
+        return None
+
+    with open(checkpointFileName, "rb") as checkpointFile:
+        return pickle.load(checkpointFile)
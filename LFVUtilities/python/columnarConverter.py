@@ -0,0 +1,254 @@
+from LFVAnalysis.LFVUtilities.branchActivation import countBranches, getRequiredBranches
+from LFVAnalysis.LFVUtilities.columnarSelector import getDrawnValues, readJaggedChunk
+from LFVAnalysis.LFVUtilities.cutCompiler import compileSelectionLevels
+from LFVAnalysis.LFVUtilities.eventSource import columnsFileName
+from LFVAnalysis.LFVUtilities.selectorEl import elSelection
+from LFVAnalysis.LFVUtilities.selectorGen import dict_vectorTypes
+from LFVAnalysis.LFVUtilities.selectorMuon import muonSelection
+from LFVAnalysis.LFVUtilities.selectorTau import tauSelection
+
+import hashlib
+import json
+import numpy as np
+import os
+import ROOT as r
+import shutil
+import time
+
+# numpy types of the leaf types of scalar branches
+dict_leafTypes = {
+        "Bool_t":np.bool_,
+        "Char_t":np.int8,
+        "Double_t":np.float64,
+        "Float_t":np.float32,
+        "Int_t":np.int32,
+        "Long64_t":np.int64,
+        "Short_t":np.int16,
+        "UChar_t":np.uint8,
+        "UInt_t":np.uint32,
+        "ULong64_t":np.uint64,
+        "UShort_t":np.uint16
+        }
+
+def getBranchType(tree, bName):
+    """
+    Returns the tuple (dtype, isJagged) of branch bName of tree, where dtype
+    is the numpy type of its values and isJagged is True for std::vector
+    branches, or None if the type is not supported
+
+    tree    - TTree holding the branch
+    bName   - name of the branch
+    """
+
+    branch = tree.GetBranch(bName)
+    className = branch.GetClassName()
+    if className.startswith("vector<"):
+        valueType = className[className.find("<")+1:className.rfind(">")].strip()
+        if valueType in dict_vectorTypes:
+            return (dict_vectorTypes[valueType], True)
+        return None
+
+    typeName = branch.GetListOfLeaves().At(0).GetTypeName()
+    if typeName in dict_leafTypes:
+        return (dict_leafTypes[typeName], False)
+
+    return None
+
+def getConvertedBranches(tree, listOfTriggers=None):
+    """
+    Returns the sorted list of the names of the branches of tree read by
+    lfvAnalyzer, including the muon global track and gen level branches,
+    i.e. the branches needed by any configuration of the analysis
+
+    tree            - TTree to convert
+    listOfTriggers  - list of trigger branch names, if None every trig_* branch
+    """
+
+    listOfBranchNames = [ branch.GetName() for branch in tree.GetListOfBranches() ]
+    if listOfTriggers is None:
+        listOfTriggers = [ bName for bName in listOfBranchNames if bName.startswith("trig_") ]
+
+    listOfCutDicts = [ compileSelectionLevels(dict_selection, listOfBranchNames=listOfBranchNames) for dict_selection in (elSelection, muonSelection, tauSelection) ]
+    setOfBranches = set(getRequiredBranches(listOfTriggers, listOfCutDicts, useGlobalTrack=True, anaGen=True))
+    setOfBranches.update(countBranches)
+
+    return sorted( bName for bName in setOfBranches if bName in listOfBranchNames )
+
+class columnWriter:
+    def __init__(self, outputDir, bName, dtype, isJagged):
+        """
+        Writes the values, and offsets, of one branch to raw files in outputDir,
+        see write().  std::vector<bool> branches are packed to one bit per value.
+
+        outputDir   - directory the files are written to
+        bName       - name of the branch
+        dtype       - numpy type of the values
+        isJagged    - True for std::vector branches, an offsets file is written
+        """
+
+        self.bName = bName
+        self.dtype = np.dtype(dtype)
+        self.isJagged = isJagged
+        self.packed = (isJagged and self.dtype == np.bool_)
+        self.numValues = 0
+        self.carry = np.zeros(0, dtype=np.bool_) # values not yet filling a byte
+
+        self.valuesFileName = "%s.%s"%(bName, "bits" if self.packed else "values")
+        self.valuesFile = open(os.path.join(outputDir, self.valuesFileName), "wb")
+
+        self.offsetsFileName = None
+        if isJagged:
+            self.offsetsFileName = "%s.offsets"%bName
+            self.offsetsFile = open(os.path.join(outputDir, self.offsetsFileName), "wb")
+            np.zeros(1, dtype=np.int64).tofile(self.offsetsFile)
+
+        return
+
+    def write(self, values, offsets=None):
+        """
+        Appends the values of a chunk of entries
+
+        values  - numpy array of values, all objects of the chunk for std::vector
+                  branches, one per entry otherwise
+        offsets - offsets of the chunk as returned by readJaggedChunk, only for
+                  std::vector branches
+        """
+
+        if self.packed:
+            bits = np.concatenate((self.carry, values.astype(np.bool_)))
+            numFull = 8 * (len(bits) // 8)
+            np.packbits(bits[:numFull]).tofile(self.valuesFile)
+            self.carry = bits[numFull:]
+        else:
+            values.astype(self.dtype).tofile(self.valuesFile)
+
+        if self.isJagged:
+            (offsets[1:] + self.numValues).astype(np.int64).tofile(self.offsetsFile)
+
+        self.numValues += len(values)
+
+        return
+
+    def close(self):
+        """
+        Closes the files, returns the dictionary describing the branch in columns.json
+        """
+
+        if self.packed and len(self.carry) > 0:
+            np.packbits(self.carry).tofile(self.valuesFile)
+        self.valuesFile.close()
+        if self.isJagged:
+            self.offsetsFile.close()
+
+        return {
+                "dtype":self.dtype.name,
+                "values":self.valuesFileName,
+                "offsets":self.offsetsFileName,
+                "numValues":self.numValues,
+                "packed":self.packed
+                }
+
+def convertToColumnar(inputFileName, outputDir, inputTreeName="IIHEAnalysis", listOfBranches=None, chunkSize=10000, debug=False):
+    """
+    Converts the branches of an IIHE ntuple read by lfvAnalyzer to a directory
+    of uncompressed columns which lfvAnalyzer reads memory-mapped, see
+    columnarDirSource.  Each branch is stored as a flat file of values, each
+    std::vector branch also as a file of offsets, the objects of entry i are
+    values [offsets[i], offsets[i+1]).  std::vector<bool> branches are packed
+    to one bit per value and branches with identical offsets share one file.
+    The index of all branches is written to columns.json.
+
+    The directory is written under a temporary name and renamed once complete.
+
+    inputFileName   - physical filename of the input TFile
+    outputDir       - directory to create, must not exist
+    inputTreeName   - name of TTree found in inputFileName
+    listOfBranches  - list of branch names to convert, if None the branches
+                      returned by getConvertedBranches
+    chunkSize       - number of entries read at once
+    debug           - If true prints additional debugging information
+    """
+
+    if os.path.exists(outputDir):
+        print "Error output directory %s already exists"%outputDir
+        print "exiting"
+        exit(os.EX_CANTCREAT)
+
+    dataFile = r.TFile.Open(inputFileName, "READ")
+    if not dataFile or dataFile.IsZombie():
+        print "Error unable to open file %s"%inputFileName
+        print "exiting"
+        exit(os.EX_DATAERR)
+    tree = dataFile.Get(inputTreeName)
+    if not tree:
+        print "Error TTree %s not found in TFile %s"%(inputTreeName, inputFileName)
+        print "exiting"
+        exit(os.EX_DATAERR)
+
+    if listOfBranches is None:
+        listOfBranches = getConvertedBranches(tree)
+
+    tmpDir = "%s.tmp%i"%(outputDir.rstrip("/"), os.getpid())
+    os.makedirs(tmpDir)
+
+    dict_writers = {}
+    for bName in listOfBranches:
+        branchType = getBranchType(tree, bName)
+        if branchType is None:
+            print "Error type of branch %s is not supported"%bName
+            print "exiting"
+            shutil.rmtree(tmpDir, True)
+            exit(os.EX_DATAERR)
+        dict_writers[bName] = columnWriter(tmpDir, bName, branchType[0], branchType[1])
+
+    # Each branch is drawn on its own, only its baskets are read
+    numEntries = tree.GetEntries()
+    for firstEntry in range(0, numEntries, chunkSize):
+        numChunk = min(chunkSize, numEntries - firstEntry)
+        if debug:
+            print "converting entries [%i, %i) of %i"%(firstEntry, firstEntry + numChunk, numEntries)
+
+        for bName,writer in sorted(dict_writers.iteritems()):
+            if writer.isJagged:
+                dict_values, offsets = readJaggedChunk(tree, [bName], firstEntry, numChunk)
+                writer.write(dict_values[bName], offsets)
+            else:
+                tree.SetEstimate(numChunk + 1)
+                numRows = tree.Draw(bName, "", "goff", numChunk, firstEntry)
+                writer.write(getDrawnValues(tree, 0, numRows))
+
+    dict_branches = {}
+    for bName,writer in dict_writers.iteritems():
+        dict_branches[bName] = writer.close()
+
+    # Keep one file of each set of identical offsets
+    dict_offsetHashes = {}
+    for bName,dict_branch in sorted(dict_branches.iteritems()):
+        if dict_branch["offsets"] is None:
+            continue
+        offsetsPath = os.path.join(tmpDir, dict_branch["offsets"])
+        with open(offsetsPath, "rb") as offsetsFile:
+            digest = hashlib.sha1(offsetsFile.read()).hexdigest()
+        if digest in dict_offsetHashes:
+            os.remove(offsetsPath)
+            dict_branch["offsets"] = dict_offsetHashes[digest]
+        else:
+            dict_offsetHashes[digest] = dict_branch["offsets"]
+
+    dict_index = {
+            "inputFileName":os.path.realpath(inputFileName),
+            "inputTreeName":inputTreeName,
+            "created":time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "numEntries":numEntries,
+            "branches":dict_branches
+            }
+    with open(os.path.join(tmpDir, columnsFileName), "w") as indexFile:
+        json.dump(dict_index, indexFile, indent=1, sort_keys=True)
+
+    dataFile.Close()
+    os.rename(tmpDir, outputDir)
+
+    if debug:
+        print "converted %i branches of %i entries to %s"%(len(dict_branches), numEntries, outputDir)
+
+    return
@@ -0,0 +1,223 @@
+from LFVAnalysis.LFVUtilities.cutCompiler import compileSelectionLevels, getCascadePlan
+from LFVAnalysis.LFVUtilities.utilities import selLevels
+
+from timeit import default_timer
+import numpy as np
+import os
+
+def getDrawnValues(tree, index, numRows):
+    """
+    Returns a copy of the index^th column filled by the last call of
+    tree.Draw(...) as a numpy array of length numRows
+
+    tree    - TTree which was last drawn
+    index   - index of the drawn expression, e.g. 0 for the first expression
+    numRows - number of rows returned by the last call of tree.Draw(...)
+    """
+
+    if numRows <= 0:
+        return np.zeros(0, dtype=np.float64)
+
+    buf = tree.GetVal(index)
+    if hasattr(buf, "SetSize"):
+        buf.SetSize(numRows)
+    else:
+        buf.reshape((numRows,))
+
+    # Copy, the buffer is owned by the TTree and is reused by the next Draw
+    return np.array(np.frombuffer(buf, dtype=np.float64, count=numRows))
+
+def readJaggedChunk(tree, listOfBranches, firstEntry, numEntries, debug=False):
+    """
+    Reads the per-object branches in listOfBranches for the entries
+    [firstEntry, firstEntry + numEntries) of tree into flat numpy arrays.
+    Only the requested branches are read, the remainder of the event is
+    not deserialized.
+
+    Returns a tuple (dict_values, offsets) where dict_values has the branch
+    name as key and a flat numpy array holding the values of all objects in
+    the chunk as value.  The objects belonging to the i^th entry of the chunk
+    are found at [offsets[i], offsets[i+1]).
+
+    tree            - TTree to read from
+    listOfBranches  - list of names of std::vector branches, all branches must
+                      describe the same physics object (e.g. all mu_* branches)
+    firstEntry      - first entry of the chunk
+    numEntries      - number of entries in the chunk
+    debug           - If true prints additional debugging information
+    """
+
+    listOfBranches = list(listOfBranches)
+    listOfExprs = listOfBranches + [ "Entry$" ]
+
+    # Draw the chunk, increasing the estimate until every row is kept
+    estimate = max(tree.GetEstimate(), 10 * numEntries)
+    while True:
+        tree.SetEstimate(estimate)
+        numRows = tree.Draw(":".join(listOfExprs), "", "goff para", numEntries, firstEntry)
+        if numRows < 0:
+            print "Error drawing branches:"
+            print ""
+            print listOfBranches
+            print ""
+            print "exiting"
+            exit(os.EX_DATAERR)
+        if numRows <= estimate:
+            break
+        estimate = 2 * numRows
+
+    if debug:
+        print "read %i objects from entries [%i, %i)"%(numRows, firstEntry, firstEntry + numEntries)
+
+    dict_values = {}
+    for idx,bName in enumerate(listOfBranches):
+        dict_values[bName] = getDrawnValues(tree, idx, numRows)
+
+    # Entries without objects produce no rows, bincount recovers them
+    entries = getDrawnValues(tree, len(listOfBranches), numRows).astype(np.int64) - firstEntry
+    offsets = np.zeros(numEntries + 1, dtype=np.int64)
+    np.cumsum(np.bincount(entries, minlength=numEntries), out=offsets[1:])
+
+    return (dict_values, offsets)
+
+def getSelectionMasks(tree, dict_selection, firstEntry, numEntries, delim="-", debug=False, cutFlow=None, cascadePlan=None):
+    """
+    Evaluates every selection level of dict_selection on all objects found
+    in entries [firstEntry, firstEntry + numEntries) of tree at once.
+
+    Returns a tuple (dict_masks, offsets) where dict_masks has the selection
+    level as key and a numpy array of bools, one per object in the chunk, as
+    value.  The objects belonging to the i^th entry of the chunk are found at
+    [offsets[i], offsets[i+1]).
+
+    tree            - TTree or event source, e.g. columnarEventSource, to read from
+    dict_selection  - dictionary whose keys are the entries of selLevels and
+                      whose values are selection dictionaries as used by the
+                      getSelected* functions, e.g. muonSelection, or the
+                      dictionary returned by compileSelectionLevels
+    firstEntry      - first entry of the chunk
+    numEntries      - number of entries in the chunk
+    delim           - Character which delimites the string portion of the tuple
+                      value stored in each selection dictionary
+    debug           - If true prints additional debugging information
+    cutFlow         - Optional, cutFlow recording the pass counts and evaluation
+                      time of each cut, every entry of the chunk is counted
+    cascadePlan     - Optional, list returned by getCascadePlan for the compiled
+                      dict_selection, e.g. reordered by cutFlow.reorder
+    """
+
+    # Compile the selection unless the caller already did
+    # Event sources list their branches themselves
+    isSource = hasattr(tree, "readJaggedChunk")
+
+    dict_cuts = dict_selection
+    if not isinstance(dict_selection[selLevels[0]], list):
+        if isSource:
+            listOfBranchNames = tree.getBranchNames()
+        else:
+            listOfBranchNames = [branch.GetName() for branch in tree.GetListOfBranches() ]
+        dict_cuts = compileSelectionLevels(dict_selection, delim, listOfBranchNames)
+
+    # Each branch is read once, regardless of how many levels use it
+    listOfBranches = sorted(set( cut.bName for lvl in selLevels for cut in dict_cuts[lvl] ))
+    dict_values, offsets = readSelectionChunk(tree, listOfBranches, firstEntry, numEntries, debug)
+
+    return (evaluateSelectionMasks(dict_values, offsets, dict_cuts, cutFlow, cascadePlan), offsets)
+
+def readSelectionChunk(tree, listOfBranches, firstEntry, numEntries, debug=False):
+    """
+    Returns the tuple (dict_values, offsets) of readJaggedChunk, read by tree
+    itself if tree is an event source
+
+    tree            - TTree or event source, e.g. columnarEventSource, to read from
+    listOfBranches  - list of names of std::vector branches of the same physics object
+    firstEntry      - first entry of the chunk
+    numEntries      - number of entries in the chunk
+    debug           - If true prints additional debugging information
+    """
+
+    if hasattr(tree, "readJaggedChunk"):
+        return tree.readJaggedChunk(listOfBranches, firstEntry, numEntries, debug)
+
+    return readJaggedChunk(tree, listOfBranches, firstEntry, numEntries, debug)
+
+def evaluateSelectionMasks(dict_values, offsets, dict_cuts, cutFlow=None, cascadePlan=None):
+    """
+    Returns the dictionary dict_masks of getSelectionMasks for the values of
+    a chunk already read, e.g. shared by several selections
+
+    dict_values - dictionary of values returned by readJaggedChunk, holding
+                  every branch cut on by dict_cuts
+    offsets     - offsets array returned by readJaggedChunk
+    dict_cuts   - dictionary returned by compileSelectionLevels
+    cutFlow     - Optional, see getSelectionMasks
+    cascadePlan - Optional, see getSelectionMasks
+    """
+
+    # Nested levels start from the mask of the previous level
+    if cascadePlan is None:
+        cascadePlan = getCascadePlan(dict_cuts)
+    dict_masks = {}
+    prevMask = None
+    for lvl,listOfCuts,isIncremental in cascadePlan:
+        if isIncremental:
+            mask = prevMask.copy()
+        else:
+            mask = np.ones(offsets[-1], dtype=bool)
+        for cut in listOfCuts:
+            if cutFlow is None:
+                mask &= cut.mask(dict_values[cut.bName])
+            else:
+                maskBefore = mask.copy()
+                start = default_timer()
+                mask &= cut.mask(dict_values[cut.bName])
+                cutFlow.fillMask(lvl, cut, maskBefore, mask, offsets, default_timer() - start)
+        dict_masks[lvl] = mask
+        prevMask = mask
+
+    if cutFlow is not None:
+        cutFlow.endEvent(len(offsets) - 1)
+
+    return dict_masks
+
+def getPassingIndices(mask, offsets, localEntry):
+    """
+    Returns the list of object indices, within their entry, of the objects
+    in the localEntry^th entry of a chunk whose mask value is True
+
+    mask        - numpy array of bools as returned by getSelectionMasks
+    offsets     - offsets array as returned by getSelectionMasks
+    localEntry  - entry number relative to the first entry of the chunk
+    """
+
+    return np.flatnonzero(mask[offsets[localEntry]:offsets[localEntry+1]]).tolist()
+
+def getSelectedObjects(dict_masks, offsets, localEntry, buildObject, dict_objects=None):
+    """
+    Returns a dictionary whose keys are the levels of dict_masks and whose
+    values are the lists of objects of the localEntry^th entry of a chunk
+    passing each level.  Each object is built once and shared by all levels
+    it passes.
+
+    dict_masks  - dictionary of masks as returned by getSelectionMasks
+    offsets     - offsets array as returned by getSelectionMasks
+    localEntry  - entry number relative to the first entry of the chunk
+    buildObject - function taking the index of an object in the entry and
+                  returning the object, e.g. makeMuon
+    dict_objects- Optional, dictionary of the objects of the entry already built,
+                  keyed by index, e.g. shared by several selections.  Objects
+                  built here are added
+    """
+
+    if dict_objects is None:
+        dict_objects = {}   # built objects, keyed by index
+
+    dict_selected = {}
+    for lvl,mask in dict_masks.iteritems():
+        listOfIndices = getPassingIndices(mask, offsets, localEntry)
+        for idx in listOfIndices:
+            if idx not in dict_objects:
+                dict_objects[idx] = buildObject(idx)
+        dict_selected[lvl] = [ dict_objects[idx] for idx in listOfIndices ]
+
+    return dict_selected
@@ -0,0 +1,242 @@
+from LFVAnalysis.LFVUtilities.utilities import selLevels, supOperators
+
+from functools import partial
+import operator
+import os
+
+# Comparison operators in supOperators, stored as (op, reversed op) such
+# that val <op> cutVal is equivalent to cutVal <reversed op> val
+dict_comparisons = {
+        "eq":   (operator.eq, operator.eq),
+        "g":    (operator.gt, operator.lt),
+        "ge":   (operator.ge, operator.le),
+        "l":    (operator.lt, operator.gt),
+        "le":   (operator.le, operator.ge)
+        }
+
+class compiledCut:
+    def __init__(self, bName, cutVal, opName, useAbs=False):
+        """
+        A single validated cut on a TBranch, see compileCut
+
+        bName   - name of the TBranch the cut is applied to
+        cutVal  - value to compare the branch value against
+        opName  - comparison operator, must be a key of dict_comparisons
+        useAbs  - If true the absolute value of the branch value is compared
+        """
+
+        self.bName = bName
+        self.cutVal = cutVal
+        self.opName = opName
+        self.useAbs = useAbs
+
+        # Bind the comparison once, passes(val) then costs a single comparison.
+        # Works for numbers and element-wise for numpy arrays alike
+        comparison, revComparison = dict_comparisons[opName]
+        if useAbs:
+            self.passes = lambda val: comparison(abs(val), cutVal)
+        else:
+            self.passes = partial(revComparison, cutVal)
+
+        return
+
+    def mask(self, arrayOfVals):
+        """
+        Returns a numpy array of bools, True (False) if the corresponding
+        element of arrayOfVals passes (fails) the cut
+        """
+
+        return self.passes(arrayOfVals)
+
+    def __eq__(self, other):
+        return (isinstance(other, compiledCut) and self.key() == other.key())
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return "compiledCut(%s, %s, %s%s)"%(self.bName, self.cutVal, "fabs-" if self.useAbs else "", self.opName)
+
+    def key(self):
+        """
+        Returns a tuple uniquely identifying this cut
+        """
+
+        return (self.bName, self.cutVal, self.opName, self.useAbs)
+
+def compileCut(bName, cutTuple, delim="-"):
+    """
+    Validates a single entry of a selection dictionary and returns the
+    corresponding compiledCut.  Malformed cuts cause an exit with
+    os.EX_USAGE, this should happen when the analyzer is constructed
+    and not during the event loop.
+
+    bName    - name of the TBranch the cut is applied to
+    cutTuple - tuple where the first value is a number and the second is a
+               string delimited by delim made up of entries in supOperators,
+               e.g. (2.4, "fabs-le")
+    delim    - Character which delimites the string portion of cutTuple
+    """
+
+    if not (isinstance(cutTuple, tuple) and len(cutTuple) == 2):
+        print "Cut on branch %s is not a tuple of length 2, given:"%bName
+        print ""
+        print cutTuple
+        print ""
+        print "exiting"
+        exit(os.EX_USAGE)
+
+    cutVal, cutString = cutTuple
+    if isinstance(cutVal, bool) or not isinstance(cutVal, (int, long, float)):
+        print "Cut value for branch %s is not a number, given:"%bName
+        print ""
+        print cutVal
+        print ""
+        print "exiting"
+        exit(os.EX_USAGE)
+
+    listOfCutStrings = cutString.split(delim)
+    if len(listOfCutStrings) > 2:
+        print "list of cut strings for branch %s longer than expected, given:"%bName
+        print ""
+        print listOfCutStrings
+        print ""
+        print "exiting"
+        exit(os.EX_USAGE)
+
+    for operatorName in listOfCutStrings:
+        if operatorName not in supOperators:
+            print "Operator %s for branch %s not understood"%(operatorName, bName)
+            print "The list of supported operators is:"
+            print ""
+            print supOperators
+            print ""
+            print "exiting"
+            exit(os.EX_USAGE)
+
+    listOfComparisons = [ opName for opName in listOfCutStrings if opName != "fabs" ]
+    if len(listOfComparisons) != 1:
+        print "Cut on branch %s must contain exactly one comparison operator, given:"%bName
+        print ""
+        print listOfCutStrings
+        print ""
+        print "exiting"
+        exit(os.EX_USAGE)
+
+    return compiledCut(bName, cutVal, listOfComparisons[0], ("fabs" in listOfCutStrings))
+
+def compileSelection(selDict, delim="-", listOfBranchNames=None):
+    """
+    Returns a list of compiledCut, one per entry of selDict
+
+    selDict           - dictionary where the key value is the name of a TBranch
+                        and the value is a cut tuple, see compileCut
+    delim             - Character which delimites the string portion of the tuple
+                        value stored in selDict
+    listOfBranchNames - Optional, List of strings where each element is the name of a
+                        Branch in the TTree the selection will be applied to, if given
+                        every key of selDict is checked against it
+    """
+
+    if len(selDict) == 0:
+        print "Selection dictionary is empty, at least one cut is required"
+        print "exiting"
+        exit(os.EX_USAGE)
+
+    listOfCuts = []
+    for bName,cutTuple in selDict.iteritems():
+        if listOfBranchNames is not None and bName not in listOfBranchNames:
+            print "Error branch %s not found in listOfBranchNames"%bName
+            print "Please cross-check, the available list of branches:"
+            print ""
+            print listOfBranchNames
+            print ""
+            print "exiting"
+            exit(os.EX_USAGE)
+        listOfCuts.append(compileCut(bName, cutTuple, delim))
+
+    return listOfCuts
+
+def compileSelectionLevels(dict_selection, delim="-", listOfBranchNames=None):
+    """
+    Compiles every level of dict_selection, e.g. muonSelection
+
+    Returns a dictionary whose keys are the entries of selLevels and whose
+    values are the lists returned by compileSelection
+
+    dict_selection    - dictionary whose keys are the entries of selLevels and
+                        whose values are selection dictionaries
+    delim             - Character which delimites the string portion of the tuple
+                        values
+    listOfBranchNames - Optional, see compileSelection
+    """
+
+    dict_cuts = {}
+    for lvl in selLevels:
+        dict_cuts[lvl] = compileSelection(dict_selection[lvl], delim, listOfBranchNames)
+
+    return dict_cuts
+
+def isImpliedBy(cut, other):
+    """
+    Returns True if every value passing the compiledCut other is known to also
+    pass the compiledCut cut, False if this can not be shown
+
+    cut     - compiledCut
+    other   - compiledCut
+    """
+
+    if cut.key() == other.key():
+        return True
+    if cut.bName != other.bName or cut.useAbs != other.useAbs:
+        return False
+
+    # A fixed value passes cut or it does not
+    if other.opName == "eq":
+        return bool(cut.passes(other.cutVal))
+
+    # Lower bounds, x > a or x >= a
+    if cut.opName in ("g", "ge") and other.opName in ("g", "ge"):
+        if other.cutVal > cut.cutVal:
+            return True
+        return (other.cutVal == cut.cutVal and not (cut.opName == "g" and other.opName == "ge"))
+
+    # Upper bounds, x < a or x <= a
+    if cut.opName in ("l", "le") and other.opName in ("l", "le"):
+        if other.cutVal < cut.cutVal:
+            return True
+        return (other.cutVal == cut.cutVal and not (cut.opName == "l" and other.opName == "le"))
+
+    return False
+
+def getCascadePlan(dict_cuts):
+    """
+    Returns a list with one tuple (lvl, listOfCuts, isIncremental) per entry
+    of selLevels.  If isIncremental is True the objects passing level lvl are
+    the objects passing the previous level which also pass listOfCuts, only
+    the cuts added by lvl need to be evaluated.  This holds if every cut of
+    the previous level is also a cut of lvl or is implied by one, otherwise
+    isIncremental is False and listOfCuts holds all cuts of lvl which must be
+    evaluated on every object.
+
+    dict_cuts - dictionary returned by compileSelectionLevels
+    """
+
+    listOfLevelPlans = []
+    for idx,lvl in enumerate(selLevels):
+        listOfCuts = dict_cuts[lvl]
+        if idx == 0:
+            listOfLevelPlans.append( (lvl, listOfCuts, False) )
+            continue
+
+        listOfPrevCuts = dict_cuts[selLevels[idx-1]]
+        isIncremental = all( any( isImpliedBy(prevCut, cut) for cut in listOfCuts ) for prevCut in listOfPrevCuts )
+        if isIncremental:
+            setOfPrevCuts = set(listOfPrevCuts)
+            listOfCuts = [ cut for cut in listOfCuts if cut not in setOfPrevCuts ]
+        listOfLevelPlans.append( (lvl, listOfCuts, isIncremental) )
+
+    return listOfLevelPlans
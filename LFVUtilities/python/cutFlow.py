@@ -0,0 +1,300 @@
+from LFVAnalysis.LFVHistograms.PhysObjHistos import getOrMakeDirectory
+from LFVAnalysis.LFVUtilities.utilities import selLevels
+
+from timeit import default_timer
+import numpy as np
+import ROOT as r
+
+# Symbols of the comparison operators used in the cut labels
+dict_opSymbols = {
+        "eq":"==",
+        "g":">",
+        "ge":">=",
+        "l":"<",
+        "le":"<="
+        }
+
+def getCutLabel(cut):
+    """
+    Returns a short human readable label of a compiledCut, e.g. "fabs(mu_eta) <= 2.4"
+    """
+
+    bName = cut.bName
+    if cut.useAbs:
+        bName = "fabs(%s)"%bName
+
+    return "%s %s %s"%(bName, dict_opSymbols[cut.opName], cut.cutVal)
+
+class instrumentedCut:
+    def __init__(self, cut, flow, index):
+        """
+        Wraps a compiledCut such that each call of passes() is counted and
+        timed by flow, see cutFlow.instrument
+
+        cut     - compiledCut to wrap
+        flow    - cutFlow recording the calls
+        index   - index of cut in the counters of flow
+        """
+
+        self.cut = cut
+        self.bName = cut.bName
+        self.flow = flow
+        self.index = index
+
+        return
+
+    def passes(self, val):
+        start = default_timer()
+        passed = self.cut.passes(val)
+        self.flow.fillObject(self.index, passed, default_timer() - start)
+        return passed
+
+    def mask(self, arrayOfVals):
+        return self.cut.mask(arrayOfVals)
+
+    def key(self):
+        return self.cut.key()
+
+class cutFlow:
+    def __init__(self, name):
+        """
+        Per-cut pass counts and evaluation time of one selection, e.g. of
+        muonSelection.  For every (level, cut) the number of objects the cut
+        was evaluated on, the number of objects and events passing it and the
+        cumulative evaluation time are recorded.  Cuts of a level are
+        evaluated in order and stop at the first failing cut, an object
+        passing a cut therefore passed all previous cuts of its level.
+
+        Nothing is recorded unless a cascade plan is instrumented, see
+        instrument(), or the cutFlow is given to getSelectionMasks, the
+        uninstrumented selection path carries no overhead.
+
+        name - name of the selection, e.g. "mu", used for the output directory
+        """
+
+        self.name = name
+
+        self.listOfKeys = []    # (lvl, cut label), one per counter
+        self.nObjEval = []      # objects each cut was evaluated on
+        self.nObjPass = []      # objects passing each cut
+        self.nEvtPass = []      # events with at least one object passing each cut
+        self.time = []          # cumulative evaluation time of each cut in seconds
+        self.nEvts = 0          # events the selection was evaluated on
+
+        self.setOfPassedThisEvt = set()
+
+        return
+
+    def getIndex(self, lvl, cut):
+        """
+        Returns the index of the counters of (lvl, cut), the counters are
+        created if they do not exist yet
+        """
+
+        key = (lvl, getCutLabel(cut))
+        if key not in self.listOfKeys:
+            self.listOfKeys.append(key)
+            self.nObjEval.append(0)
+            self.nObjPass.append(0)
+            self.nEvtPass.append(0)
+            self.time.append(0.)
+
+        return self.listOfKeys.index(key)
+
+    def instrument(self, cascadePlan):
+        """
+        Returns a copy of cascadePlan, see getCascadePlan, whose cuts record
+        their calls in this cutFlow.  endEvent() must be called after each
+        event the returned plan was evaluated on.
+
+        cascadePlan - list returned by getCascadePlan
+        """
+
+        listOfLevelPlans = []
+        for lvl,listOfCuts,isIncremental in cascadePlan:
+            listOfInstrCuts = [ instrumentedCut(cut, self, self.getIndex(lvl, cut)) for cut in listOfCuts ]
+            listOfLevelPlans.append( (lvl, listOfInstrCuts, isIncremental) )
+
+        return listOfLevelPlans
+
+    def fillObject(self, index, passed, elapsed):
+        """
+        Records the evaluation of one cut on one object
+
+        index   - index of the cut, see getIndex
+        passed  - True (False) if the object passed (failed) the cut
+        elapsed - evaluation time in seconds
+        """
+
+        self.nObjEval[index] += 1
+        self.time[index] += elapsed
+        if passed:
+            self.nObjPass[index] += 1
+            self.setOfPassedThisEvt.add(index)
+
+        return
+
+    def fillMask(self, lvl, cut, maskBefore, maskAfter, offsets, elapsed):
+        """
+        Records the evaluation of one cut on all objects of a chunk, see
+        getSelectionMasks
+
+        lvl         - selection level
+        cut         - compiledCut
+        maskBefore  - numpy array of bools, the objects the cut was evaluated on
+        maskAfter   - numpy array of bools, the objects passing the cut
+        offsets     - offsets array of the chunk
+        elapsed     - evaluation time in seconds
+        """
+
+        index = self.getIndex(lvl, cut)
+        self.nObjEval[index] += np.count_nonzero(maskBefore)
+        self.nObjPass[index] += np.count_nonzero(maskAfter)
+        self.time[index] += elapsed
+
+        entries = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        self.nEvtPass[index] += len(np.unique(entries[maskAfter]))
+
+        return
+
+    def endEvent(self, numEvts=1):
+        """
+        Closes the event(s) the selection was evaluated on
+        """
+
+        self.nEvts += numEvts
+        for index in self.setOfPassedThisEvt:
+            self.nEvtPass[index] += 1
+        self.setOfPassedThisEvt.clear()
+
+        return
+
+    def add(self, other):
+        """
+        Adds the counters of the cutFlow other to the counters of self
+        """
+
+        for idx,key in enumerate(other.listOfKeys):
+            if key not in self.listOfKeys:
+                self.listOfKeys.append(key)
+                self.nObjEval.append(0)
+                self.nObjPass.append(0)
+                self.nEvtPass.append(0)
+                self.time.append(0.)
+
+            index = self.listOfKeys.index(key)
+            self.nObjEval[index] += other.nObjEval[idx]
+            self.nObjPass[index] += other.nObjPass[idx]
+            self.nEvtPass[index] += other.nEvtPass[idx]
+            self.time[index] += other.time[idx]
+        self.nEvts += other.nEvts
+
+        return
+
+    def getRank(self, index):
+        """
+        Returns the cost per rejected object of a cut, cuts with a lower rank
+        should be evaluated first
+        """
+
+        if self.nObjEval[index] == 0:
+            return 0.
+
+        timePerObj = self.time[index] / self.nObjEval[index]
+        rejection = 1. - float(self.nObjPass[index]) / self.nObjEval[index]
+
+        return timePerObj / max(rejection, 1e-6)
+
+    def reorder(self, cascadePlan):
+        """
+        Returns a copy of cascadePlan whose cuts are sorted, within each level,
+        by increasing getRank(), i.e. the cheapest and most rejecting cuts
+        first.  Cuts without recorded calls keep their relative order at the
+        front of their level.
+
+        cascadePlan - list returned by getCascadePlan
+        """
+
+        listOfLevelPlans = []
+        for lvl,listOfCuts,isIncremental in cascadePlan:
+            dict_rank = {}
+            for cut in listOfCuts:
+                key = (lvl, getCutLabel(cut))
+                dict_rank[cut.key()] = 0.
+                if key in self.listOfKeys:
+                    dict_rank[cut.key()] = self.getRank(self.listOfKeys.index(key))
+            listOfLevelPlans.append( (lvl, sorted(listOfCuts, key=lambda cut: dict_rank[cut.key()]), isIncremental) )
+
+        return listOfLevelPlans
+
+    def printTable(self):
+        """
+        Prints the cut-flow, in markdown format
+        """
+
+        print "cut-flow of %s selection, %i events"%(self.name, self.nEvts)
+        print "| level | cut | objects evaluated | objects passed | efficiency | events passed | time [s] | time per object [us] |"
+        print "| ----- | --- | ----------------- | -------------- | ---------- | ------------- | -------- | -------------------- |"
+        for lvl in selLevels:
+            for index,key in enumerate(self.listOfKeys):
+                if key[0] != lvl:
+                    continue
+
+                eff = 0.
+                timePerObj = 0.
+                if self.nObjEval[index] > 0:
+                    eff = float(self.nObjPass[index]) / self.nObjEval[index]
+                    timePerObj = 1e6 * self.time[index] / self.nObjEval[index]
+
+                print "| %s | %s | %i | %i | %f | %i | %f | %f |"%(
+                        lvl,
+                        key[1],
+                        self.nObjEval[index],
+                        self.nObjPass[index],
+                        eff,
+                        self.nEvtPass[index],
+                        self.time[index],
+                        timePerObj)
+
+        return
+
+    def writeDirectory(self, directory):
+        """
+        Writes the cut-flow of each selection level as histograms, whose bins
+        are labelled by cut, to the directory CutFlow/<name> found in, or
+        created in, directory
+
+        directory - TDirectory, e.g. an open TFile, histograms should be written too
+        """
+
+        outDir = getOrMakeDirectory(getOrMakeDirectory(directory, "CutFlow"), self.name)
+        outDir.cd()
+
+        for lvl in selLevels:
+            listOfIndices = [ index for index,key in enumerate(self.listOfKeys) if key[0] == lvl ]
+            if len(listOfIndices) == 0:
+                continue
+
+            numBins = len(listOfIndices) + 1
+            h_obj = r.TH1F("h_cutFlow_%s_obj_%s"%(self.name, lvl), "%s objects passing - %s"%(self.name, lvl), numBins, 0, numBins)
+            h_evt = r.TH1F("h_cutFlow_%s_evt_%s"%(self.name, lvl), "%s events passing - %s"%(self.name, lvl), numBins, 0, numBins)
+            h_time = r.TH1F("h_cutFlow_%s_time_%s"%(self.name, lvl), "%s evaluation time [s] - %s"%(self.name, lvl), numBins, 0, numBins)
+
+            # First bin holds the input of the level
+            for histo in (h_obj, h_evt, h_time):
+                histo.GetXaxis().SetBinLabel(1, "input")
+            h_obj.SetBinContent(1, self.nObjEval[listOfIndices[0]])
+            h_evt.SetBinContent(1, self.nEvts)
+
+            for iBin,index in enumerate(listOfIndices, 2):
+                for histo in (h_obj, h_evt, h_time):
+                    histo.GetXaxis().SetBinLabel(iBin, self.listOfKeys[index][1])
+                h_obj.SetBinContent(iBin, self.nObjPass[index])
+                h_evt.SetBinContent(iBin, self.nEvtPass[index])
+                h_time.SetBinContent(iBin, self.time[index])
+
+            h_obj.Write()
+            h_evt.Write()
+            h_time.Write()
+
+        return
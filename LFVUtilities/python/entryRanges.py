@@ -0,0 +1,55 @@
+def getClusterBoundaries(tree, firstEntry=0, lastEntry=-1):
+    """
+    Returns the sorted list of entry numbers in [firstEntry, lastEntry] at which
+    a cluster of tree begins, firstEntry and lastEntry are always included.
+    Reading a range which starts and ends on a cluster boundary never
+    decompresses a basket that is also needed by a neighbouring range.
+
+    tree        - TTree to be split
+    firstEntry  - first entry of the range of interest
+    lastEntry   - one past the last entry of the range of interest, -1 for
+                  the number of entries in tree
+    """
+
+    if lastEntry < 0 or lastEntry > tree.GetEntries():
+        lastEntry = tree.GetEntries()
+
+    listOfBoundaries = [ firstEntry ]
+    clusterIter = tree.GetClusterIterator(firstEntry)
+    clusterStart = clusterIter.Next()
+    while clusterStart < lastEntry:
+        if clusterStart > firstEntry:
+            listOfBoundaries.append(clusterStart)
+        clusterStart = clusterIter.Next()
+    listOfBoundaries.append(lastEntry)
+
+    return listOfBoundaries
+
+def splitEntryRange(tree, numChunks, firstEntry=0, lastEntry=-1):
+    """
+    Splits [firstEntry, lastEntry) of tree into at most numChunks contiguous,
+    cluster-aligned ranges of similar size.
+
+    Returns a list of tuples (firstEntry, numEntries)
+
+    tree        - TTree to be split
+    numChunks   - number of requested ranges
+    firstEntry  - first entry of the range to split
+    lastEntry   - one past the last entry of the range to split, -1 for the
+                  number of entries in tree
+    """
+
+    listOfBoundaries = getClusterBoundaries(tree, firstEntry, lastEntry)
+    firstEntry = listOfBoundaries[0]
+    lastEntry = listOfBoundaries[-1]
+    targetSize = float(lastEntry - firstEntry) / max(numChunks, 1)
+
+    listOfRanges = []
+    chunkStart = firstEntry
+    for boundary in listOfBoundaries[1:]:
+        # Close the chunk once it reaches its share of the range
+        if boundary - chunkStart >= targetSize or boundary == lastEntry:
+            listOfRanges.append( (chunkStart, boundary - chunkStart) )
+            chunkStart = boundary
+
+    return [ entryRange for entryRange in listOfRanges if entryRange[1] > 0 ]
@@ -0,0 +1,208 @@
+from LFVAnalysis.LFVObjects.physicsObject import PhysObj
+from LFVAnalysis.LFVUtilities.selectorGen import vectorToArray
+
+import os
+import Queue
+import sys
+import threading
+
+def formatTrigInfo(listOfTriggers, listOfDecisions):
+    """
+    Returns the lines of a table, in markdown format, of trigger decisions
+
+    listOfTriggers  - list of trigger names
+    listOfDecisions - list of trigger decisions, one per trigger
+    """
+
+    listOfLines = [
+            "| idx | trigName | Decision |",
+            "| --- | -------- | -------- |"
+            ]
+    for idx,trigName in enumerate(listOfTriggers):
+        listOfLines.append( "| %i | %s | %i |"%(idx, trigName, listOfDecisions[idx]) )
+
+    trigAccept = sum(listOfDecisions)
+    listOfLines.append( "trigAccept = %i"%trigAccept )
+    if trigAccept > 0:
+        listOfLines.append( "trigger selection passed" )
+
+    return listOfLines
+
+def getGenSnapshot(event):
+    """
+    Returns a dictionary holding copies of the mc_* arrays of event needed
+    by formatGenList, the event may move to another entry afterwards
+    """
+
+    return dict( (bName, vectorToArray(getattr(event, bName))) for bName in ("mc_pdgId", "mc_status", "mc_px", "mc_py", "mc_pz", "mc_energy") )
+
+def formatGenList(dict_genArrays):
+    """
+    Returns the lines of a table, in markdown format, of pdgId and 4-vectors
+    of all gen particles
+
+    dict_genArrays - dictionary returned by getGenSnapshot
+    """
+
+    listOfLines = [
+            "| pdgId | status | px | py | pz | E | pt | eta | M |",
+            "| ----- | ------ | -- | -- | -- | - | -- | --- | - |"
+            ]
+    for idx in range(0,len(dict_genArrays["mc_pdgId"])):
+        genPart = PhysObj(
+                dict_genArrays["mc_px"][idx],
+                dict_genArrays["mc_py"][idx],
+                dict_genArrays["mc_pz"][idx],
+                dict_genArrays["mc_energy"][idx],
+                dict_genArrays["mc_pdgId"][idx],
+                dict_genArrays["mc_status"][idx])
+        listOfLines.append( "| %i | %i | %f | %f | %f | %f | %f | %f | %f |"%(
+                genPart.pdgId,
+                genPart.status,
+                genPart.px(),
+                genPart.py(),
+                genPart.pz(),
+                genPart.E(),
+                genPart.pt(),
+                genPart.eta(),
+                genPart.M()) )
+
+    return listOfLines
+
+def formatCandInfo(candTuple, hvyResCand, candTupleGen=None, hvyResCandGen=None):
+    """
+    Returns the lines of the tables, in markdown format, of the daughters and
+    the hvy resonance candidate at reco, and optionally gen, level
+
+    candTuple       - tuple of the two reco daughters
+    hvyResCand      - reco hvy resonance candidate
+    candTupleGen    - Optional, tuple of the two gen daughters
+    hvyResCandGen   - Optional, gen hvy resonance candidate
+    """
+
+    listOfTables = [ ("reco info:", candTuple + (hvyResCand,)) ]
+    if candTupleGen is not None:
+        listOfTables.append( ("gen info:", candTupleGen + (hvyResCandGen,)) )
+
+    listOfLines = []
+    for title,listOfObjs in listOfTables:
+        listOfLines.append( title )
+        listOfLines.append( "| pdgId | status | charge | px | py | pz | E | pt | eta | mass |" )
+        for obj in listOfObjs:
+            listOfLines.append( "| %i | %i | %i | %f | %f | %f | %f | %f | %f | %f |"%(
+                    obj.pdgId,
+                    obj.status,
+                    obj.charge,
+                    obj.px(),
+                    obj.py(),
+                    obj.pz(),
+                    obj.E(),
+                    obj.pt(),
+                    obj.eta(),
+                    obj.M()) )
+
+    return listOfLines
+
+class eventDumper:
+    def __init__(self, fileName=None, everyNth=1, firstK=None, maxQueueSize=10000):
+        """
+        Writes diagnostic records, e.g. trigger or candidate tables, from a
+        background thread.  The event loop only pushes the formatting function
+        and its arguments to a queue, see push(), formatting and writing
+        happen on the background thread.  Records are dropped, and counted,
+        instead of blocking the event loop if the queue is full.
+
+        Events are sampled by accept(), every everyNth event is dumped up to
+        a maximum of firstK dumped events.
+
+        fileName        - physical filename records are written to, if None
+                          records are written to stdout
+        everyNth        - dump every everyNth event
+        firstK          - maximum number of dumped events, None for no limit
+        maxQueueSize    - maximum number of records waiting to be written
+        """
+
+        self.everyNth = max(1, everyNth)
+        self.firstK = firstK
+        self.numSeen = 0
+        self.numDumped = 0
+        self.numDropped = 0
+
+        self.outFile = sys.stdout
+        if fileName is not None:
+            try:
+                self.outFile = open(fileName, "w")
+            except IOError as e:
+                print "Error unable to create event dump file %s"%fileName
+                print "exception: ", e
+                print "exiting"
+                exit(os.EX_CANTCREAT)
+
+        self.queue = Queue.Queue(maxQueueSize)
+        self.thread = threading.Thread(target=self.writeRecords)
+        self.thread.daemon = True
+        self.thread.start()
+
+        return
+
+    def accept(self):
+        """
+        Returns True if the current event should be dumped, call once per event
+        """
+
+        self.numSeen += 1
+        if self.firstK is not None and self.numDumped >= self.firstK:
+            return False
+        if ((self.numSeen - 1) % self.everyNth) != 0:
+            return False
+
+        self.numDumped += 1
+        return True
+
+    def push(self, formatFunc, *args):
+        """
+        Queues a record, formatFunc(*args) is called on the background thread
+        and must return a list of lines.  args must not change after the push,
+        e.g. use getGenSnapshot for values read from the TTree.
+        """
+
+        try:
+            self.queue.put_nowait( (formatFunc, args) )
+        except Queue.Full:
+            self.numDropped += 1
+
+        return
+
+    def writeRecords(self):
+        """
+        Body of the background thread, writes queued records until close()
+        """
+
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+
+            formatFunc, args = record
+            self.outFile.write( "\n".join(formatFunc(*args)) )
+            self.outFile.write("\n")
+
+        self.outFile.flush()
+
+        return
+
+    def close(self):
+        """
+        Writes all queued records and stops the background thread
+        """
+
+        self.queue.put(None)
+        self.thread.join()
+
+        if self.outFile is not sys.stdout:
+            self.outFile.close()
+
+        if self.numDropped > 0:
+            print "event dump dropped %i records, the queue was full"%self.numDropped
+
+        return
@@ -0,0 +1,418 @@
+from LFVAnalysis.LFVUtilities.branchActivation import activateBranches
+from LFVAnalysis.LFVUtilities.columnarSelector import readJaggedChunk
+from LFVAnalysis.LFVUtilities.entryRanges import splitEntryRange
+from LFVAnalysis.LFVUtilities.preselection import getPreselectedEntries, getPreselectionFormula
+
+import json
+import numpy as np
+import os
+import ROOT as r
+
+# Index of a columnar directory written by convertToColumnar
+columnsFileName = "columns.json"
+
+def openEventSource(inputFileName, inputTreeName="IIHEAnalysis"):
+    """
+    Returns a columnarDirSource if inputFileName is a directory written by
+    convertToColumnar, a treeEventSource otherwise
+
+    inputFileName - physical filename of the input TFile or columnar directory
+    inputTreeName - name of TTree found in inputFileName, unused for directories
+    """
+
+    if os.path.isdir(inputFileName):
+        return columnarDirSource(inputFileName)
+
+    return treeEventSource(inputFileName, inputTreeName)
+
+class treeEventSource:
+    def __init__(self, inputFileName, inputTreeName="IIHEAnalysis"):
+        """
+        Event source reading a TTree.  After GetEntry() the branches of the
+        entry are read from self.event, which is the TTree itself.
+
+        inputFileName - physical filename of the input TFile
+        inputTreeName - name of TTree found in inputFileName
+        """
+
+        self.inputFileName = inputFileName
+        self.inputTreeName = inputTreeName
+        try:
+            self.dataFile = r.TFile(inputFileName, "READ", "", 1)
+            self.tree = self.dataFile.Get(inputTreeName)
+        except Exception as e:
+            print "exception occured when trying to retrive TTree %s from TFile %s"%(inputTreeName,inputFileName)
+            print "exception: ", e
+            exit(os.EX_DATAERR)
+
+        self.event = self.tree
+
+        return
+
+    def GetEntries(self):
+        return self.tree.GetEntries()
+
+    def GetEntry(self, entry):
+        return self.tree.GetEntry(entry)
+
+    def activateBranches(self, listOfBranches, printBranchInfo=False):
+        """
+        Disables every branch except those in listOfBranches, see activateBranches
+        """
+
+        return activateBranches(self.tree, listOfBranches, printBranchInfo)
+
+    def getBranchNames(self):
+        """
+        Returns the list of the names of all branches
+        """
+
+        return [ branch.GetName() for branch in self.tree.GetListOfBranches() ]
+
+    def getPreselectedEntries(self, listOfTriggers=None, listOfCountBranches=(), firstEntry=0, numEntries=-1, debug=False):
+        """
+        Returns a numpy array of the entries in [firstEntry, firstEntry + numEntries)
+        passing the logical OR of listOfTriggers and having at least one object
+        in each of listOfCountBranches, see getPreselectionFormula
+        """
+
+        formula = getPreselectionFormula(listOfTriggers, listOfCountBranches)
+        if len(formula) == 0:
+            if numEntries < 0:
+                numEntries = self.GetEntries() - firstEntry
+            return np.arange(firstEntry, firstEntry + numEntries, dtype=np.int64)
+
+        return getPreselectedEntries(self.tree, formula, firstEntry, numEntries, debug)
+
+    def getTree(self):
+        """
+        Returns the TTree of this source
+        """
+
+        return self.tree
+
+    def readJaggedChunk(self, listOfBranches, firstEntry, numEntries, debug=False):
+        """
+        Returns the tuple (dict_values, offsets) of readJaggedChunk
+        """
+
+        return readJaggedChunk(self.tree, listOfBranches, firstEntry, numEntries, debug)
+
+    def splitEntryRange(self, numChunks, firstEntry=0, lastEntry=-1):
+        """
+        Returns the list of tuples (firstEntry, numEntries) of splitEntryRange
+        """
+
+        return splitEntryRange(self.tree, numChunks, firstEntry, lastEntry)
+
+class columnarEvent:
+    def __init__(self, source, entry):
+        """
+        One entry of a columnarEventSource, branches are read as attributes,
+        e.g. event.mu_n or event.mu_ibt_pt[idx], like an entry of a TTree.
+        Per-object branches are numpy arrays, scalar branches are numbers.
+        Values are looked up on first access, the event does not change
+        when the source moves to another entry.
+
+        source  - columnarEventSource
+        entry   - entry number
+        """
+
+        self._source = source
+        self._entry = entry
+
+        return
+
+    def __getattr__(self, bName):
+        # Only reached for branches not yet read, the value is then stored on the event
+        if bName.startswith("_") or "_source" not in self.__dict__ or not self._source.hasBranch(bName):
+            raise AttributeError(bName)
+
+        value = self._source.getValue(bName, self._entry)
+        setattr(self, bName, value)
+
+        return value
+
+class columnarEventSource:
+    def __init__(self, dict_columns, dict_offsets=None, inputFileName=None):
+        """
+        Event source reading numpy arrays, e.g. in memory or memory-mapped
+        from disk.  After GetEntry() the branches of the entry are read from
+        self.event, a columnarEvent.
+
+        Each per-object branch is a flat array of the values of all objects of
+        all entries, the objects of entry i are found at [offsets[i], offsets[i+1])
+        of the values.  Branches of the same collection may share one offsets
+        array.  Any other branch is a scalar branch, one value per entry.
+
+        dict_columns    - dictionary of branch name -> numpy array of values
+        dict_offsets    - dictionary of branch name -> numpy array of offsets,
+                          one more than the number of entries, for per-object
+                          branches
+        inputFileName   - Optional, physical filename the columns were read
+                          from, e.g. to key a selectionCache
+        """
+
+        self.dict_columns = dict_columns
+        self.dict_offsets = {}
+        if dict_offsets is not None:
+            self.dict_offsets = dict_offsets
+        self.inputFileName = inputFileName
+
+        self.numEntries = 0
+        for bName,values in dict_columns.iteritems():
+            if bName in self.dict_offsets:
+                self.numEntries = len(self.dict_offsets[bName]) - 1
+            else:
+                self.numEntries = len(values)
+            break
+
+        self.event = None
+
+        return
+
+    def __getstate__(self):
+        # The current entry stays with the process which read it
+        dict_state = dict(self.__dict__)
+        dict_state["event"] = None
+        return dict_state
+
+    def GetEntries(self):
+        return self.numEntries
+
+    def GetEntry(self, entry):
+        self.event = columnarEvent(self, entry)
+        return 1
+
+    def activateBranches(self, listOfBranches, printBranchInfo=False):
+        """
+        Columns are only read when accessed, nothing needs to be disabled.
+        Returns the list of names of the branches not in listOfBranches.
+        """
+
+        setOfActive = set(listOfBranches)
+        listOfPruned = [ bName for bName in self.getBranchNames() if bName not in setOfActive ]
+
+        if printBranchInfo:
+            numBranches = len(self.getBranchNames())
+            print "%i of %i branches read, columns are read on access"%(numBranches - len(listOfPruned), numBranches)
+
+        return listOfPruned
+
+    def getBranchNames(self):
+        """
+        Returns the list of the names of all branches
+        """
+
+        return sorted(self.dict_columns.keys())
+
+    def hasBranch(self, bName):
+        """
+        Returns True if this source holds branch bName
+        """
+
+        return bName in self.dict_columns
+
+    def getValue(self, bName, entry):
+        """
+        Returns the value of branch bName for entry, a numpy array for
+        per-object branches and a number for scalar branches
+        """
+
+        values = self.dict_columns[bName]
+        if bName in self.dict_offsets:
+            offsets = self.dict_offsets[bName]
+            return values[offsets[entry]:offsets[entry+1]]
+
+        return values[entry].item()
+
+    def getPreselectedEntries(self, listOfTriggers=None, listOfCountBranches=(), firstEntry=0, numEntries=-1, debug=False):
+        """
+        Returns a numpy array of the entries in [firstEntry, firstEntry + numEntries)
+        passing the logical OR of listOfTriggers and having at least one object
+        in each of listOfCountBranches, see getPreselectionFormula
+        """
+
+        if numEntries < 0:
+            numEntries = self.numEntries - firstEntry
+        lastEntry = firstEntry + numEntries
+
+        mask = np.ones(numEntries, dtype=bool)
+        if listOfTriggers is not None and len(listOfTriggers) > 0:
+            trigMask = np.zeros(numEntries, dtype=bool)
+            for trigName in listOfTriggers:
+                trigMask |= (self.dict_columns[trigName][firstEntry:lastEntry] > 0)
+            mask &= trigMask
+        for bName in listOfCountBranches:
+            mask &= (self.dict_columns[bName][firstEntry:lastEntry] > 0)
+
+        listOfEntries = firstEntry + np.flatnonzero(mask)
+
+        if debug:
+            print "%i of %i entries pass preselection"%(len(listOfEntries), numEntries)
+
+        return listOfEntries
+
+    def getTree(self):
+        """
+        Returns None, a columnar source has no TTree
+        """
+
+        return None
+
+    def readJaggedChunk(self, listOfBranches, firstEntry, numEntries, debug=False):
+        """
+        Returns the tuple (dict_values, offsets) of readJaggedChunk, the values
+        are views of the columns, nothing is copied
+        """
+
+        listOfBranches = list(listOfBranches)
+        offsets = self.dict_offsets[listOfBranches[0]][firstEntry:firstEntry + numEntries + 1]
+        firstObj = offsets[0]
+        lastObj = offsets[-1]
+
+        dict_values = {}
+        for bName in listOfBranches:
+            dict_values[bName] = self.dict_columns[bName][firstObj:lastObj]
+
+        if debug:
+            print "read %i objects from entries [%i, %i)"%(lastObj - firstObj, firstEntry, firstEntry + numEntries)
+
+        return (dict_values, offsets - firstObj)
+
+    def splitEntryRange(self, numChunks, firstEntry=0, lastEntry=-1):
+        """
+        Splits [firstEntry, lastEntry) into at most numChunks contiguous ranges
+        of similar size, returns a list of tuples (firstEntry, numEntries)
+        """
+
+        if lastEntry < 0 or lastEntry > self.numEntries:
+            lastEntry = self.numEntries
+
+        listOfBoundaries = np.linspace(firstEntry, lastEntry, max(numChunks, 1) + 1).astype(np.int64).tolist()
+        listOfRanges = [ (start, stop - start) for start,stop in zip(listOfBoundaries[:-1], listOfBoundaries[1:]) ]
+
+        return [ entryRange for entryRange in listOfRanges if entryRange[1] > 0 ]
+
+class columnarDirSource(columnarEventSource):
+    def __init__(self, inputDir):
+        """
+        columnarEventSource reading a directory written by convertToColumnar.
+        Values and offsets are memory-mapped, nothing is read until accessed.
+        Bit packed std::vector<bool> branches stay packed in memory, only the
+        bytes of the entries read are unpacked.  Pickling only stores
+        inputDir, the unpickled source maps the files again, e.g. in a
+        parallel worker.
+
+        inputDir - directory holding columns.json and the column files
+        """
+
+        self.inputDir = inputDir
+
+        try:
+            with open(os.path.join(inputDir, columnsFileName), "r") as indexFile:
+                self.dict_index = json.load(indexFile)
+        except (IOError, ValueError) as e:
+            print "Error unable to read %s from columnar directory %s"%(columnsFileName, inputDir)
+            print "exception: ", e
+            print "exiting"
+            exit(os.EX_DATAERR)
+
+        dict_columns = {}
+        dict_offsets = {}
+        dict_offsetFiles = {} # offsets files shared by several branches are mapped once
+        self.dict_packed = {} # bit packed branch -> memory-mapped bytes
+        for bName,dict_branch in self.dict_index["branches"].iteritems():
+            if dict_branch["packed"]:
+                self.dict_packed[bName] = self.mapFile(dict_branch["values"], "uint8", (dict_branch["numValues"] + 7) // 8)
+            else:
+                dict_columns[bName] = self.mapFile(dict_branch["values"], dict_branch["dtype"], dict_branch["numValues"])
+            if dict_branch["offsets"] is not None:
+                if dict_branch["offsets"] not in dict_offsetFiles:
+                    dict_offsetFiles[dict_branch["offsets"]] = self.mapFile(dict_branch["offsets"], "int64", self.dict_index["numEntries"] + 1)
+                dict_offsets[bName] = dict_offsetFiles[dict_branch["offsets"]]
+
+        columnarEventSource.__init__(self, dict_columns, dict_offsets, inputDir)
+
+        self.numEntries = self.dict_index["numEntries"]
+
+        return
+
+    def __getstate__(self):
+        return { "inputDir":self.inputDir }
+
+    def __setstate__(self, dict_state):
+        self.__init__(dict_state["inputDir"])
+        return
+
+    def mapFile(self, fileName, dtype, numValues):
+        """
+        Returns a read only numpy memmap of numValues values of dtype stored in
+        fileName, a file of inputDir
+        """
+
+        if numValues == 0:
+            return np.zeros(0, dtype=dtype)
+
+        return np.memmap(os.path.join(self.inputDir, fileName), dtype=dtype, mode="r", shape=(numValues,))
+
+    def unpackValues(self, bName, firstObj, lastObj):
+        """
+        Returns the numpy bool array of the values [firstObj, lastObj) of the
+        bit packed branch bName, only the bytes holding them are unpacked
+        """
+
+        firstByte = firstObj // 8
+        lastByte = (lastObj + 7) // 8
+        bits = np.unpackbits(self.dict_packed[bName][firstByte:lastByte])
+
+        return bits[firstObj - 8 * firstByte:lastObj - 8 * firstByte].astype(np.bool_)
+
+    def getBranchNames(self):
+        """
+        Returns the list of the names of all branches
+        """
+
+        return sorted(self.dict_index["branches"].keys())
+
+    def hasBranch(self, bName):
+        """
+        Returns True if this source holds branch bName
+        """
+
+        return bName in self.dict_index["branches"]
+
+    def getValue(self, bName, entry):
+        """
+        Returns the value of branch bName for entry, see columnarEventSource.getValue
+        """
+
+        if bName in self.dict_packed:
+            offsets = self.dict_offsets[bName]
+            return self.unpackValues(bName, int(offsets[entry]), int(offsets[entry+1]))
+
+        return columnarEventSource.getValue(self, bName, entry)
+
+    def readJaggedChunk(self, listOfBranches, firstEntry, numEntries, debug=False):
+        """
+        Returns the tuple (dict_values, offsets) of readJaggedChunk, see
+        columnarEventSource.readJaggedChunk, the values of bit packed branches
+        are unpacked for the chunk only
+        """
+
+        listOfBranches = list(listOfBranches)
+        offsets = self.dict_offsets[listOfBranches[0]][firstEntry:firstEntry + numEntries + 1]
+        firstObj = int(offsets[0])
+        lastObj = int(offsets[-1])
+
+        dict_values = {}
+        for bName in listOfBranches:
+            if bName in self.dict_packed:
+                dict_values[bName] = self.unpackValues(bName, firstObj, lastObj)
+            else:
+                dict_values[bName] = self.dict_columns[bName][firstObj:lastObj]
+
+        if debug:
+            print "read %i objects from entries [%i, %i)"%(lastObj - firstObj, firstEntry, firstEntry + numEntries)
+
+        return (dict_values, offsets - firstObj)
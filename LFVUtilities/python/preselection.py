@@ -0,0 +1,63 @@
+from LFVAnalysis.LFVUtilities.columnarSelector import getDrawnValues
+
+import numpy as np
+import os
+
+# Multiplicity branch of each reco particle species, keyed by |pdgId|
+dict_countBranches = {
+        11:"gsf_n",
+        13:"mu_n",
+        15:"tau_n"
+        }
+
+def getPreselectionFormula(listOfTriggers=None, listOfCountBranches=()):
+    """
+    Returns a TTreeFormula expression requiring the logical OR of listOfTriggers
+    and at least one object in each of listOfCountBranches, or an empty string
+    if there is nothing to require
+
+    listOfTriggers      - List of trigger branch names, a logic OR is performed
+    listOfCountBranches - List of multiplicity branch names, e.g. [ "mu_n", "tau_n" ]
+    """
+
+    listOfTerms = []
+    if listOfTriggers is not None and len(listOfTriggers) > 0:
+        listOfTerms.append( "(%s)"%( "||".join( "(%s>0)"%trigName for trigName in listOfTriggers ) ) )
+    for bName in listOfCountBranches:
+        listOfTerms.append( "(%s>0)"%bName )
+
+    return "&&".join(listOfTerms)
+
+def getPreselectedEntries(tree, formula, firstEntry=0, numEntries=-1, debug=False):
+    """
+    Returns a numpy array of the entries in [firstEntry, firstEntry + numEntries)
+    of tree passing formula.  Only the branches appearing in formula are read.
+
+    tree        - TTree to preselect
+    formula     - TTreeFormula expression, e.g. from getPreselectionFormula
+    firstEntry  - first entry to consider
+    numEntries  - number of entries to consider, -1 for all
+    debug       - If true prints additional debugging information
+    """
+
+    if numEntries < 0:
+        numEntries = tree.GetEntries() - firstEntry
+    if numEntries <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    tree.SetEstimate(numEntries + 1)
+    numRows = tree.Draw("Entry$", formula, "goff", numEntries, firstEntry)
+    if numRows < 0:
+        print "Error evaluating preselection:"
+        print ""
+        print formula
+        print ""
+        print "exiting"
+        exit(os.EX_DATAERR)
+
+    listOfEntries = getDrawnValues(tree, 0, numRows).astype(np.int64)
+
+    if debug:
+        print "%i of %i entries pass preselection %s"%(numRows, numEntries, formula)
+
+    return listOfEntries
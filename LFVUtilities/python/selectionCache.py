@@ -0,0 +1,216 @@
+from LFVAnalysis.LFVUtilities.columnarSelector import evaluateSelectionMasks, readSelectionChunk
+from LFVAnalysis.LFVUtilities.utilities import selLevels
+
+import hashlib
+import numpy as np
+import os
+import re
+import shutil
+import time
+
+# Default eviction limits of the cache
+defaultMaxSize = 2 * 1024**3        # bytes
+defaultMaxAge = 30 * 24 * 3600.     # seconds
+
+# Names of the entries of the cache, see getKey() and store(), nothing else is evicted
+entryNamePattern = re.compile(r"^[0-9a-f]{40}(\.tmp[0-9]+)?$")
+
+class selectionCache:
+    def __init__(self, cacheDir, inputFileName, inputTreeName, maxSize=defaultMaxSize, maxAge=defaultMaxAge):
+        """
+        Sidecar cache of the selection masks returned by getSelectionMasks.
+        Each entry is a directory holding one .npy file per selection level and
+        the offsets, loaded memory-mapped.  Entries are keyed by the identity of
+        the input file (path, size and modification time), the compiled
+        selection and the range of entries, any change of these gives a new key.
+
+        Entries unused for longer than maxAge are evicted when the cache is
+        opened, afterwards the least recently used entries are evicted until
+        the cache is smaller than maxSize.  Only directories named like the
+        entries of the cache are evicted, other content of cacheDir is kept.
+
+        cacheDir        - directory holding the cache, created if needed
+        inputFileName   - physical filename of the TFile the masks are computed from
+        inputTreeName   - name of the TTree found in inputFileName
+        maxSize         - maximum size of the cache in bytes, None for no limit
+        maxAge          - maximum time in seconds since an entry was last used,
+                          None for no limit
+        """
+
+        self.cacheDir = cacheDir
+        self.maxSize = maxSize
+        self.maxAge = maxAge
+
+        if not os.path.isdir(cacheDir):
+            try:
+                os.makedirs(cacheDir)
+            except OSError:
+                if not os.path.isdir(cacheDir): # Not created by another process
+                    print "Error unable to create cache directory %s"%cacheDir
+                    print "exiting"
+                    exit(os.EX_CANTCREAT)
+
+        fileStat = os.stat(inputFileName)
+        self.fileId = "%s:%s:%i:%f"%(os.path.realpath(inputFileName), inputTreeName, fileStat.st_size, fileStat.st_mtime)
+
+        self.evict()
+
+        return
+
+    def getKey(self, dict_cuts, firstEntry, numEntries):
+        """
+        Returns the key of the masks of dict_cuts for entries
+        [firstEntry, firstEntry + numEntries) of the input file
+
+        dict_cuts   - dictionary returned by compileSelectionLevels
+        firstEntry  - first entry of the chunk
+        numEntries  - number of entries in the chunk
+        """
+
+        selectionId = repr([ (lvl, sorted( cut.key() for cut in dict_cuts[lvl] )) for lvl in selLevels ])
+
+        return hashlib.sha1("%s|%s|%i|%i"%(self.fileId, selectionId, firstEntry, numEntries)).hexdigest()
+
+    def load(self, key):
+        """
+        Returns the tuple (dict_masks, offsets) stored under key, see
+        getSelectionMasks, or None if key is not in the cache
+        """
+
+        entryDir = os.path.join(self.cacheDir, key)
+        if not os.path.isdir(entryDir):
+            return None
+
+        try:
+            offsets = np.load(os.path.join(entryDir, "offsets.npy"), mmap_mode="r")
+            dict_masks = {}
+            for lvl in selLevels:
+                dict_masks[lvl] = np.load(os.path.join(entryDir, "%s.npy"%lvl), mmap_mode="r")
+            os.utime(entryDir, None) # Mark as recently used
+        except (IOError, OSError, ValueError):
+            return None # Evicted or incomplete, recompute
+
+        return (dict_masks, offsets)
+
+    def store(self, key, dict_masks, offsets):
+        """
+        Stores the masks and offsets returned by getSelectionMasks under key.
+        The entry is written to a temporary directory which is renamed once
+        complete, concurrent writers of the same key are safe.
+        """
+
+        entryDir = os.path.join(self.cacheDir, key)
+        tmpDir = "%s.tmp%i"%(entryDir, os.getpid())
+        try:
+            os.mkdir(tmpDir)
+            np.save(os.path.join(tmpDir, "offsets.npy"), offsets)
+            for lvl in selLevels:
+                np.save(os.path.join(tmpDir, "%s.npy"%lvl), dict_masks[lvl])
+            os.rename(tmpDir, entryDir)
+        except OSError:
+            # Another process stored the same key first, or the cache is not writable
+            shutil.rmtree(tmpDir, True)
+
+        return
+
+    def evict(self):
+        """
+        Removes the entries unused for longer than maxAge, then the least
+        recently used entries until the cache is smaller than maxSize.  Files
+        and directories not named like an entry, or a leftover of store(), are
+        neither removed nor counted
+        """
+
+        listOfEntries = []  # (last used, size, path)
+        for name in os.listdir(self.cacheDir):
+            entryDir = os.path.join(self.cacheDir, name)
+            if not (entryNamePattern.match(name) and os.path.isdir(entryDir)):
+                continue
+            try:
+                size = sum( os.path.getsize(os.path.join(entryDir, fileName)) for fileName in os.listdir(entryDir) )
+                listOfEntries.append( (os.path.getmtime(entryDir), size, entryDir) )
+            except OSError:
+                continue # Removed by another process
+
+        now = time.time()
+        totalSize = sum( size for lastUsed,size,entryDir in listOfEntries )
+        for lastUsed,size,entryDir in sorted(listOfEntries):
+            tooOld = (self.maxAge is not None and (now - lastUsed) > self.maxAge)
+            tooLarge = (self.maxSize is not None and totalSize > self.maxSize)
+            if not (tooOld or tooLarge):
+                continue
+
+            shutil.rmtree(entryDir, True)
+            totalSize -= size
+
+        return
+
+def getCachedSelectionMasks(tree, dict_cuts, firstEntry, numEntries, cache=None, cutFlow=None, debug=False, cascadePlan=None):
+    """
+    Returns the tuple (dict_masks, offsets) of getSelectionMasks, read from
+    cache if present and computed and stored in cache otherwise.  Entries
+    read from cache are not counted by cutFlow, lfvAnalyzer.analyze() does
+    not record cut-flows together with a cache.
+
+    tree        - TTree or event source to read from
+    dict_cuts   - dictionary returned by compileSelectionLevels
+    firstEntry  - first entry of the chunk
+    numEntries  - number of entries in the chunk
+    cache       - selectionCache of the file of tree, None to always compute
+    cutFlow     - Optional, see getSelectionMasks
+    debug       - If true prints additional debugging information
+    cascadePlan - Optional, see getSelectionMasks, the masks do not depend
+                  on the order of the cuts
+    """
+
+    return getSharedSelectionMasks(tree, [ dict_cuts ], firstEntry, numEntries, cache, [ cutFlow ], debug, [ cascadePlan ])[0]
+
+def getSharedSelectionMasks(tree, listOfCutDicts, firstEntry, numEntries, cache=None, listOfCutFlows=None, debug=False, listOfCascadePlans=None):
+    """
+    Returns the list of the tuples (dict_masks, offsets) of
+    getCachedSelectionMasks, one per selection of listOfCutDicts, e.g. the
+    selections of one physics object of several selection variants.  The
+    branches of all selections not read from cache are read once.
+
+    tree                - TTree or event source to read from
+    listOfCutDicts      - list of dictionaries returned by compileSelectionLevels,
+                          all selecting the same physics object
+    firstEntry          - first entry of the chunk
+    numEntries          - number of entries in the chunk
+    cache               - selectionCache of the file of tree, None to always compute
+    listOfCutFlows      - Optional, list of the cutFlow, or None, of each selection
+    debug               - If true prints additional debugging information
+    listOfCascadePlans  - Optional, list of the cascade plan, or None, of each
+                          selection, see getSelectionMasks
+    """
+
+    numSelections = len(listOfCutDicts)
+    if listOfCutFlows is None:
+        listOfCutFlows = [ None ] * numSelections
+    if listOfCascadePlans is None:
+        listOfCascadePlans = [ None ] * numSelections
+
+    listOfResults = [ None ] * numSelections
+    listOfKeys = [ None ] * numSelections
+    if cache is not None:
+        for idx,dict_cuts in enumerate(listOfCutDicts):
+            listOfKeys[idx] = cache.getKey(dict_cuts, firstEntry, numEntries)
+            listOfResults[idx] = cache.load(listOfKeys[idx])
+            if debug and listOfResults[idx] is not None:
+                print "selection masks of entries [%i, %i) read from cache"%(firstEntry, firstEntry + numEntries)
+
+    listOfMissing = [ idx for idx in range(numSelections) if listOfResults[idx] is None ]
+    if len(listOfMissing) == 0:
+        return listOfResults
+
+    # Each branch is read once, regardless of how many selections use it
+    listOfBranches = sorted(set( cut.bName for idx in listOfMissing for lvl in selLevels for cut in listOfCutDicts[idx][lvl] ))
+    dict_values, offsets = readSelectionChunk(tree, listOfBranches, firstEntry, numEntries, debug)
+
+    for idx in listOfMissing:
+        dict_masks = evaluateSelectionMasks(dict_values, offsets, listOfCutDicts[idx], listOfCutFlows[idx], listOfCascadePlans[idx])
+        if cache is not None:
+            cache.store(listOfKeys[idx], dict_masks, offsets)
+        listOfResults[idx] = (dict_masks, offsets)
+
+    return listOfResults
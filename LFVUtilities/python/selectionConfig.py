@@ -0,0 +1,35 @@
+class selectionConfig:
+    def __init__(self, name, elSelection=None, muonSelection=None, tauSelection=None, useGlobalMuonTrack=None):
+        """
+        Named variant of the reco level selection, analyzed by lfvAnalyzer in
+        the same pass over the events as its nominal selection, see
+        lfvAnalyzer.setSelectionConfigs.  The histograms and cut-flows of the
+        variant are written to the subdirectory name of the output file.
+
+        name                - name of the configuration and of its output directory
+        elSelection         - dictionary of electron selection levels, see
+                              selectorEl.elSelection, None for the nominal one
+        muonSelection       - dictionary of muon selection levels, see
+                              selectorMuon.muonSelection, None for the nominal one
+        tauSelection        - dictionary of tau selection levels, see
+                              selectorTau.tauSelection, None for the nominal one
+        useGlobalMuonTrack  - use the global instead of the inner track of muons,
+                              None for the setting of the nominal selection
+        """
+
+        self.name = name
+        self.elSelection = elSelection
+        self.muonSelection = muonSelection
+        self.tauSelection = tauSelection
+        self.useGlobalMuonTrack = useGlobalMuonTrack
+
+        return
+
+    def __eq__(self, other):
+        return isinstance(other, selectionConfig) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return "selectionConfig(%r)"%self.name
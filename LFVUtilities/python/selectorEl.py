@@ -1,5 +1,8 @@
 from LFVAnalysis.LFVObjects.electron import Electron
-from LFVAnalysis.LFVUtilities.utilities import passesCut, selLevels, supOperators
+from LFVAnalysis.LFVUtilities.cascadeSelector import getCascadedSelection
+from LFVAnalysis.LFVUtilities.cutCompiler import compileSelection
+from LFVAnalysis.LFVUtilities.utilities import selLevels, supOperators
+from LFVAnalysis.LFVUtilities.vectorBool import vectorBoolCache
 from LFVAnalysis.LFVUtilities.nesteddict import nesteddict
 
 import math as m
@@ -31,6 +34,40 @@ for bName,cutTuple in elSelection["kin"].iteritems():
 for bName,cutTuple in elSelection["kinId"].iteritems():
     elSelection["kinIdIso"][bName] = cutTuple
 
+# Branches read by makeElectron
+elBranches = [
+        "gsf_charge",
+        "gsf_dxy",
+        "gsf_dz",
+        "gsf_energy",
+        "gsf_px",
+        "gsf_py",
+        "gsf_pz"
+        ]
+
+def makeElectron(event, idx):
+    """
+    Returns an Electron built from the idx^th electron of event
+
+    event             - entry of a TTree
+    idx               - index of the electron in event
+    """
+
+    # Make the Electron
+    thisElectron = Electron(
+                event.gsf_px[idx],
+                event.gsf_py[idx],
+                event.gsf_pz[idx],
+                event.gsf_energy[idx]
+            )
+
+    # Store Other Properties
+    thisElectron.charge = event.gsf_charge[idx]
+    thisElectron.dxy = event.gsf_dxy[idx]
+    thisElectron.dz = event.gsf_dz[idx]
+
+    return thisElectron
+
 def getSelectedElectrons(event, selDict, numElectrons, delim="-", listOfBranchNames=None, debug=False):
     """
     Returns a list of Electrons passing selection defined in selDict 
@@ -45,6 +82,10 @@ def getSelectedElectrons(event, selDict, numElectrons, delim="-", listOfBranchNa
                               ["pt"]  = ( 10, "g")
                               ["eta"] = ( 2.4, "fabs-le")
 
+                        selDict may also be the list of compiledCut returned by
+                        compileSelection(selDict), in which case no validation or
+                        string parsing is performed here
+
     numElectrons      - Number of Electrons in event
     delim             - Character which delimites the string portion of the tuple
                         value stored in selDict
@@ -53,17 +94,21 @@ def getSelectedElectrons(event, selDict, numElectrons, delim="-", listOfBranchNa
     debug             - If true prints additional debugging information
     """
 
-    # Determine the list of branches
-    if listOfBranchNames is None:
-        listOfBranchNames = [branch.GetName() for branch in event.GetListOfBranches() ]
+    # Compile the selection unless the caller already did
+    listOfCuts = selDict
+    if isinstance(selDict, dict):
+        # Determine the list of branches
+        if listOfBranchNames is None:
+            listOfBranchNames = [branch.GetName() for branch in event.GetListOfBranches() ]
+        listOfCuts = compileSelection(selDict, delim, listOfBranchNames)
 
     # Consistency Check on length
-    if numElectrons != len( getattr(event, selDict.keys()[0])):
+    if numElectrons != len( getattr(event, listOfCuts[0].bName)):
         if debug:
             print "numElectrons = %i"%(numElectrons)
-            print "Error numElectrons != length of branch %s"%(selDict.keys()[0])
-            print "Resetting numElectrons to %i, undefined behavior may occur!!!"%(len( getattr(event, selDict.keys()[0])))
-        numElectrons = len( getattr(event, selDict.keys()[0]))
+            print "Error numElectrons != length of branch %s"%(listOfCuts[0].bName)
+            print "Resetting numElectrons to %i, undefined behavior may occur!!!"%(len( getattr(event, listOfCuts[0].bName)))
+        numElectrons = len( getattr(event, listOfCuts[0].bName))
     
     # Loop Over physics objects in the event
     if debug:
@@ -71,42 +116,24 @@ def getSelectedElectrons(event, selDict, numElectrons, delim="-", listOfBranchNa
         print "| idx | px | py | pz | E |"
         print "| --- | -- | -- | -- | - |"
     
+    # Look up each branch once per event instead of once per object
+    bits = vectorBoolCache(event)
+    listOfCutBranches = bits.getBranches(listOfCuts, bitRefBranches)
+
     ret_electrons = []
     for idx in range(0,numElectrons):
         electronPassedAllCuts = 1
 
         # Loop Over Cuts
-        for bName,cutTuple in selDict.iteritems():
-            if bName in listOfBranchNames:
-                bVal = (getattr( event, bName))[idx]
-                if bName in bitRefBranches:
-                    bVal =  r.getValFromVectorBool( getattr( event, bName), idx)
-                electronPassedAllCuts *= passesCut( bVal, cutTuple[0], cutTuple[1].split(delim) )
-                if electronPassedAllCuts == 0:
-                    break #Exit cut loop, one cut failed
-            else:
-                print "Error branch %s not found in listOfBranchNames"%bName
-                print "Please cross-check, the available list of branches:"
-                print ""
-                print listOfBranchNames
-                print ""
-                print "exiting"
-                exit(os.EX_USAGE)
+        for branch,passes in listOfCutBranches:
+            if not passes(branch[idx]):
+                electronPassedAllCuts = 0
+                break #Exit cut loop, one cut failed
 
         # Check if selection passed, if so append an electron to the list
         if electronPassedAllCuts == True:
             # Make the Electron
-            thisElectron = Electron(
-                        event.gsf_px[idx],
-                        event.gsf_py[idx],
-                        event.gsf_pz[idx],
-                        event.gsf_energy[idx]
-                    )
-
-            # Store Other Properties
-            thisElectron.charge = event.gsf_charge[idx]
-            thisElectron.dxy = event.gsf_dxy[idx]
-            thisElectron.dz = event.gsf_dz[idx]
+            thisElectron = makeElectron(event, idx)
 
             if debug:
                 print "| %i | %f | %f | %f | %f |"%(idx, thisElectron.px(), thisElectron.py(), thisElectron.pz(), thisElectron.E())
@@ -115,3 +142,30 @@ def getSelectedElectrons(event, selDict, numElectrons, delim="-", listOfBranchNa
             ret_electrons.append(thisElectron)
 
     return ret_electrons
+
+def getSelectedElectronsCascade(event, cascadePlan, numElectrons, debug=False, bits=None, dict_objects=None):
+    """
+    Returns a dictionary whose keys are the selection levels and whose values
+    are the lists of Electrons passing each level.  Levels are evaluated in
+    order on the survivors of the previous level, see getCascadePlan, and
+    the Electrons are shared between levels.
+
+    event             - entry of a TTree
+    cascadePlan       - list returned by getCascadePlan, e.g. for the compiled
+                        levels of elSelection
+    numElectrons      - Number of Electrons in event
+    debug             - If true prints additional debugging information
+    bits              - Optional, vectorBoolCache of event, e.g. shared by several selections
+    dict_objects      - Optional, Electrons of event already built, see getCascadedSelection
+    """
+
+    # Consistency Check on length
+    bName = cascadePlan[0][1][0].bName
+    if numElectrons != len( getattr(event, bName)):
+        if debug:
+            print "numElectrons = %i"%(numElectrons)
+            print "Error numElectrons != length of branch %s"%(bName)
+            print "Resetting numElectrons to %i, undefined behavior may occur!!!"%(len( getattr(event, bName)))
+        numElectrons = len( getattr(event, bName))
+
+    return getCascadedSelection(event, cascadePlan, numElectrons, bitRefBranches, lambda idx: makeElectron(event, idx), bits, dict_objects)
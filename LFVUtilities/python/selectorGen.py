@@ -0,0 +1,93 @@
+from LFVAnalysis.LFVObjects.physicsObject import PhysObj
+
+import numpy as np
+
+# numpy types of the std::vector value types found in the ntuples
+dict_vectorTypes = {
+        "bool":np.bool_,
+        "char":np.int8,
+        "double":np.float64,
+        "float":np.float32,
+        "int":np.int32,
+        "long":np.int64,
+        "short":np.int16,
+        "unsigned char":np.uint8,
+        "unsigned int":np.uint32,
+        "unsigned short":np.uint16
+        }
+
+# Status codes of the gen particles selected by default, 23 is the outgoing
+# particle of the hardest subprocess
+defaultGenStatusCodes = (23,)
+
+def vectorToArray(vec):
+    """
+    Returns a numpy array holding a copy of the elements of the std::vector
+    vec.  The contiguous data of the vector is read at once where the value
+    type is known, otherwise the vector is iterated over.
+
+    vec - std::vector, e.g. the value of a TBranch, or numpy array, e.g. the
+          value of a branch of a columnarEvent
+    """
+
+    if isinstance(vec, np.ndarray):
+        return np.array(vec)
+
+    numElements = vec.size()
+    valueType = type(vec).__name__
+    valueType = valueType[valueType.find("<")+1:valueType.rfind(">")].strip()
+
+    # std::vector<bool> is bit packed and has no contiguous data
+    if valueType in dict_vectorTypes and valueType != "bool" and numElements > 0:
+        buf = vec.data()
+        if hasattr(buf, "SetSize"):
+            buf.SetSize(numElements)
+        else:
+            buf.reshape((numElements,))
+        return np.array(np.frombuffer(buf, dtype=dict_vectorTypes[valueType], count=numElements))
+
+    return np.fromiter(vec, dtype=np.float64, count=numElements)
+
+def makeGenParticle(event, idx):
+    """
+    Returns a PhysObj built from the idx^th gen particle of event
+
+    event   - entry of a TTree
+    idx     - index of the gen particle in event
+    """
+
+    genPart = PhysObj(
+            event.mc_px[idx],
+            event.mc_py[idx],
+            event.mc_pz[idx],
+            event.mc_energy[idx],
+            event.mc_pdgId[idx],
+            event.mc_status[idx]
+            )
+    genPart.charge = event.mc_charge[idx]
+
+    return genPart
+
+def getSelectedGenParticles(event, listOfPdgIds, listOfStatusCodes=defaultGenStatusCodes):
+    """
+    Returns a dictionary whose keys are |pdgId| and whose values are the lists
+    of gen particles of event with this |pdgId| passing the selection, in the
+    order of the mc_* branches.  The selection is evaluated on the mc_pdgId
+    and mc_status arrays, PhysObj are only built for selected particles.
+
+    event             - entry of a TTree
+    listOfPdgIds      - list of selected |pdgId|, e.g. [13, 15]
+    listOfStatusCodes - list of selected status codes
+    """
+
+    absPdgIds = np.abs(vectorToArray(event.mc_pdgId))
+    mask = np.in1d(absPdgIds, listOfPdgIds) & np.in1d(vectorToArray(event.mc_status), listOfStatusCodes)
+
+    dict_genParts = {}
+    for idx in np.flatnonzero(mask).tolist():
+        absPdgId = int(absPdgIds[idx])
+        if absPdgId not in dict_genParts:
+            dict_genParts[absPdgId] = []
+        dict_genParts[absPdgId].append(makeGenParticle(event, idx))
+
+    return dict_genParts
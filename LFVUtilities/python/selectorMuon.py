@@ -1,5 +1,8 @@
 from LFVAnalysis.LFVObjects.muon import Muon 
-from LFVAnalysis.LFVUtilities.utilities import passesCut, selLevels, supOperators
+from LFVAnalysis.LFVUtilities.cascadeSelector import getCascadedSelection
+from LFVAnalysis.LFVUtilities.cutCompiler import compileSelection
+from LFVAnalysis.LFVUtilities.utilities import selLevels, supOperators
+from LFVAnalysis.LFVUtilities.vectorBool import vectorBoolCache
 from LFVAnalysis.LFVUtilities.nesteddict import nesteddict
 
 import math as m
@@ -13,7 +16,7 @@ bitRefBranches = [
         "mu_isMediumMuon",
         "mu_isPFMuon",
         "mu_isSoftMuon",
-        "mu_isStandAloneMuon"
+        "mu_isStandAloneMuon",
         "mu_isTightMuon",
         "mu_isTrackerMuon"
         ]
@@ -42,6 +45,134 @@ muonSelection["kinIdIso"]["mu_isoTrackerBased03"] = (0.1, "l" )
 for bName,cutTuple in muonSelection["kinId"].iteritems():
     muonSelection["kinIdIso"][bName] = cutTuple
 
+# Branches read by makeMuon
+muonBranches = [
+        "mu_ibt_charge",
+        "mu_ibt_dxy",
+        "mu_ibt_dz",
+        "mu_ibt_normalizedChi2",
+        "mu_ibt_px",
+        "mu_ibt_py",
+        "mu_ibt_pz",
+        "mu_isGlobalMuon",
+        "mu_isHighPtMuon",
+        "mu_isLooseMuon",
+        "mu_isMediumMuon",
+        "mu_isPFMuon",
+        "mu_isSoftMuon",
+        "mu_isStandAloneMuon",
+        "mu_isTightMuon",
+        "mu_isTrackerMuon",
+        "mu_isoTrackerBased03",
+        "mu_numberOfMatchedStations",
+        "mu_numberOfValidPixelHits",
+        "mu_trackerLayersWithMeasurement"
+        ]
+
+# Additional branches read by makeMuon when useGlobalTrack is true
+muonGlobalTrackBranches = [
+        "mu_gt_charge",
+        "mu_gt_dxy",
+        "mu_gt_dz",
+        "mu_gt_normalizedChi2",
+        "mu_gt_px",
+        "mu_gt_py",
+        "mu_gt_pz"
+        ]
+
+def makeMuon(event, idx, useGlobalTrack=False, bits=None):
+    """
+    Returns a Muon built from the idx^th muon of event
+
+    event             - entry of a TTree
+    idx               - index of the muon in event
+    useGlobalTrack    - If true (false) stores the global (ibt) track info
+    bits              - Optional, vectorBoolCache of event, pass the same cache
+                        for all muons of an event to unpack the mu_is*Muon
+                        branches once per event
+    """
+
+    if bits is None:
+        bits = vectorBoolCache(event)
+
+    # Determine Energy for 4-vector
+    energy = m.sqrt( event.mu_ibt_px[idx]**2 + 
+                     event.mu_ibt_py[idx]**2 +
+                     event.mu_ibt_pz[idx]**2 +
+                     0.1056583745**2)
+
+    # Make the Muon
+    thisMuon = Muon(event.mu_ibt_px[idx],
+                    event.mu_ibt_py[idx],
+                    event.mu_ibt_pz[idx],
+                    energy)
+
+    thisMuon.charge = event.mu_ibt_charge[idx]
+
+    # Store impact parameters
+    thisMuon.dxy = event.mu_ibt_dxy[idx]
+    thisMuon.dz = event.mu_ibt_dz[idx]
+
+    # track fit info
+    thisMuon.normChi2 = event.mu_ibt_normalizedChi2[idx]
+
+    if useGlobalTrack:
+        # Determine Energy for 4-vector using the global track instead
+        energy = m.sqrt( event.mu_gt_px[idx]**2 + 
+                         event.mu_gt_py[idx]**2 +
+                         event.mu_gt_pz[idx]**2 +
+                         0.1056583745**2)
+
+        # Update the four-vector
+        thisMuon.setPxPyPzE(event.mu_gt_px[idx],
+                        event.mu_gt_py[idx],
+                        event.mu_gt_pz[idx],
+                        energy)
+
+        # Store charge from global track instead
+        thisMuon.charge = event.mu_gt_charge[idx]
+
+        # Store impact parameters from global track instead
+        thisMuon.dxy = event.mu_gt_dxy[idx]
+        thisMuon.dz = event.mu_gt_dz[idx]
+
+        # track fit info
+        thisMuon.normChi2 = event.mu_gt_normalizedChi2[idx]
+
+    # Store Other Properties
+
+    # Try getting muon type using boost python (doesn't work...), curse you std::vector<bool>
+    #import pluginvectorBoolParser # From LFVUtilities/plugins
+    #boolParser = pluginvectorBoolParser.parseVectorBool()
+    #thisMuon.isGlobal     = boolParser.parse(event.mu_isGlobalMuon, idx)
+    #thisMuon.isHighPt     = boolParser.parse(event.mu_isHighPtMuon, idx)
+    #thisMuon.isLoose      = boolParser.parse(event.mu_isLooseMuon, idx)
+    #thisMuon.isMedium     = boolParser.parse(event.mu_isMediumMuon, idx)
+    #thisMuon.isPF         = boolParser.parse(event.mu_isPFMuon, idx)
+    #thisMuon.isSoft       = boolParser.parse(event.mu_isSoftMuon, idx)
+    #thisMuon.isStandAlone = boolParser.parse(event.mu_isStandAloneMuon, idx)
+    #thisMuon.isTight      = boolParser.parse(event.mu_isTightMuon, idx)
+    #thisMuon.isTracker    = boolParser.parse(event.mu_isTrackerMuon, idx)
+
+    # Get muon type from the unpacked std::vector<bool> branches, see vectorBoolCache
+    thisMuon.isGlobal     = bool(bits.get("mu_isGlobalMuon")[idx])
+    thisMuon.isHighPt     = bool(bits.get("mu_isHighPtMuon")[idx])
+    thisMuon.isLoose      = bool(bits.get("mu_isLooseMuon")[idx])
+    thisMuon.isMedium     = bool(bits.get("mu_isMediumMuon")[idx])
+    thisMuon.isPF         = bool(bits.get("mu_isPFMuon")[idx])
+    thisMuon.isSoft       = bool(bits.get("mu_isSoftMuon")[idx])
+    thisMuon.isStandAlone = bool(bits.get("mu_isStandAloneMuon")[idx])
+    thisMuon.isTight      = bool(bits.get("mu_isTightMuon")[idx])
+    thisMuon.isTracker    = bool(bits.get("mu_isTrackerMuon")[idx])
+
+    thisMuon.isoTrackerBased03 = event.mu_isoTrackerBased03[idx]
+
+    thisMuon.numHitsPix = event.mu_numberOfValidPixelHits[idx]
+    thisMuon.numHitsTrk = event.mu_trackerLayersWithMeasurement[idx]
+    thisMuon.numMatchedMuStations = event.mu_numberOfMatchedStations[idx]
+
+    return thisMuon
+
 def getSelectedMuons(event, selDict, numMuons, delim="-", listOfBranchNames=None, useGlobalTrack=False, debug=False):
     """
     Returns a list of Muons passing selection defined in selDict 
@@ -56,6 +187,10 @@ def getSelectedMuons(event, selDict, numMuons, delim="-", listOfBranchNames=None
                               ["pt"]  = ( 10, "g")
                               ["eta"] = ( 2.4, "fabs-le")
 
+                        selDict may also be the list of compiledCut returned by
+                        compileSelection(selDict), in which case no validation or
+                        string parsing is performed here
+
     numMouns          - Number of Muons in event
     delim             - Character which delimites the string portion of the tuple
                         value stored in selDict
@@ -65,17 +200,21 @@ def getSelectedMuons(event, selDict, numMuons, delim="-", listOfBranchNames=None
     debug             - If true prints additional debugging information
     """
 
-    # Determine the list of branches
-    if listOfBranchNames is None:
-        listOfBranchNames = [branch.GetName() for branch in event.GetListOfBranches() ]
+    # Compile the selection unless the caller already did
+    listOfCuts = selDict
+    if isinstance(selDict, dict):
+        # Determine the list of branches
+        if listOfBranchNames is None:
+            listOfBranchNames = [branch.GetName() for branch in event.GetListOfBranches() ]
+        listOfCuts = compileSelection(selDict, delim, listOfBranchNames)
 
     # Consistency Check on length
-    if numMuons != len( getattr(event, selDict.keys()[0])):
+    if numMuons != len( getattr(event, listOfCuts[0].bName)):
         if debug:
             print "numMuons = %i"%(numMuons)
-            print "Error numMuons != length of branch %s"%(selDict.keys()[0])
-            print "Resetting numMuons to %i, undefined behavior may occur!!!"%(len( getattr(event, selDict.keys()[0])))
-        numMuons = len( getattr(event, selDict.keys()[0]))
+            print "Error numMuons != length of branch %s"%(listOfCuts[0].bName)
+            print "Resetting numMuons to %i, undefined behavior may occur!!!"%(len( getattr(event, listOfCuts[0].bName)))
+        numMuons = len( getattr(event, listOfCuts[0].bName))
 
     # Loop Over physics objects in the event
     if debug:
@@ -83,108 +222,24 @@ def getSelectedMuons(event, selDict, numMuons, delim="-", listOfBranchNames=None
         print "| idx | px | py | pz | E |"
         print "| --- | -- | -- | -- | - |"
     
+    # Look up each branch once per event instead of once per object
+    bits = vectorBoolCache(event)
+    listOfCutBranches = bits.getBranches(listOfCuts, bitRefBranches)
+
     ret_muons = []
     for idx in range(0,numMuons):
         muonPassedAllCuts = 1
 
         # Loop Over Cuts
-        for bName,cutTuple in selDict.iteritems():
-            if bName in listOfBranchNames:
-                bVal = (getattr( event, bName))[idx]
-                if bName in bitRefBranches:
-                    bVal =  r.getValFromVectorBool( getattr( event, bName), idx)
-                muonPassedAllCuts *= passesCut( bVal, cutTuple[0], cutTuple[1].split(delim) )
-                if muonPassedAllCuts == 0:
-                    break #Exit cut loop, one cut failed
-            else:
-                print "Error branch %s not found in listOfBranchNames"%bName
-                print "Please cross-check, the available list of branches:"
-                print ""
-                print listOfBranchNames
-                print ""
-                print "exiting"
-                exit(os.EX_USAGE)
+        for branch,passes in listOfCutBranches:
+            if not passes(branch[idx]):
+                muonPassedAllCuts = 0
+                break #Exit cut loop, one cut failed
 
         # Check if selection passed, if so append a muon to the list
         if muonPassedAllCuts == True:
-            # Determine Energy for 4-vector
-            energy = m.sqrt( event.mu_ibt_px[idx]**2 + 
-                             event.mu_ibt_py[idx]**2 +
-                             event.mu_ibt_pz[idx]**2 +
-                             0.1056583745**2)
-
             # Make the Muon
-            thisMuon = Muon(event.mu_ibt_px[idx],
-                            event.mu_ibt_py[idx],
-                            event.mu_ibt_pz[idx],
-                            energy)
-    
-            thisMuon.charge = event.mu_ibt_charge[idx]
-
-            # Store impact parameters
-            thisMuon.dxy = event.mu_ibt_dxy[idx]
-            thisMuon.dz = event.mu_ibt_dz[idx]
-                
-            # track fit info
-            thisMuon.normChi2 = event.mu_ibt_normalizedChi2[idx]
-            
-            if useGlobalTrack:
-                # Determine Energy for 4-vector using the global track instead
-                energy = m.sqrt( event.mu_gt_px[idx]**2 + 
-                                 event.mu_gt_py[idx]**2 +
-                                 event.mu_gt_pz[idx]**2 +
-                                 0.1056583745**2)
-
-                # Update the four-vector
-                thisMuon.setPxPyPzE(event.mu_gt_px[idx],
-                                event.mu_gt_py[idx],
-                                event.mu_gt_pz[idx],
-                                energy)
-
-                # Store charge from global track instead
-                thisMuon.charge = event.mu_gt_charge[idx]
-                
-                # Store impact parameters from global track instead
-                thisMuon.dxy = event.mu_gt_dxy[idx]
-                thisMuon.dz = event.mu_gt_dz[idx]
-                
-                # track fit info
-                thisMuon.normChi2 = event.mu_gt_normalizedChi2[idx]
-
-            
-            # Store Other Properties
-
-            # Try getting muon type using boost python (doesn't work...), curse you std::vector<bool>
-            #import pluginvectorBoolParser # From LFVUtilities/plugins
-            #boolParser = pluginvectorBoolParser.parseVectorBool()
-            #thisMuon.isGlobal     = boolParser.parse(event.mu_isGlobalMuon, idx)
-            #thisMuon.isHighPt     = boolParser.parse(event.mu_isHighPtMuon, idx)
-            #thisMuon.isLoose      = boolParser.parse(event.mu_isLooseMuon, idx)
-            #thisMuon.isMedium     = boolParser.parse(event.mu_isMediumMuon, idx)
-            #thisMuon.isPF         = boolParser.parse(event.mu_isPFMuon, idx)
-            #thisMuon.isSoft       = boolParser.parse(event.mu_isSoftMuon, idx)
-            #thisMuon.isStandAlone = boolParser.parse(event.mu_isStandAloneMuon, idx)
-            #thisMuon.isTight      = boolParser.parse(event.mu_isTightMuon, idx)
-            #thisMuon.isTracker    = boolParser.parse(event.mu_isTrackerMuon, idx)
-
-            # Try getting muon type using ROOT macro, curse you std::vector<bool>
-            #cmssw_base = os.getenv("CMSSW_BASE")
-            #r.gROOT.LoadMacro('%s/src/LFVAnalysis/LFVUtilities/include/getValFromVectorBool.h+'%cmssw_base)
-            thisMuon.isGlobal     = r.getValFromVectorBool(event.mu_isGlobalMuon, idx)
-            thisMuon.isHighPt     = r.getValFromVectorBool(event.mu_isHighPtMuon, idx)
-            thisMuon.isLoose      = r.getValFromVectorBool(event.mu_isLooseMuon, idx)
-            thisMuon.isMedium     = r.getValFromVectorBool(event.mu_isMediumMuon, idx)
-            thisMuon.isPF         = r.getValFromVectorBool(event.mu_isPFMuon, idx)
-            thisMuon.isSoft       = r.getValFromVectorBool(event.mu_isSoftMuon, idx)
-            thisMuon.isStandAlone = r.getValFromVectorBool(event.mu_isStandAloneMuon, idx)
-            thisMuon.isTight      = r.getValFromVectorBool(event.mu_isTightMuon, idx)
-            thisMuon.isTracker    = r.getValFromVectorBool(event.mu_isTrackerMuon, idx)
-            
-            thisMuon.isoTrackerBased03 = event.mu_isoTrackerBased03[idx]
-            
-            thisMuon.numHitsPix = event.mu_numberOfValidPixelHits[idx]
-            thisMuon.numHitsTrk = event.mu_trackerLayersWithMeasurement[idx]
-            thisMuon.numMatchedMuStations = event.mu_numberOfMatchedStations[idx]
+            thisMuon = makeMuon(event, idx, useGlobalTrack, bits)
 
             if debug:
                 print "| %i | %f | %f | %f | %f |"%(idx, thisMuon.px(), thisMuon.py(), thisMuon.pz(), thisMuon.E())
@@ -193,3 +248,36 @@ def getSelectedMuons(event, selDict, numMuons, delim="-", listOfBranchNames=None
             ret_muons.append(thisMuon)
 
     return ret_muons
+
+def getSelectedMuonsCascade(event, cascadePlan, numMuons, useGlobalTrack=False, debug=False, bits=None, dict_objects=None):
+    """
+    Returns a dictionary whose keys are the selection levels and whose values
+    are the lists of Muons passing each level.  Levels are evaluated in
+    order on the survivors of the previous level, see getCascadePlan, and
+    the Muons are shared between levels.
+
+    event             - entry of a TTree
+    cascadePlan       - list returned by getCascadePlan, e.g. for the compiled
+                        levels of muonSelection
+    numMuons          - Number of Muons in event
+    useGlobalTrack    - If true (false) stores the global (ibt) track info
+    debug             - If true prints additional debugging information
+    bits              - Optional, vectorBoolCache of event, e.g. shared by several selections
+    dict_objects      - Optional, Muons of event already built with the same
+                        useGlobalTrack, see getCascadedSelection
+    """
+
+    # Consistency Check on length
+    bName = cascadePlan[0][1][0].bName
+    if numMuons != len( getattr(event, bName)):
+        if debug:
+            print "numMuons = %i"%(numMuons)
+            print "Error numMuons != length of branch %s"%(bName)
+            print "Resetting numMuons to %i, undefined behavior may occur!!!"%(len( getattr(event, bName)))
+        numMuons = len( getattr(event, bName))
+
+    # The vector<bool> branches are unpacked once for the cuts and the muons
+    if bits is None:
+        bits = vectorBoolCache(event)
+
+    return getCascadedSelection(event, cascadePlan, numMuons, bitRefBranches, lambda idx: makeMuon(event, idx, useGlobalTrack, bits), bits, dict_objects)
@@ -1,5 +1,8 @@
 from LFVAnalysis.LFVObjects.tau import Tau
-from LFVAnalysis.LFVUtilities.utilities import passesCut, selLevels, supOperators
+from LFVAnalysis.LFVUtilities.cascadeSelector import getCascadedSelection
+from LFVAnalysis.LFVUtilities.cutCompiler import compileSelection
+from LFVAnalysis.LFVUtilities.utilities import selLevels, supOperators
+from LFVAnalysis.LFVUtilities.vectorBool import vectorBoolCache
 from LFVAnalysis.LFVUtilities.nesteddict import nesteddict
 
 import math as m
@@ -35,6 +38,47 @@ tauSelection["kinIdIso"]["tau_byTightIsolationMVArun2v1DBoldDMwLT"] = (0.5, "g"
 for bName,cutTuple in tauSelection["kinId"].iteritems():
     tauSelection["kinIdIso"][bName] = cutTuple
 
+# Branches read by makeTau
+tauBranches = [
+        "tau_againstElectronVLooseMVA6",
+        "tau_againstMuonTight3",
+        "tau_byTightIsolationMVArun2v1DBoldDMwLT",
+        "tau_charge",
+        "tau_decayModeFinding",
+        "tau_dxy",
+        "tau_energy",
+        "tau_px",
+        "tau_py",
+        "tau_pz"
+        ]
+
+def makeTau(event, idx):
+    """
+    Returns a Tau built from the idx^th tau of event
+
+    event             - entry of a TTree
+    idx               - index of the tau in event
+    """
+
+    # Make the Tau
+    thisTau = Tau(  event.tau_px[idx],
+                    event.tau_py[idx],
+                    event.tau_pz[idx],
+                    event.tau_energy[idx])
+
+    # Store Other Properties
+    thisTau.charge = event.tau_charge[idx]
+
+    thisTau.againstElectronVLooseMVA6 = event.tau_againstElectronVLooseMVA6[idx]
+    thisTau.againstMuonTight3 = event.tau_againstMuonTight3[idx]
+    thisTau.decayModeFinding = event.tau_decayModeFinding[idx]
+
+    thisTau.dxy = event.tau_dxy[idx]
+
+    thisTau.byTightIsolationMVArun2v1DBoldDMwLT = event.tau_byTightIsolationMVArun2v1DBoldDMwLT[idx]
+
+    return thisTau
+
 def getSelectedTaus(event, selDict, numTaus, delim="-", listOfBranchNames=None, debug=False):
     """
     Returns a list of Taus passing selection defined in selDict 
@@ -49,6 +93,10 @@ def getSelectedTaus(event, selDict, numTaus, delim="-", listOfBranchNames=None,
                               ["pt"]  = ( 10, "g")
                               ["eta"] = ( 2.4, "fabs-le")
 
+                        selDict may also be the list of compiledCut returned by
+                        compileSelection(selDict), in which case no validation or
+                        string parsing is performed here
+
     numTaus           - Number of Taus in event
     delim             - Character which delimites the string portion of the tuple
                         value stored in selDict
@@ -57,15 +105,19 @@ def getSelectedTaus(event, selDict, numTaus, delim="-", listOfBranchNames=None,
     debug             - If true prints additional debugging information
     """
 
-    # Determine the list of branches
-    if listOfBranchNames is None:
-        listOfBranchNames = [branch.GetName() for branch in event.GetListOfBranches() ]
+    # Compile the selection unless the caller already did
+    listOfCuts = selDict
+    if isinstance(selDict, dict):
+        # Determine the list of branches
+        if listOfBranchNames is None:
+            listOfBranchNames = [branch.GetName() for branch in event.GetListOfBranches() ]
+        listOfCuts = compileSelection(selDict, delim, listOfBranchNames)
 
     # Consistency Check on length
-    if numTaus != len( getattr(event, selDict.keys()[0])):
-        print "Error numTaus != length of branch %s"%(selDict.keys()[0])
+    if numTaus != len( getattr(event, listOfCuts[0].bName)):
+        print "Error numTaus != length of branch %s"%(listOfCuts[0].bName)
         print "Resetting numTaus, undefined behavior may occur!!!"
-        numTaus = len( getattr(event, selDict.keys()[0]))
+        numTaus = len( getattr(event, listOfCuts[0].bName))
     
     # Loop Over physics objects in the event
     if debug:
@@ -73,46 +125,24 @@ def getSelectedTaus(event, selDict, numTaus, delim="-", listOfBranchNames=None,
         print "| idx | px | py | pz | E |"
         print "| --- | -- | -- | -- | - |"
     
+    # Look up each branch once per event instead of once per object
+    bits = vectorBoolCache(event)
+    listOfCutBranches = bits.getBranches(listOfCuts, bitRefBranches)
+
     ret_taus = []
     for idx in range(0,numTaus):
         tauPassedAllCuts = 1
 
         # Loop Over Cuts
-        for bName,cutTuple in selDict.iteritems():
-            if bName in listOfBranchNames:
-                bVal = (getattr( event, bName))[idx]
-                if bName in bitRefBranches:
-                    bVal =  r.getValFromVectorBool( getattr( event, bName), idx)
-                tauPassedAllCuts *= passesCut( bVal, cutTuple[0], cutTuple[1].split(delim) )
-                if tauPassedAllCuts == 0:
-                    break #Exit cut loop, one cut failed
-            else:
-                print "Error branch %s not found in listOfBranchNames"%bName
-                print "Please cross-check, the available list of branches:"
-                print ""
-                print listOfBranchNames
-                print ""
-                print "exiting"
-                exit(os.EX_USAGE)
+        for branch,passes in listOfCutBranches:
+            if not passes(branch[idx]):
+                tauPassedAllCuts = 0
+                break #Exit cut loop, one cut failed
 
         # Check if selection passed, if so append a tau to the list
         if tauPassedAllCuts == True:
             # Make the Tau
-            thisTau = Tau(  event.tau_px[idx],
-                            event.tau_py[idx],
-                            event.tau_pz[idx],
-                            event.tau_energy[idx])
-
-            # Store Other Properties
-            thisTau.charge = event.tau_charge[idx]
-
-            thisTau.againstElectronVLooseMVA6 = event.tau_againstElectronVLooseMVA6[idx]
-            thisTau.againstMuonTight3 = event.tau_againstMuonTight3[idx]
-            thisTau.decayModeFinding = event.tau_decayModeFinding[idx]
-            
-            thisTau.dxy = event.tau_dxy[idx]
-            
-            thisTau.byTightIsolationMVArun2v1DBoldDMwLT = event.tau_byTightIsolationMVArun2v1DBoldDMwLT[idx]
+            thisTau = makeTau(event, idx)
 
             if debug:
                 print "| %i | %f | %f | %f | %f |"%(idx, thisTau.px(), thisTau.py(), thisTau.pz(), thisTau.E())
@@ -121,3 +151,30 @@ def getSelectedTaus(event, selDict, numTaus, delim="-", listOfBranchNames=None,
             ret_taus.append(thisTau)
 
     return ret_taus
+
+def getSelectedTausCascade(event, cascadePlan, numTaus, debug=False, bits=None, dict_objects=None):
+    """
+    Returns a dictionary whose keys are the selection levels and whose values
+    are the lists of Taus passing each level.  Levels are evaluated in
+    order on the survivors of the previous level, see getCascadePlan, and
+    the Taus are shared between levels.
+
+    event             - entry of a TTree
+    cascadePlan       - list returned by getCascadePlan, e.g. for the compiled
+                        levels of tauSelection
+    numTaus           - Number of Taus in event
+    debug             - If true prints additional debugging information
+    bits              - Optional, vectorBoolCache of event, e.g. shared by several selections
+    dict_objects      - Optional, Taus of event already built, see getCascadedSelection
+    """
+
+    # Consistency Check on length
+    bName = cascadePlan[0][1][0].bName
+    if numTaus != len( getattr(event, bName)):
+        if debug:
+            print "numTaus = %i"%(numTaus)
+            print "Error numTaus != length of branch %s"%(bName)
+            print "Resetting numTaus to %i, undefined behavior may occur!!!"%(len( getattr(event, bName)))
+        numTaus = len( getattr(event, bName))
+
+    return getCascadedSelection(event, cascadePlan, numTaus, bitRefBranches, lambda idx: makeTau(event, idx), bits, dict_objects)
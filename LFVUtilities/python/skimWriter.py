@@ -0,0 +1,71 @@
+import os
+import ROOT as r
+
+def getPartFileName(skimFileName, idx):
+    """
+    Returns the physical filename of the idx^th part of a skim written by
+    several processes, e.g. skim.root -> skim_part3.root
+
+    skimFileName    - physical filename of the full skim
+    idx             - index of the part
+    """
+
+    base, ext = os.path.splitext(skimFileName)
+    if ext == "":
+        ext = ".root"
+
+    return "%s_part%i%s"%(base, idx, ext)
+
+class skimWriter:
+    def __init__(self, tree, skimFileName, compress=1):
+        """
+        Writes selected entries of tree to a new TTree, with the same name, in
+        skimFileName.  Only the branches active in tree when the skimWriter is
+        created are kept, see activateBranches, the skim is therefore readable
+        by lfvAnalyzer with the same inputTreeName.
+
+        tree            - TTree to skim, the current entry of tree is written by fill()
+        skimFileName    - physical filename of the output TFile, it is recreated
+        compress        - compression settings of the TFile, see TFile::SetCompressionSettings
+        """
+
+        self.skimFileName = skimFileName
+
+        self.skimFile = r.TFile(skimFileName, "RECREATE", "", compress)
+        if not self.skimFile or self.skimFile.IsZombie():
+            print "Error unable to create skim file %s"%skimFileName
+            print "exiting"
+            exit(os.EX_CANTCREAT)
+
+        # The clone shares the branch buffers of tree, only active branches are cloned
+        self.skimFile.cd()
+        self.skimTree = tree.CloneTree(0)
+
+        return
+
+    def fill(self):
+        """
+        Writes the current entry of the skimmed TTree to the skim
+        """
+
+        self.skimTree.Fill()
+
+        return
+
+    def close(self, numProcessed=0):
+        """
+        Writes the skim and closes the skim file.  The number of entries the
+        skim was selected from is stored as a TParameter named numProcessed,
+        e.g. for normalization
+
+        numProcessed - number of entries the skim was selected from
+        """
+
+        self.skimFile.cd()
+        self.skimTree.Write()
+        r.TParameter("Long64_t")("numProcessed", numProcessed).Write()
+
+        print "skimmed %i of %i entries to %s"%(self.skimTree.GetEntries(), numProcessed, self.skimFileName)
+        self.skimFile.Close()
+
+        return
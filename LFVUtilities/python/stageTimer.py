@@ -0,0 +1,227 @@
+from timeit import default_timer
+import json
+import resource
+import time
+
+def getPeakRSS():
+    """
+    Returns the peak resident set size of this process in MB
+    """
+
+    # ru_maxrss is given in kB on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+
+class stageTimer:
+    def __init__(self, metricsFileName=None, metricsInterval=60.):
+        """
+        Accumulates the time spent in each stage of an event loop and reports
+        the throughput of the loop.  The time between two calls of lap() is
+        attributed to the stage given to the second call, time not closed by
+        a lap() before the next startEvent() is attributed to the next lap().
+
+        metricsFileName - Optional, physical filename of a file the metrics are
+                          streamed to, one JSON object per line, see writeMetrics
+        metricsInterval - minimum number of seconds between two lines written
+                          to metricsFileName
+        """
+
+        self.listOfStages = []  # stages in order of their first lap
+        self.dict_time = {}     # cumulative time of each stage in seconds
+        self.numEvts = 0        # events started
+        self.numTotal = 0       # events expected
+        self.wallTime = 0.      # wall time of the finished loops in seconds
+        self.peakRSS = 0.       # peak resident set size in MB
+
+        self.metricsFileName = metricsFileName
+        self.metricsInterval = metricsInterval
+        self.metricsFile = None
+
+        self.startTime = None
+        self.lastMark = None
+        self.lastWrite = None
+
+        return
+
+    def __getstate__(self):
+        # The open metrics file stays with the process which opened it
+        dict_state = dict(self.__dict__)
+        dict_state["metricsFile"] = None
+        return dict_state
+
+    def begin(self, numTotal):
+        """
+        Starts the clock of an event loop over numTotal events
+        """
+
+        self.numTotal += numTotal
+        self.startTime = default_timer()
+        self.lastMark = self.startTime
+        self.lastWrite = self.startTime
+
+        if self.metricsFileName is not None and self.metricsFile is None:
+            self.metricsFile = open(self.metricsFileName, "w")
+
+        return
+
+    def startEvent(self):
+        """
+        Marks the start of an event, metrics are streamed to the metrics file
+        if metricsInterval elapsed since the last write
+        """
+
+        self.numEvts += 1
+        if self.metricsFile is not None and (self.lastMark - self.lastWrite) > self.metricsInterval:
+            self.writeMetrics()
+
+        return
+
+    def lap(self, stage):
+        """
+        Attributes the time since the last lap to stage
+        """
+
+        now = default_timer()
+        if stage not in self.dict_time:
+            self.listOfStages.append(stage)
+            self.dict_time[stage] = 0.
+        self.dict_time[stage] += now - self.lastMark
+        self.lastMark = now
+
+        return
+
+    def end(self):
+        """
+        Stops the clock of the event loop and closes the metrics file
+        """
+
+        if self.startTime is not None:
+            self.wallTime += default_timer() - self.startTime
+            self.startTime = None
+        self.peakRSS = max(self.peakRSS, getPeakRSS())
+
+        if self.metricsFile is not None:
+            self.writeMetrics()
+            self.metricsFile.close()
+            self.metricsFile = None
+
+        return
+
+    def add(self, other):
+        """
+        Adds the stage times and processed events of the stageTimer other to
+        self, e.g. of a parallel worker.  The wall time and the number of
+        expected events remain those of self, the peak RSS is the largest of
+        both.
+        """
+
+        for stage in other.listOfStages:
+            if stage not in self.dict_time:
+                self.listOfStages.append(stage)
+                self.dict_time[stage] = 0.
+            self.dict_time[stage] += other.dict_time[stage]
+        self.numEvts += other.numEvts
+        self.peakRSS = max(self.peakRSS, other.peakRSS)
+
+        return
+
+    def getElapsed(self):
+        """
+        Returns the wall time of the finished loops plus the running loop in seconds
+        """
+
+        elapsed = self.wallTime
+        if self.startTime is not None:
+            elapsed += default_timer() - self.startTime
+
+        return elapsed
+
+    def getRate(self):
+        """
+        Returns the number of events per second
+        """
+
+        elapsed = self.getElapsed()
+        if elapsed <= 0:
+            return 0.
+
+        return self.numEvts / elapsed
+
+    def getETA(self):
+        """
+        Returns the estimated number of seconds until all events are processed
+        """
+
+        rate = self.getRate()
+        if rate <= 0:
+            return 0.
+
+        return max(self.numTotal - self.numEvts, 0) / rate
+
+    def getMetrics(self):
+        """
+        Returns a dictionary of the current metrics
+        """
+
+        return {
+                "time":time.time(),
+                "numEvts":self.numEvts,
+                "numTotal":self.numTotal,
+                "elapsed":self.getElapsed(),
+                "evtsPerSec":self.getRate(),
+                "eta":self.getETA(),
+                "peakRSS":max(self.peakRSS, getPeakRSS()),
+                "stages":self.dict_time
+                }
+
+    def getProgress(self):
+        """
+        Returns a one line summary of the progress, e.g. for periodic printing
+        """
+
+        return "Processed %i of %i events, %.1f events/s, ETA %.0f s"%(self.numEvts, self.numTotal, self.getRate(), self.getETA())
+
+    def writeMetrics(self):
+        """
+        Writes the current metrics as one JSON object to the metrics file
+        """
+
+        if self.metricsFile is None:
+            return
+
+        self.metricsFile.write("%s\n"%json.dumps(self.getMetrics(), sort_keys=True))
+        self.metricsFile.flush()
+        self.lastWrite = default_timer()
+
+        return
+
+    def writeMetricsIfDue(self):
+        """
+        Writes the current metrics to the metrics file if metricsInterval elapsed
+        since the last write, e.g. after each job merged by the parallel loops
+        """
+
+        if self.metricsFile is not None and (default_timer() - self.lastWrite) >= self.metricsInterval:
+            self.writeMetrics()
+
+        return
+
+    def printSummary(self):
+        """
+        Prints the time spent in each stage, in markdown format, and the throughput
+        """
+
+        elapsed = self.getElapsed()
+        print "| stage | time [s] | fraction | time per event [ms] |"
+        print "| ----- | -------- | -------- | ------------------- |"
+        for stage in self.listOfStages:
+            fraction = 0.
+            if elapsed > 0:
+                fraction = self.dict_time[stage] / elapsed
+            timePerEvt = 0.
+            if self.numEvts > 0:
+                timePerEvt = 1e3 * self.dict_time[stage] / self.numEvts
+            print "| %s | %f | %f | %f |"%(stage, self.dict_time[stage], fraction, timePerEvt)
+
+        print "processed %i events in %.1f s, %.1f events/s, peak RSS %.1f MB"%(self.numEvts, elapsed, self.getRate(), max(self.peakRSS, getPeakRSS()))
+
+        return
@@ -0,0 +1,347 @@
+import math as m
+import numpy as np
+import os
+import ROOT as r
+
+# Branches of each collection written by makeSyntheticNtuple, name -> std::vector value type
+dict_muonBranchTypes = {
+        "mu_gt_charge":"int",
+        "mu_gt_dxy":"float",
+        "mu_gt_dz":"float",
+        "mu_gt_normalizedChi2":"float",
+        "mu_gt_px":"float",
+        "mu_gt_py":"float",
+        "mu_gt_pz":"float",
+        "mu_ibt_charge":"int",
+        "mu_ibt_dxy":"float",
+        "mu_ibt_dz":"float",
+        "mu_ibt_eta":"float",
+        "mu_ibt_normalizedChi2":"float",
+        "mu_ibt_pt":"float",
+        "mu_ibt_px":"float",
+        "mu_ibt_py":"float",
+        "mu_ibt_pz":"float",
+        "mu_isGlobalMuon":"bool",
+        "mu_isHighPtMuon":"bool",
+        "mu_isLooseMuon":"bool",
+        "mu_isMediumMuon":"bool",
+        "mu_isPFMuon":"bool",
+        "mu_isSoftMuon":"bool",
+        "mu_isStandAloneMuon":"bool",
+        "mu_isTightMuon":"bool",
+        "mu_isTrackerMuon":"bool",
+        "mu_isoTrackerBased03":"float",
+        "mu_numberOfMatchedStations":"int",
+        "mu_numberOfValidPixelHits":"int",
+        "mu_trackerLayersWithMeasurement":"int"
+        }
+
+dict_elBranchTypes = {
+        "gsf_charge":"int",
+        "gsf_dxy":"float",
+        "gsf_dz":"float",
+        "gsf_energy":"float",
+        "gsf_eta":"float",
+        "gsf_px":"float",
+        "gsf_py":"float",
+        "gsf_pz":"float"
+        }
+
+dict_tauBranchTypes = {
+        "tau_againstElectronVLooseMVA6":"float",
+        "tau_againstMuonTight3":"float",
+        "tau_byTightIsolationMVArun2v1DBoldDMwLT":"float",
+        "tau_charge":"float",
+        "tau_decayModeFinding":"float",
+        "tau_dxy":"float",
+        "tau_energy":"float",
+        "tau_eta":"float",
+        "tau_hasSecondaryVertex":"bool",
+        "tau_isPFTau":"bool",
+        "tau_pt":"float",
+        "tau_px":"float",
+        "tau_py":"float",
+        "tau_pz":"float"
+        }
+
+dict_genBranchTypes = {
+        "mc_charge":"int",
+        "mc_energy":"float",
+        "mc_pdgId":"int",
+        "mc_px":"float",
+        "mc_py":"float",
+        "mc_pz":"float",
+        "mc_status":"int"
+        }
+
+# Default mean number of objects per event, keyed by multiplicity branch
+dict_defaultMultiplicities = {
+        "gsf_n":2.,
+        "mc_n":20.,
+        "mu_n":2.,
+        "tau_n":3.
+        }
+
+defaultTriggers = [
+        "trig_HLT_Mu50_accept",
+        "trig_HLT_TkMu50_accept"
+        ]
+
+# |pdgId| of the gen particles not coming from the hvy resonance
+genFillerPdgIds = (1, 2, 11, 13, 21, 22, 211)
+
+def bookVectorBranches(tree, dict_branchTypes):
+    """
+    Returns a dictionary of the std::vector, keyed by branch name, each
+    attached to a new TBranch of tree
+
+    tree                - TTree to add the branches to
+    dict_branchTypes    - dictionary of branch name -> std::vector value type
+    """
+
+    dict_vectors = {}
+    for bName,valueType in sorted(dict_branchTypes.iteritems()):
+        dict_vectors[bName] = r.std.vector(valueType)()
+        tree.Branch(bName, dict_vectors[bName])
+
+    return dict_vectors
+
+def fillVectors(dict_vectors, dict_branchTypes, dict_values):
+    """
+    Replaces the contents of each std::vector of dict_vectors by the values of
+    the array with the same key in dict_values
+
+    dict_vectors        - dictionary returned by bookVectorBranches
+    dict_branchTypes    - dictionary of branch name -> std::vector value type
+    dict_values         - dictionary of branch name -> array of values
+    """
+
+    for bName,vec in dict_vectors.iteritems():
+        vec.clear()
+        if dict_branchTypes[bName] == "bool":
+            for val in np.asarray(dict_values[bName], dtype=np.bool_).tolist():
+                vec.push_back(val)
+        elif dict_branchTypes[bName] == "int":
+            for val in np.asarray(dict_values[bName], dtype=np.int64).tolist():
+                vec.push_back(val)
+        else:
+            for val in np.asarray(dict_values[bName], dtype=np.float64).tolist():
+                vec.push_back(val)
+
+    return
+
+def getKinematics(rng, numObjs, ptScale, ptMin, etaMax, mass=0.):
+    """
+    Returns a dictionary of numpy arrays (pt, eta, phi, px, py, pz, energy) of
+    numObjs objects, pt falls exponentially above ptMin and eta is uniform
+
+    rng     - numpy RandomState
+    numObjs - number of objects
+    ptScale - slope of the exponential pt spectrum in GeV
+    ptMin   - minimum pt in GeV
+    etaMax  - maximum |eta|
+    mass    - mass of the objects in GeV
+    """
+
+    pt = ptMin + rng.exponential(ptScale, numObjs)
+    eta = rng.uniform(-etaMax, etaMax, numObjs)
+    phi = rng.uniform(-m.pi, m.pi, numObjs)
+
+    return makeKinematics(pt, eta, phi, mass)
+
+def makeKinematics(pt, eta, phi, mass=0.):
+    """
+    Returns the dictionary of getKinematics for given pt, eta and phi arrays
+    """
+
+    px = pt * np.cos(phi)
+    py = pt * np.sin(phi)
+    pz = pt * np.sinh(eta)
+    energy = np.sqrt(px**2 + py**2 + pz**2 + mass**2)
+
+    return { "pt":pt, "eta":eta, "phi":phi, "px":px, "py":py, "pz":pz, "energy":energy }
+
+def concatKinematics(dict_first, dict_second):
+    """
+    Returns the dictionary of getKinematics holding the objects of
+    dict_first followed by those of dict_second
+    """
+
+    return dict( (key, np.concatenate((dict_first[key], dict_second[key]))) for key in dict_first )
+
+def makeSyntheticNtuple(fileName, numEvts, treeName="IIHEAnalysis", dict_multiplicities=None, signalFraction=1., numPadBranches=0, padSize=10, listOfTriggers=defaultTriggers, seed=1, compress=1, debug=False):
+    """
+    Writes a TTree with the branches of an IIHE ntuple read by lfvAnalyzer
+    (mu_ibt_*, mu_gt_*, gsf_*, tau_*, mc_*, trig_*, multiplicities and the
+    std::vector<bool> ID flags) filled with random events, e.g. to benchmark
+    the analysis without access to real ntuples.
+
+    A fraction signalFraction of the events hold a hvy resonance, of uniform
+    mass in [500, 3000] GeV, decaying to a muon and a tau which are present
+    at gen level (status 23) and at reco level.  All other objects are drawn
+    from falling pt spectra, their numbers from Poisson distributions.
+
+    fileName            - physical filename of the output TFile, it is recreated
+    numEvts             - number of events
+    treeName            - name of the TTree
+    dict_multiplicities - dictionary of multiplicity branch -> mean number of
+                          objects per event, missing keys are taken from
+                          dict_defaultMultiplicities
+    signalFraction      - fraction of events holding a hvy resonance, events
+                          without one have no gen candidate in lfvAnalyzer
+    numPadBranches      - number of additional std::vector<float> branches
+                          never read by the analysis, mimics the width of real
+                          ntuples, e.g. to measure the effect of branch pruning
+    padSize             - number of elements of each padding branch per event
+    listOfTriggers      - list of trigger branch names, a trigger fires if the
+                          event holds a muon with pt above 50 GeV
+    seed                - seed of the random number generator, the same seed
+                          gives the same events
+    compress            - compression settings of the TFile, see TFile::SetCompressionSettings
+    debug               - If true prints additional debugging information
+    """
+
+    multiplicities = dict(dict_defaultMultiplicities)
+    if dict_multiplicities is not None:
+        multiplicities.update(dict_multiplicities)
+
+    outFile = r.TFile(fileName, "RECREATE", "", compress)
+    if not outFile or outFile.IsZombie():
+        print "Error unable to create synthetic ntuple %s"%fileName
+        print "exiting"
+        exit(os.EX_CANTCREAT)
+
+    outFile.cd()
+    tree = r.TTree(treeName, "synthetic IIHE ntuple")
+
+    # Scalar branches
+    dict_scalars = {}
+    for bName in sorted(multiplicities.keys()) + list(listOfTriggers):
+        dict_scalars[bName] = np.zeros(1, dtype=np.int32)
+        tree.Branch(bName, dict_scalars[bName], "%s/I"%bName)
+
+    # Vector branches
+    dict_padBranchTypes = dict( ("pad_%i"%idx, "float") for idx in range(0,numPadBranches) )
+    listOfCollections = [ dict_muonBranchTypes, dict_elBranchTypes, dict_tauBranchTypes, dict_genBranchTypes, dict_padBranchTypes ]
+    listOfVectors = [ bookVectorBranches(tree, dict_branchTypes) for dict_branchTypes in listOfCollections ]
+
+    rng = np.random.RandomState(seed)
+    for evt in range(0,numEvts):
+        if debug and (evt % 10000) == 0:
+            print "generating event %i of %i"%(evt,numEvts)
+
+        numMuons = rng.poisson(multiplicities["mu_n"])
+        numEls = rng.poisson(multiplicities["gsf_n"])
+        numTaus = rng.poisson(multiplicities["tau_n"])
+        numGen = rng.poisson(multiplicities["mc_n"])
+
+        muons = getKinematics(rng, numMuons, 30., 3., 2.6, 0.1056583745)
+        els = getKinematics(rng, numEls, 25., 5., 2.6)
+        taus = getKinematics(rng, numTaus, 30., 15., 2.5, 1.77686)
+        gen = getKinematics(rng, numGen, 20., 0., 5.)
+        genPdgIds = rng.choice(genFillerPdgIds, numGen) * rng.choice((-1, 1), numGen)
+        genStatus = rng.choice((1, 2), numGen)
+        muCharge = rng.choice((-1, 1), numMuons)
+        tauCharge = rng.choice((-1, 1), numTaus)
+
+        # Hvy resonance decaying to a back to back muon and tau
+        if rng.uniform() < signalFraction:
+            mass = rng.uniform(500., 3000.)
+            eta = rng.uniform(-2., 2.)
+            phi = rng.uniform(-m.pi, m.pi)
+            pt = 0.5 * mass / m.cosh(eta)
+            genDaughters = makeKinematics(np.array([pt, pt]), np.array([eta, -eta]), np.array([phi, phi - m.pi]))
+            charge = rng.choice((-1, 1))
+
+            gen = concatKinematics(genDaughters, gen)
+            genPdgIds = np.concatenate(([-13 * charge, 15 * charge], genPdgIds))
+            genStatus = np.concatenate(([23, 23], genStatus))
+
+            # Reco muon smeared by 2%, visible tau pt is a fraction of the gen pt
+            muons = concatKinematics(makeKinematics(np.array([pt * rng.normal(1., 0.02)]), np.array([eta]), np.array([phi]), 0.1056583745), muons)
+            taus = concatKinematics(makeKinematics(np.array([pt * rng.uniform(0.4, 0.95)]), np.array([-eta]), np.array([phi - m.pi]), 1.77686), taus)
+            muCharge = np.concatenate(([charge], muCharge))
+            tauCharge = np.concatenate(([-charge], tauCharge))
+
+        numMuons = len(muons["pt"])
+        numTaus = len(taus["pt"])
+        numGen = len(gen["pt"])
+
+        dict_scalars["mu_n"][0] = numMuons
+        dict_scalars["gsf_n"][0] = numEls
+        dict_scalars["tau_n"][0] = numTaus
+        dict_scalars["mc_n"][0] = numGen
+        trigAccept = int(numMuons > 0 and muons["pt"].max() > 50.)
+        for trigName in listOfTriggers:
+            dict_scalars[trigName][0] = trigAccept
+
+        dict_values = {
+                "mu_gt_charge":muCharge,
+                "mu_gt_dxy":rng.normal(0., 0.01, numMuons),
+                "mu_gt_dz":rng.normal(0., 0.05, numMuons),
+                "mu_gt_normalizedChi2":rng.exponential(1., numMuons),
+                "mu_gt_px":muons["px"] * rng.normal(1., 0.01, numMuons),
+                "mu_gt_py":muons["py"] * rng.normal(1., 0.01, numMuons),
+                "mu_gt_pz":muons["pz"] * rng.normal(1., 0.01, numMuons),
+                "mu_ibt_charge":muCharge,
+                "mu_ibt_dxy":rng.normal(0., 0.01, numMuons),
+                "mu_ibt_dz":rng.normal(0., 0.05, numMuons),
+                "mu_ibt_eta":muons["eta"],
+                "mu_ibt_normalizedChi2":rng.exponential(1., numMuons),
+                "mu_ibt_pt":muons["pt"],
+                "mu_ibt_px":muons["px"],
+                "mu_ibt_py":muons["py"],
+                "mu_ibt_pz":muons["pz"],
+                "mu_isoTrackerBased03":rng.exponential(0.05, numMuons),
+                "mu_numberOfMatchedStations":rng.randint(0, 5, numMuons),
+                "mu_numberOfValidPixelHits":rng.randint(0, 5, numMuons),
+                "mu_trackerLayersWithMeasurement":rng.randint(3, 18, numMuons),
+                "gsf_charge":rng.choice((-1, 1), numEls),
+                "gsf_dxy":rng.normal(0., 0.01, numEls),
+                "gsf_dz":rng.normal(0., 0.05, numEls),
+                "gsf_energy":els["energy"],
+                "gsf_eta":els["eta"],
+                "gsf_px":els["px"],
+                "gsf_py":els["py"],
+                "gsf_pz":els["pz"],
+                "tau_againstElectronVLooseMVA6":(rng.uniform(size=numTaus) < 0.9),
+                "tau_againstMuonTight3":(rng.uniform(size=numTaus) < 0.9),
+                "tau_byTightIsolationMVArun2v1DBoldDMwLT":(rng.uniform(size=numTaus) < 0.6),
+                "tau_charge":tauCharge,
+                "tau_decayModeFinding":(rng.uniform(size=numTaus) < 0.8),
+                "tau_dxy":rng.normal(0., 0.01, numTaus),
+                "tau_energy":taus["energy"],
+                "tau_eta":taus["eta"],
+                "tau_hasSecondaryVertex":(rng.uniform(size=numTaus) < 0.3),
+                "tau_isPFTau":(rng.uniform(size=numTaus) < 0.95),
+                "tau_pt":taus["pt"],
+                "tau_px":taus["px"],
+                "tau_py":taus["py"],
+                "tau_pz":taus["pz"],
+                "mc_charge":np.sign(genPdgIds) * np.in1d(np.abs(genPdgIds), (11, 13, 15, 211)),
+                "mc_energy":gen["energy"],
+                "mc_pdgId":genPdgIds,
+                "mc_px":gen["px"],
+                "mc_py":gen["py"],
+                "mc_pz":gen["pz"],
+                "mc_status":genStatus
+                }
+        for bName,valueType in dict_muonBranchTypes.iteritems():
+            if valueType == "bool":
+                dict_values[bName] = (rng.uniform(size=numMuons) < 0.9)
+        for bName in dict_padBranchTypes:
+            dict_values[bName] = rng.uniform(size=padSize)
+
+        for idx,dict_branchTypes in enumerate(listOfCollections):
+            fillVectors(listOfVectors[idx], dict_branchTypes, dict_values)
+
+        tree.Fill()
+
+    outFile.cd()
+    tree.Write()
+    outFile.Close()
+
+    if debug:
+        print "wrote %i synthetic events to %s"%(numEvts,fileName)
+
+    return
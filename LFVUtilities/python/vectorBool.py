@@ -0,0 +1,72 @@
+import numpy as np
+import ROOT as r
+
+def unpackVectorBool(vec):
+    """
+    Returns a numpy array holding the elements of the std::vector<bool> vec
+    as 0 or 1, the vector is unpacked by a single call of unpackVectorBool
+    from LFVUtilities/include/getValFromVectorBool.h which must be loaded
+
+    vec - std::vector<bool>, e.g. the value of a TBranch, or numpy array,
+          e.g. the value of a branch of a columnarEvent
+    """
+
+    if isinstance(vec, np.ndarray):
+        return vec.astype(np.int32)
+
+    # int matches the buffer types accepted for int* by PyROOT
+    out = np.zeros(vec.size(), dtype=np.int32)
+    if len(out) > 0:
+        r.unpackVectorBool(vec, out)
+
+    return out
+
+class vectorBoolCache:
+    def __init__(self, event):
+        """
+        Unpacks std::vector<bool> branches of one event on first access, see
+        get(), and holds the other branches looked up by getBranches().  Create
+        one vectorBoolCache per event, e.g. shared by several selections, the
+        arrays are not updated when the TTree moves to another entry.
+
+        event - entry of a TTree
+        """
+
+        self.event = event
+        self.dict_arrays = {}
+        self.dict_branches = {}
+
+        return
+
+    def get(self, bName):
+        """
+        Returns the numpy array returned by unpackVectorBool for branch bName
+
+        bName - name of a std::vector<bool> TBranch
+        """
+
+        if bName not in self.dict_arrays:
+            self.dict_arrays[bName] = unpackVectorBool(getattr(self.event, bName))
+
+        return self.dict_arrays[bName]
+
+    def getBranches(self, listOfCuts, bitRefBranches):
+        """
+        Returns a list with one tuple (branch, passes) per compiledCut of
+        listOfCuts, where branch is the unpacked array for branches in
+        bitRefBranches and the value of the TBranch otherwise
+
+        listOfCuts      - list of compiledCut
+        bitRefBranches  - list of names of std::vector<bool> branches
+        """
+
+        listOfCutBranches = []
+        for cut in listOfCuts:
+            if cut.bName in bitRefBranches:
+                listOfCutBranches.append( (self.get(cut.bName), cut.passes) )
+            else:
+                if cut.bName not in self.dict_branches:
+                    self.dict_branches[cut.bName] = getattr(self.event, cut.bName)
+                listOfCutBranches.append( (self.dict_branches[cut.bName], cut.passes) )
+
+        return listOfCutBranches